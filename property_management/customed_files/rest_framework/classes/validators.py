@@ -4,6 +4,9 @@ from bson import ObjectId
 
 
 class MongoUniqueValidator(UniqueValidator):
+    # in list serializers (many=True), values of all items are checked in first call by one query, and result is
+    # memoized in request (if not provided, in root serializer), so next items and next serializers of the same
+    # request don't query again. repeated values inside the list itself raise error for second item and after.
     def __init__(self, collection, field, message=None):
         self.queryset = None      # provide value None for default attribute
         self.collection = collection
@@ -11,10 +14,38 @@ class MongoUniqueValidator(UniqueValidator):
         self.message = message or f'The {field} must be unique.'
 
     def __call__(self, value, serializer_field):
+        if serializer_field.context.get('bulk'):   # checked for whole batch in one query, in creation of list serializer
+            return
         self.pk = getattr(serializer_field.parent, 'pk', None)
-        query = {self.field: value}
-        if self.pk:
-            # in updating, search all collections (for validating unique) except current collection
-            query['_id'] = {'$ne': ObjectId(self.pk)}
-        if self.collection.find_one(query):
+        root = serializer_field.root
+        memo = self.get_memo(serializer_field)
+        if value not in memo:
+            values = {value}
+            if isinstance(getattr(root, 'initial_data', None), list):
+                values.update(self.get_value(item) for item in root.initial_data if isinstance(item, dict))
+            self.query(values - set(memo), memo)
+
+        # _ids of documents have this value, except current document (in updating)
+        if memo[value] - {ObjectId(self.pk) if self.pk else None}:
             raise serializers.ValidationError(self.message)
+        if isinstance(getattr(root, 'initial_data', None), list):
+            seen = root.__dict__.setdefault('_unique_seen', {}).setdefault(self.field, set())
+            if value in seen:      # duplicate in the list
+                raise serializers.ValidationError(self.message)
+            seen.add(value)
+
+    def get_value(self, item):  # raw value like what CharField validates (strip whitespaces)
+        value = item.get(self.field)
+        return value.strip() if isinstance(value, str) else value
+
+    def get_memo(self, serializer_field):  # like: {'title1': {ObjectId(..)}, 'title2': set()}
+        request = serializer_field.context.get('request') or serializer_field.root
+        memos = request.__dict__.setdefault('_mongo_unique_memo', {})
+        return memos.setdefault((self.collection.name, self.field), {})
+
+    def query(self, values, memo):
+        values = [value for value in values if value is not None]
+        for value in values:
+            memo[value] = set()
+        for document in self.collection.find({self.field: {'$in': values}}, {'_id': 1, self.field: 1}):
+            memo[document[self.field]].add(document['_id'])
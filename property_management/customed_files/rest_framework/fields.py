@@ -22,3 +22,24 @@ class ListSerializer(serializers.Field):  # simple field used to give/receive py
 
     def to_representation(self, value):
         return value
+
+
+class CatalogField(serializers.JSONField):
+    # receives id (like 5, '5' or '۵'), name (like 'آجودانیه') or dict (like {'id': 5}), returns item of 'catalog'
+    # (like {'id': 5, 'NeighborhoodName': 'آجودانیه', 'Areaid': 1}). catalog is like main.catalogs.Catalog, names not
+    # in catalog (like values of crawled sites) are kept raw
+    default_error_messages = {'not_found': 'id {id} not found.'}
+
+    def __init__(self, catalog, **kwargs):
+        self.catalog = catalog
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        data = super().to_internal_value(data)
+        item = self.catalog.resolve(data)
+        if item is None:
+            id = self.catalog.get_id(data.get('id') if isinstance(data, dict) else data)
+            if id is not None:
+                self.fail('not_found', id=id)
+            return data
+        return item
@@ -0,0 +1,156 @@
+from django.conf import settings
+from django.core.cache import caches
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# cache of read views (FileDetail and FileList) in two tiers: 1- LRU in memory of every process (local) 2- django cache
+# (settings.RESPONSE_CACHE_ALIAS, like redis shared between gunicorn workers). locmem cache is the local stand-in of
+# shared tier (in tests or single process). RESPONSE_CACHE_ALIAS = None means only local tier.
+# invalidation: every cache has two counters in shared tier: 'changes' (bumped by every delete/clear) and 'clears'
+# (bumped by clear). local entries are valid only if 'changes' is not changed since they were set, so a change in one
+# process drops local entries of all processes (they refill from shared tier). keys of shared tier contain 'clears', so
+# clear() drops all shared entries without knowing their keys, and delete(key) drops only one key.
+# usage: file_detail_cache.get_or_set(id, lambda: mongo_db.file.find_one(..))  cached values must not change by callers
+
+
+class LRUCache:    # thread safe, least recently used item is removed when there are more than max_size items
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.items:
+                return default
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class ResponseCache:
+    def __init__(self, name, max_size=None, alias=None, timeout=None):
+        self.name = name
+        self.local = LRUCache(max_size or settings.RESPONSE_CACHE_SIZE)
+        self.alias = alias      # None means settings.RESPONSE_CACHE_ALIAS, '' means only local tier
+        self.timeout = timeout or settings.RESPONSE_CACHE_TIMEOUT
+        self.counters = {'changes': 0, 'clears': 0}     # used when there is no shared tier
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}     # of current process
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = settings.RESPONSE_CACHE_ALIAS if self.alias is None else self.alias
+        return caches[alias] if alias else None
+
+    def get_counters(self):   # (changes, clears)
+        if not self.shared:
+            return self.counters['changes'], self.counters['clears']
+        keys = [f'{self.name}:changes', f'{self.name}:clears']
+        counters = self.shared.get_many(keys)
+        return counters.get(keys[0], 0), counters.get(keys[1], 0)
+
+    def bump(self, *counters):
+        for counter in counters:
+            if not self.shared:
+                with self.lock:
+                    self.counters[counter] += 1
+                continue
+            key = f'{self.name}:{counter}'
+            self.shared.add(key, 0, None)
+            try:
+                self.shared.incr(key)
+            except ValueError:        # key evicted between add and incr
+                self.shared.set(key, 1, None)
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def lookup(self, key):   # returns (cached value or None, changes, clears)
+        changes, clears = self.get_counters()
+        entry = self.local.get(key)
+        if entry and entry[0] == changes:
+            self.count('local_hits')
+            return entry[1], changes, clears
+        value = self.shared.get(f'{self.name}:{clears}:{key}') if self.shared else None
+        if value is not None:
+            self.count('shared_hits')
+            self.local.set(key, (changes, value))
+        return value, changes, clears
+
+    def get(self, key):    # cached value or None (misses are counted in set_computed)
+        return self.lookup(key)[0]
+
+    def get_or_set(self, key, compute):   # returns cached value of key, or compute() (cached if it's not None)
+        value, changes, clears = self.lookup(key)
+        if value is not None:
+            return value
+        return self.set_computed(key, compute, changes, clears)
+
+    def set_computed(self, key, compute, changes, clears):  # after a missed lookup, changes and clears are from lookup
+        self.count('misses')
+        value = compute()
+        # if anything changed while computing, value could be stale and is not cached
+        if value is not None and self.get_counters() == (changes, clears):
+            self.local.set(key, (changes, value))
+            if self.shared:
+                self.shared.set(f'{self.name}:{clears}:{key}', value, self.timeout)
+        return value
+
+    def delete(self, *keys):
+        if self.shared:
+            clears = self.get_counters()[1]
+            self.shared.delete_many([f'{self.name}:{clears}:{key}' for key in keys])
+        for key in keys:
+            self.local.delete(key)
+        self.bump('changes')
+
+    def clear(self):
+        self.local.clear()
+        self.bump('clears', 'changes')
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        requests = sum(stats.values())
+        hits = stats['local_hits'] + stats['shared_hits']
+        return {**stats, 'hit_rate': round(hits / requests, 3) if requests else None, 'local_size': len(self.local)}
+
+
+file_detail_cache = ResponseCache('file_detail')     # keys are id of files (str)
+file_list_cache = ResponseCache('file_list')     # keys are from get_list_key
+
+
+def get_list_key(view_name, page, params):
+    # view_name like 'FileSearch', params is request.GET. same filters in different order have same key
+    params = sorted((key, sorted(params.getlist(key))) for key in params)
+    return hashlib.md5(json.dumps([view_name, page, params]).encode()).hexdigest()
+
+
+def invalidate_files(ids=None):   # call after saving files, ids of changed files (None means all files)
+    if ids is None:
+        file_detail_cache.clear()
+    elif ids:
+        file_detail_cache.delete(*[str(id) for id in ids])
+    file_list_cache.clear()      # any change could change the lists (order, filters or count)
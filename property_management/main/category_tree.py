@@ -0,0 +1,67 @@
+from django.core.cache import cache
+
+import threading
+from types import MappingProxyType
+
+# snapshot of all categories held in memory of every process, so resolving category (by id or slug) and its fathers
+# don't query database. Category.save/delete bump version in the cache, and processes reload their snapshot in
+# next get_category_tree(). usage: from main.category_tree import get_category_tree  >  get_category_tree().get(5)
+# note: in multiple processes (gunicorn workers) cache must be shared (settings.CACHES) to invalidate all processes
+version_key = 'category_tree_version'
+_tree, _version = None, None
+_lock = threading.Lock()
+
+
+class CategoryTree:
+    # categories are Category instances (filters prefetched and father_category linked to the snapshot's instances),
+    # treat them as read only, they are shared between all requests of the process
+    def __init__(self, categories):
+        self.categories = MappingProxyType({category.id: category for category in categories})
+        self.slugs = MappingProxyType({category.slug: category for category in categories})
+        for category in categories:
+            if category.father_category_id in self.categories:
+                category.father_category = self.categories[category.father_category_id]  # sets fk cache, no query
+
+    def __len__(self):
+        return len(self.categories)
+
+    def get(self, id, default=None):   # id could be str like request.data['category']
+        try:
+            return self.categories.get(int(id), default)
+        except (TypeError, ValueError):
+            return default
+
+    def get_by_slug(self, slug, default=None):
+        return self.slugs.get(slug, default)
+
+    def get_fathers(self, id):   # category and its fathers like: [samsung, phone, digital]
+        category, fathers = self.get(id), []
+        while category:
+            fathers.append(category)
+            category = self.categories.get(category.father_category_id)
+        return fathers
+
+    def get_childes(self, id):   # all childes in any level, like Category.get_childes()
+        category = self.get(id)
+        if not category:
+            return []
+        return [child for child in self.categories.values() if child.path.startswith(category.path) and child.id != category.id]
+
+
+def get_category_tree():
+    global _tree, _version
+    version = cache.get(version_key, 0)
+    if _tree is None or _version != version:
+        with _lock:
+            if _tree is None or _version != version:
+                from .models import Category     # prevent circular import (models.py imports this module)
+                _tree, _version = CategoryTree(list(Category.objects.prefetch_related('filters'))), version
+    return _tree
+
+
+def bump_category_tree_version():  # called after every change of categories
+    cache.add(version_key, 0, None)
+    try:
+        cache.incr(version_key)
+    except ValueError:        # key expired or evicted between add and incr
+        cache.set(version_key, 1, None)
@@ -1,3 +1,5 @@
+from django.conf import settings
+
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -5,11 +7,23 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support import expected_conditions as EC
-from urllib.parse import quote
+from selenium.common.exceptions import TimeoutException
+
+from lxml import html
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote, urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
 
 import time
 import re
 import os
+import queue
+import hashlib
+import requests
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
 
 
 class FileCrawl:
@@ -17,7 +31,7 @@ class FileCrawl:
         self.file = {
             'phone': None, 'title': None, 'metraj': None, 'age': None, 'otagh': None, 'total_price': None,
             'price_per_meter': None, 'floor_number': None, 'general_features': None, 'description': None,
-            'image_srcs': None, 'specs': None, 'features': None, 'url': None
+            'image_srcs': None, 'specs': None, 'features': None, 'url': None, 'timings': None
         }
 
     def __repr__(self):
@@ -53,11 +67,7 @@ class FileCrawl:
                 p_element = None
             if p_element:
                 texts.append(p_element.text)
-        if len(texts) == 4:     # texts[0] == 'bale' | 'kheir' some properties have it.
-             total_price, price_per_meter, floor_number = texts[1], texts[2], texts[3]
-        else:
-            total_price, price_per_meter, floor_number = texts[0], texts[1], texts[2]
-        self.file['total_price'], self.file['price_per_meter'], self.file['floor_number'] = total_price, price_per_meter, floor_number
+        self.file['total_price'], self.file['price_per_meter'], self.file['floor_number'] = split_prices(texts)
 
         # Extract پارکینگ، آسانسور، انباری، بالکن information
         general_features = [td.text.strip() for td in driver.find_elements(By.XPATH, "//td[@class='kt-group-row-item kt-group-row-item__value kt-body kt-body--stable']")]
@@ -66,8 +76,7 @@ class FileCrawl:
         # Extract and clean description
         description_element = driver.find_element(By.CLASS_NAME, 'kt-description-row__text--primary')
         description = description_element.text.strip() if description_element else False
-        description_clean = re.sub(r'[^\w\s!@#$%^&*()\-_=+;:\'"~,،؛{}\]\[]', '', description)    # remove all symbols, only text + new lines + required signs
-        self.file['description'] = description_clean
+        self.file['description'] = clean_description(description)
 
     def crawl_images(self, driver):
         # Find the first button element that opens the gallery using the class name
@@ -80,10 +89,9 @@ class FileCrawl:
         # Click the initial button to open the gallery
         try:
             actions.move_to_element(initial_button).click().perform()
-            time.sleep(2)  # Add a delay to allow the new content or page to load
 
-            # Now, focus on the gallery container specifically
-            gallery_container = WebDriverWait(driver, 10).until(
+            # Now, focus on the gallery container specifically (wait until gallery opened)
+            gallery_container = wait(driver, 'gallery').until(
                 EC.presence_of_element_located((By.CLASS_NAME, 'kt-gallery-view__thumbnails'))
             )
 
@@ -95,14 +103,12 @@ class FileCrawl:
             for gallery_button in gallery_buttons:
                 try:
                     driver.execute_script("arguments[0].click();", gallery_button)
-                    time.sleep(1)  # Wait for the image to load
-
-                    # Add loaded image to the set
-                    new_image_elements = driver.find_elements(By.CSS_SELECTOR, '.kt-base-carousel__slides img.kt-image-block__image')
-                    for img in new_image_elements:
-                        src = img.get_attribute('src')
-                        if src:
-                            image_srcs.add(src)
+                    # Wait until a new image loaded, then add loaded images to the set
+                    try:
+                        wait(driver, 'image').until(lambda driver: set(get_loaded_image_srcs(driver)) - image_srcs)
+                    except TimeoutException:   # some thumbnails show images loaded before (like first one)
+                        pass
+                    image_srcs.update(get_loaded_image_srcs(driver))
 
                 except Exception as e:
                     print(f"Error clicking gallery button: {e}")
@@ -116,13 +122,13 @@ class FileCrawl:
             print(f"An error occurred: {e}")
 
     def crawl_extra_data(self, driver):  # opens "نمایش همهٔ جزئیات" button and crawl all information
-        button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and .//p[text()='نمایش همهٔ جزئیات']]")))
+        button = wait(driver, 'page').until(EC.element_to_be_clickable((By.XPATH, "//div[@role='button' and .//p[text()='نمایش همهٔ جزئیات']]")))
         driver.execute_script("arguments[0].scrollIntoView(true);", button)  # scroll to get element in view (important)
         button.click()  # Click the outer div button
 
         try:
             # Wait for the modal to be present
-            modal_body = WebDriverWait(driver, 10).until(
+            modal_body = wait(driver, 'page').until(
                 EC.visibility_of_element_located((By.CLASS_NAME, 'kt-modal__body'))
             )
 
@@ -151,28 +157,121 @@ class FileCrawl:
         close_button = driver.find_element(By.XPATH, "//button[@class='kt-button kt-button--inlined kt-button--circular kt-modal__close-button']")
         close_button.click()
 
-    def crawl_file(self, driver):  # Crawl all the information and add to self.file
-        # get the phone number of the client
-        phone_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//button[@class='kt-button kt-button--primary post-actions__get-contact']")))
+    def crawl_phone(self, driver):  # get the phone number of the client
+        phone_button = wait(driver, 'page').until(EC.element_to_be_clickable((By.XPATH, "//button[@class='kt-button kt-button--primary post-actions__get-contact']")))
         phone_button.click()
         try:
-            phone_element = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.XPATH, "//a[@class='kt-unexpandable-row__action kt-text-truncate']")))
+            phone_element = wait(driver, 'phone').until(EC.visibility_of_element_located((By.XPATH, "//a[@class='kt-unexpandable-row__action kt-text-truncate']")))
             phone_number = phone_element.get_attribute('href').replace('tel:', '')
             int(phone_number)     # if no phone provided by client, phone_number is some characters not number
         except:      # if it's not prodived phone number, set None
             phone_number = None
         self.file['phone'] = phone_number
-        if phone_number:      # without phone, you have to chat with the client (that is impossible)
-            self.crawl_main_data(driver)
-            self.crawl_images(driver)
-            self.crawl_extra_data(driver)
 
+    def crawl_file(self, driver):  # Crawl all the information and add to self.file
+        # spent seconds of every phase saves in .file['timings'] like: {'phone': 1.2, 'main_data': 0.3, ...}
+        timings = self.file['timings'] = {}
+        phases = [('phone', self.crawl_phone), ('main_data', self.crawl_main_data), ('images', self.crawl_images),
+                  ('extra_data', self.crawl_extra_data)]
+        for phase, crawl in phases:
+            start = time.perf_counter()
+            crawl(driver)
+            timings[phase] = round(time.perf_counter() - start, 3)
+            if not self.file['phone']:      # without phone, you have to chat with the client (that is impossible)
+                break
 
 
+class FileHtmlCrawl(FileCrawl):
+    # fills same .file of FileCrawl from raw html of the file page (server rendered), without browser. only phone
+    # needs browser (FileCrawl.crawl_phone). usage: FileHtmlCrawl().parse(response.content)
+    def parse(self, content):   # content is bytes or str of the page
+        tree = html.fromstring(content)
+        self.parse_main_data(tree)
+        self.parse_images(tree)
+        self.parse_extra_data(tree)
+        return self.file
 
-def setup_driver():
-    # open the chrome with current cookies
-    chrome_options = Options()
+    def parse_main_data(self, tree):
+        self.file['title'] = get_text(tree.xpath(f"//*[{has_class('kt-page-title__title')}]")[0])
+
+        # the table values (مترج، ساخت، اتاق)
+        td_elements = tree.xpath("//tr[@class='kt-group-row__data-row']//td")
+        self.file['metraj'], self.file['age'], self.file['otagh'] = [get_text(td) for td in td_elements[:3]]
+
+        # pricing information (total_price, price_per_meter, floor_number)
+        base_divs = tree.xpath(f"//div[{has_class('kt-base-row')} and {has_class('kt-base-row--large')} and {has_class('kt-unexpandable-row')}]")
+        texts = []
+        for div in base_divs:
+            p_elements = div.xpath(f".//*[{has_class('kt-base-row__end')} and {has_class('kt-unexpandable-row__value-box')}]//p")
+            if p_elements:     # some value_boxes are not real and have not p tag inside themselves
+                texts.append(get_text(p_elements[0]))
+        self.file['total_price'], self.file['price_per_meter'], self.file['floor_number'] = split_prices(texts)
+
+        # پارکینگ، آسانسور، انباری، بالکن information
+        self.file['general_features'] = [get_text(td) for td in tree.xpath("//td[@class='kt-group-row-item kt-group-row-item__value kt-body kt-body--stable']")]
+
+        description_elements = tree.xpath(f"//*[{has_class('kt-description-row__text--primary')}]")
+        self.file['description'] = clean_description(get_text(description_elements[0])) if description_elements else False
+
+    def parse_images(self, tree):
+        image_srcs = set(tree.xpath(f"//img[{has_class('kt-image-block__image')}]/@src"))
+        self.file['image_srcs'] = image_srcs or None
+
+    def parse_extra_data(self, tree):
+        # rows of "نمایش همهٔ جزئیات" modal are rendered in the page too (the modal only shows them)
+        specs = {}
+        for row in tree.xpath(f"//*[{has_class('kt-unexpandable-row')}]"):
+            title = row.xpath(f".//*[{has_class('kt-base-row__title')}]")
+            value = row.xpath(f".//*[{has_class('kt-unexpandable-row__value')}]")
+            if title and value:
+                specs[get_text(title[0])] = get_text(value[0])
+        self.file['specs'] = specs
+        self.file['features'] = [get_text(el) for el in tree.xpath(f"//*[{has_class('kt-feature-row__title')}]")]
+
+
+def has_class(name):  # xpath condition of html class, like css selector '.name'
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def get_text(element):  # lxml element's text (with children's text) like selenium element.text
+    return element.text_content().strip()
+
+
+def split_prices(texts):  # returns (total_price, price_per_meter, floor_number)
+    if len(texts) == 4:     # texts[0] == 'bale' | 'kheir' some properties have it.
+        return texts[1], texts[2], texts[3]
+    return texts[0], texts[1], texts[2]
+
+
+def clean_description(description):  # remove all symbols, only text + new lines + required signs
+    return re.sub(r'[^\w\s!@#$%^&*()\-_=+;:\'"~,،؛{}\]\[]', '', description)
+
+
+def get_http_session():
+    # one session (connection pool) for all http requests of crawling, keep-alive connections reuse for next pages
+    global http_session
+    if http_session is None:
+        http_session = requests.Session()
+        # pool_connections: number of hosts (divar.ir, image servers, ...), pool_maxsize: connections of every host
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(settings.CRAWL_HTTP_WORKERS, settings.CRAWL_HOST_CONNECTIONS), max_retries=2)
+        http_session.mount('https://', adapter)
+        http_session.mount('http://', adapter)
+        http_session.headers['User-Agent'] = settings.CRAWL_USER_AGENT
+    return http_session
+http_session = None
+
+
+def wait(driver, step):  # WebDriverWait with timeout of the step (from settings.CRAWL_TIMEOUTS)
+    return WebDriverWait(driver, settings.CRAWL_TIMEOUTS[step])
+
+
+def get_loaded_image_srcs(driver):  # srcs of gallery images that completely loaded (not loading images)
+    return driver.execute_script(
+        "return Array.from(document.querySelectorAll('.kt-base-carousel__slides img.kt-image-block__image'))"
+        ".filter(img => img.complete && img.naturalWidth > 0 && img.src).map(img => img.src);")
+
+
+def get_chrome_profile_path():
     if os.name == 'nt':  # project running in a Windows os
         chrome_profile_path = "C:/Users/akh/AppData/Local/Google/Chrome/User Data/Profile 4"  # your Chrome profile
 
@@ -180,82 +279,252 @@ def setup_driver():
         chrome_profile_path = "/root/.config/google-chrome/myprofile"
     if not os.path.exists(chrome_profile_path):  # need to be created before running the crawler
         raise FileNotFoundError(f"The specified Chrome profile path does not exist: {chrome_profile_path}")
+    return chrome_profile_path
+
+
+def copy_chrome_profile(directory):
+    # chrome locks its profile, so every parallel driver needs its own copy (with same cookies and divar login)
+    path = os.path.join(directory, 'profile')
+    shutil.copytree(get_chrome_profile_path(), path, ignore=shutil.ignore_patterns('Singleton*', '*Cache*'))
+    return path
+
+
+def setup_driver(profile_path=None, port=None):
+    # open the chrome with current cookies. profile_path and port are different for every driver of crawl_files
+    chrome_options = Options()
+    chrome_profile_path = profile_path or get_chrome_profile_path()
     chrome_options.add_argument("--headless")  # crawl without graphical interface, used in linux servers
     chrome_options.add_argument(f"user-data-dir={chrome_profile_path}")
     chrome_options.add_argument("--disable-extensions")
 
     chrome_options.add_argument('--no-sandbox')  # these args required in linux servers (headless mode)
     chrome_options.add_argument('--disable-dev-shm-usage')  # Fixes error related to shared memory usage
-    chrome_options.add_argument('--remote-debugging-port=9222')  # Optional: enables debugging port
+    chrome_options.add_argument(f'--remote-debugging-port={port or settings.CRAWL_DEBUG_PORT}')  # Optional: enables debugging port
     chrome_options.add_argument('--disable-gpu')  # Disables GPU hardware acceleration (useful for headless mode)
     return webdriver.Chrome(options=chrome_options)
 
 
-def crawl_files(location_to_search, max_files=None):
-    driver = setup_driver()
-
+def crawl_cards(driver, location_to_search, max_files=None):  # returns {card_url: card_text} of files found in search
     url = "https://divar.ir/s/tehran/buy-apartment"
     driver.get(url)     # Load the web page
 
-    try:
-        # search box
-        search_input = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.CSS_SELECTOR, 'input.kt-nav-text-field__input')))
-        search_input.send_keys(location_to_search)  # type in search box to search
-        search_input.send_keys(Keys.ENTER)
-        time.sleep(1)
+    # search box
+    search_input = wait(driver, 'page').until(EC.visibility_of_element_located((By.CSS_SELECTOR, 'input.kt-nav-text-field__input')))
+    search_input.send_keys(location_to_search)  # type in search box to search
+    search_input.send_keys(Keys.ENTER)
+    wait(driver, 'page').until(EC.presence_of_element_located((By.CSS_SELECTOR, 'article.kt-post-card')))
+
+    # Initialize variables to track scroll position and loaded cards
+    last_height = driver.execute_script("return document.body.scrollHeight")
+
+    # Scroll down and add all founded card to 'cards'
+    cards = {}       # dict keeps order of cards, card_text (title, price, ...) used to detect changed files
+    while True:
+        cards_on_screen = driver.find_elements(By.CSS_SELECTOR, 'article.kt-post-card')
+        for card in cards_on_screen:
+            try:
+                title_elements = card.find_elements(By.CSS_SELECTOR, '.kt-post-card__title')  # Find title of card
+                if not title_elements:
+                    title_elements = card.find_elements(By.CSS_SELECTOR, '.kt-new-post-card__title')
+                card_url = card.find_element(By.TAG_NAME, 'a').get_attribute('href')  # Find the url of the card
+                # some carts are blank or duplicate crawling. required to be checked here
+                if card_url and title_elements and card_url not in cards and \
+                        (not max_files or len(cards) < max_files):  # Note '<=' is false!
+                    cards[card_url] = card.text
+                else:                   # some carts are blank, required to skip them
+                    pass
+            except Exception as e:
+                print(f"Could not retrieve title for card: {e}")
 
-        # Initialize variables to track scroll position and loaded cards
+        # Scroll down to the bottom of the page
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        # Wait for the page to load new cards (scroll height increases). If the scroll height hasn't changed,
+        # we've reached end of scroll
+        try:
+            wait(driver, 'scroll').until(lambda driver: driver.execute_script("return document.body.scrollHeight") > last_height)
+        except TimeoutException:
+            break
         last_height = driver.execute_script("return document.body.scrollHeight")
+    return cards
+
 
-        # Scroll down and add all founded card to 'cards'
-        cards = []       # using set() make unordered of cards
+def crawl_worker(index, card_urls):
+    # crawl files of 'card_urls' (shared queue between workers) by own driver, until queue be empty
+    files, errors, driver = {}, {}, None
+    directory = tempfile.mkdtemp(prefix=f'crawl-worker-{index}-')     # removed even if copying profile fails
+    try:
+        driver = setup_driver(copy_chrome_profile(directory), settings.CRAWL_DEBUG_PORT + index + 1)
         while True:
-            cards_on_screen = driver.find_elements(By.CSS_SELECTOR, 'article.kt-post-card')
-            for card in cards_on_screen:
-                try:
-                    title_elements = card.find_elements(By.CSS_SELECTOR, '.kt-post-card__title')  # Find title of card
-                    if not title_elements:
-                        title_elements = card.find_elements(By.CSS_SELECTOR, '.kt-new-post-card__title')
-                    card_url = card.find_element(By.TAG_NAME, 'a').get_attribute('href')  # Find the url of the card
-                    # some carts are blank or duplicate crawling. required to be checked here
-                    if card_url and title_elements and card_url not in cards and \
-                            (not max_files or len(cards) < max_files):  # Note '<=' is false!
-                        title = title_elements[0].text
-                        cards.append(card_url)
-                    else:                   # some carts are blank, required to skip them
-                        pass
-                except Exception as e:
-                    print(f"Could not retrieve title for card: {e}")
-
-            # Scroll down to the bottom of the page
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)  # Wait for the page to load new cards
-            # Get the new scroll height and compare with the last scroll height
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            # If the scroll height hasn't changed, we've reached end of scroll
-            if new_height == last_height:
+            try:
+                card_url = card_urls.get_nowait()
+            except queue.Empty:
                 break
-            last_height = new_height
-
-        files, errors = [], {}    # if some files not crawled, trace them in error list
-        for card_url in cards:
-            driver.get(card_url)
-            time.sleep(2)
             file_crawl = FileCrawl()
             try:
+                driver.get(card_url)     # returns after page loaded, next elements are waited in crawl_file
                 file_crawl.crawl_file(driver)  # fills .file
                 file_crawl.file['url'] = card_url
-            except Exception as e:
-                errors['cart_url'] = str(e)
-            files.append(file_crawl.file)
-
-            driver.back()
-            time.sleep(2)
+                files[card_url] = file_crawl.file
+            except Exception as e:     # failed files are only in errors (like crawl_files_http)
+                errors[card_url] = str(e)
+    except Exception as e:     # profile copy or chrome failed, cards remain in queue for other workers
+        errors[f'worker {index}'] = str(e)
+    finally:
+        if driver:
+            driver.quit()
+        shutil.rmtree(directory, ignore_errors=True)
+    return files, errors
 
-    except Exception as e:
-        raise e
 
+def crawl_files(location_to_search, max_files=None, workers=None, cards_filter=None):
+    # cards found by one driver, next crawled by 'workers' parallel drivers (every driver is a separate chrome process)
+    # cards_filter(cards) returns urls of cards required to crawl (like new or changed cards), default crawls all
+    driver = setup_driver()
+    try:
+        cards = crawl_cards(driver, location_to_search, max_files)
     finally:
-        driver.quit()
+        driver.quit()      # main profile must be free before copying it for workers
+    cards = list(cards_filter(cards)) if cards_filter else list(cards)
+    if not cards:
+        return ([], {})
+
+    card_urls = queue.Queue()
+    for card_url in cards:
+        card_urls.put(card_url)
+    workers = max(min(workers or settings.CRAWL_WORKERS, len(cards)), 1)
+    crawled, errors = {}, {}    # if some files not crawled, trace them in errors like: {card_url: error}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for files_worker, errors_worker in executor.map(crawl_worker, range(workers), [card_urls] * workers):
+            crawled.update(files_worker)
+            errors.update(errors_worker)
+    for card_url in cards:     # left in queue, when all workers failed
+        if card_url not in crawled and card_url not in errors:
+            errors[card_url] = 'not crawled, no worker available'
+    files = [crawled[card_url] for card_url in cards if card_url in crawled]   # keep order of cards
+    return (files, errors)
+
+
+def crawl_cards_http(location_to_search, max_files=None):  # {card_url: card_text} of search page (first page only)
+    url = "https://divar.ir/s/tehran/buy-apartment"
+    response = get_http_session().get(url, params={'q': location_to_search}, timeout=settings.CRAWL_TIMEOUTS['page'])
+    response.raise_for_status()
+    tree = html.fromstring(response.content)
+    cards = {}
+    for card in tree.xpath(f"//article[{has_class('kt-post-card')}]"):
+        hrefs = card.xpath('.//a/@href')
+        if hrefs and urljoin(url, hrefs[0]) not in cards and (not max_files or len(cards) < max_files):
+            cards[urljoin(url, hrefs[0])] = card.text_content()
+    return cards
+
+
+def crawl_file_http(card_url):
+    response = get_http_session().get(card_url, timeout=settings.CRAWL_TIMEOUTS['page'])
+    response.raise_for_status()
+    file_crawl = FileHtmlCrawl()
+    file_crawl.parse(response.content)
+    file_crawl.file['url'] = card_url
+    return file_crawl
+
+
+def crawl_files_http(location_to_search, max_files=None, workers=None, cards_filter=None):
+    # fast version of crawl_files: pages are downloaded and parsed without browser, only phones get by one driver
+    cards = crawl_cards_http(location_to_search, max_files)
+    cards = list(cards_filter(cards)) if cards_filter else list(cards)
+    if not cards:
+        return ([], {})
+    crawled, errors = [], {}
+    with ThreadPoolExecutor(max_workers=workers or settings.CRAWL_HTTP_WORKERS) as executor:
+        futures = {card_url: executor.submit(crawl_file_http, card_url) for card_url in cards}
+        for card_url, future in futures.items():
+            try:
+                crawled.append(future.result())
+            except Exception as e:
+                errors[card_url] = str(e)
 
+    files = []
+    if crawled:
+        driver = setup_driver()
+        try:
+            for file_crawl in crawled:
+                try:
+                    driver.get(file_crawl.file['url'])
+                    file_crawl.crawl_phone(driver)
+                except Exception as e:
+                    errors[file_crawl.file['url']] = str(e)
+                if file_crawl.file['phone']:      # without phone, you have to chat with the client (that is impossible)
+                    files.append(file_crawl.file)
+        finally:
+            driver.quit()
     return (files, errors)
+
+
+host_semaphores = defaultdict(lambda: threading.Semaphore(settings.CRAWL_HOST_CONNECTIONS))   # like: {'s100.divarcdn.com': semaphore}
+host_semaphores_lock = threading.Lock()
+
+
+def get_host_semaphore(url):  # limits parallel connections to every host (image servers block too many connections)
+    with host_semaphores_lock:
+        return host_semaphores[urlparse(url).netloc]
+
+
+def download_image(url, directory):
+    # streams the image to a file in 'directory' (image not held in memory), hash computed while writing (same hash of
+    # main/images.py). retries with exponential backoff for connection errors and 5xx/429. returns (path, hash)
+    for attempt in range(settings.CRAWL_DOWNLOAD_RETRIES + 1):
+        fd, path = tempfile.mkstemp(dir=directory, suffix='.download')
+        try:
+            with get_host_semaphore(url), os.fdopen(fd, 'wb') as f:
+                with get_http_session().get(url, stream=True, timeout=settings.CRAWL_TIMEOUTS['download']) as response:
+                    if response.status_code == 429 or response.status_code >= 500:
+                        raise requests.HTTPError(f'{response.status_code} server error', response=response)
+                    response.raise_for_status()     # 4xx (like 404) never succeeds, raised without retry
+                    image_hash = hashlib.blake2b(digest_size=20)
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                        image_hash.update(chunk)
+            return path, image_hash.hexdigest()
+        except requests.RequestException as e:
+            os.remove(path)
+            retryable = e.response is None or e.response.status_code == 429 or e.response.status_code >= 500
+            if not retryable or attempt == settings.CRAWL_DOWNLOAD_RETRIES:
+                raise
+            time.sleep(settings.CRAWL_RETRY_BACKOFF * 2 ** attempt)
+        except BaseException:
+            os.remove(path)
+            raise
+
+
+def download_images(urls, directory, workers=None):
+    # downloads urls in parallel, returns ({url: (path, hash)}, {url: error})
+    urls = list(dict.fromkeys(urls))        # same image could be in several files
+    downloaded, errors = {}, {}
+    if not urls:
+        return downloaded, errors
+    os.makedirs(directory, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers or settings.CRAWL_DOWNLOAD_WORKERS) as executor:
+        futures = {url: executor.submit(download_image, url, directory) for url in urls}
+        for url, future in futures.items():
+            try:
+                downloaded[url] = future.result()
+            except Exception as e:
+                errors[url] = str(e)
+    return downloaded, errors
+
+
+def store_crawled_images(files, upload_to='file_images/'):
+    # downloads image_srcs of all files together and saves them (content addressed) to file['images'] like:
+    # [{'image': '/media/file_images/ab/ab12..-default.JPEG', 'alt': title}], returns {image_src: error}
+    from .images import store_downloaded    # images.py needs mongo, crawling (without saving) doesn't need it
+    srcs = [src for file in files for src in (file.get('image_srcs') or [])]
+    downloaded, errors = download_images(srcs, os.path.join(settings.MEDIA_ROOT, 'downloads'))
+    stored = {}
+    for src, (path, image_hash) in downloaded.items():
+        try:
+            stored[src] = store_downloaded(path, image_hash, upload_to).url
+        except Exception as e:       # like: not an image
+            errors[src] = str(e)
+    for file in files:
+        images = [{'image': stored[src], 'alt': file.get('title') or ''} for src in (file.get('image_srcs') or []) if src in stored]
+        if images:
+            file['images'] = images
+    return errors
@@ -0,0 +1,97 @@
+from django.conf import settings
+
+import io
+import csv
+import json
+import zlib
+
+# streaming export of files as NDJSON (one json document per line) or CSV. documents are read from a mongo cursor in
+# batches (settings.EXPORT_BATCH_SIZE) and encoded one by one, so memory doesn't grow with size of the collection.
+# usage: iter_export(mongo_db.file, query, fields, 'csv', compress=True)  >  generator of bytes (StreamingHttpResponse
+# in FileExport view, or written to file in 'export_files' command)
+export_formats = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+# columns of CSV when fields are not provided (nested values like neighborhoods are written as json)
+file_export_fields = ['_id', 'file_id', 'title', 'published_date', 'updated', 'metraj', 'total_price', 'price_per_meter',
+                      'age', 'floor_number', 'neighborhoods', 'transaction', 'property_type', 'features', 'source',
+                      'presentation_status', 'visible']
+chunk_size = 64 * 1024     # bytes, lines are joined to chunks of about this size before yielding (and compressing)
+
+
+def get_export_fields(value, allowed):  # value like 'title,total_price' (or None), raises ValueError for unknown fields
+    if not value:
+        return None
+    fields = value.split(',')
+    unknowns = [field for field in fields if field not in allowed]
+    if unknowns:
+        raise ValueError(f"unknown fields: {', '.join(unknowns)}")
+    return fields
+
+
+def get_export_projection(fields=None):  # fields like ['title', 'total_price'], None means all except embedded comments
+    if not fields:
+        return {'comments': 0}
+    return {'_id': 1, **{field: 1 for field in fields}}
+
+
+def iter_documents(collection, query, projection, batch_size=None):
+    # sorted by _id (default index), so files changed while exporting are not exported twice
+    cursor = collection.find(query, projection).sort('_id', 1).batch_size(batch_size or settings.EXPORT_BATCH_SIZE)
+    try:
+        yield from cursor
+    finally:      # client disconnected or export stopped
+        cursor.close()
+
+
+def iter_ndjson(documents):
+    for document in documents:
+        yield json.dumps(document, ensure_ascii=False, default=str).encode() + b'\n'
+
+
+class LineWriter:   # file like object for csv.writer, returns written line instead of keeping it
+    def write(self, value):
+        return value
+
+
+def iter_csv(documents, fields):
+    writer = csv.writer(LineWriter())
+    yield writer.writerow(fields).encode()
+    for document in documents:
+        row = []
+        for field in fields:
+            value = document.get(field)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            row.append('' if value is None else value)
+        yield writer.writerow(row).encode()
+
+
+def iter_chunks(lines):   # joins small lines to bigger chunks (fewer writes to socket and compressor)
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_gzip(chunks, level=6):   # compresses on the fly, output is a complete gzip file
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)      # wbits=31 means gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_export(collection, query=None, fields=None, format='ndjson', compress=False, batch_size=None):
+    if format not in export_formats:
+        raise ValueError(f"format must be one of: {', '.join(export_formats)}")
+    if format == 'csv':     # columns are fixed, so only they load from db
+        fields = fields or file_export_fields
+    documents = iter_documents(collection, query or {}, get_export_projection(fields), batch_size)
+    lines = iter_csv(documents, fields) if format == 'csv' else iter_ndjson(documents)
+    chunks = iter_chunks(lines)
+    return iter_gzip(chunks) if compress else chunks
@@ -0,0 +1,291 @@
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+import os
+import uuid
+import fcntl
+import shutil
+import base64
+import hashlib
+import pymongo
+import threading
+from bson.objectid import ObjectId
+from PIL import Image as PilImage
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .mongo import mongo_db
+from .cache import invalidate_files
+
+# uploaded images are stored once (original as 'default' size) in the request, other sizes (like icon's '240', '420',
+# ...) are rendered later by image backend (settings.IMAGE_BACKEND) and pushed to the mongo document when ready.
+# so response time of saving a file/post doesn't depend on number of sizes.
+# images are content addressed: named by blake2b hash of their bytes, and 'image_store' collection keeps one document
+# per hash like: {'_id': hash, 'url': url of original, 'format': 'JPEG', 'variants': {'240': url, ...}}. so same image
+# (like a photo used in several divar files or crawled again) is stored and resized once.
+
+
+class StoredImage:  # like onetomultipleimage's Upload objects (.url .alt .size), OneToMultipleImage represents .url
+    def __init__(self, url, alt, size, name, format, variants=None):
+        self.url, self.alt, self.size, self.name, self.format = url, alt, size, name, format
+        self.variants = variants or {}    # sizes rendered before, like: {'240': url}
+
+    def __repr__(self):
+        return f'<StoredImage {self.url}>'
+
+
+def read_image(image):  # image is uploaded file (multipart form-data) or base64 str, returns bytes or None
+    if hasattr(image, 'read'):
+        return image.read()
+    if isinstance(image, str) and ';base64,' in image:
+        return base64.b64decode(image.split(';base64,')[1])
+    return None
+
+
+def get_image_hash(content):
+    return hashlib.blake2b(content, digest_size=20).hexdigest()
+
+
+def get_url_dir(upload_to, hash):  # like: 'file_images/icons/', 'ab12..' > '/media/file_images/icons/ab/' (created in disk)
+    url_dir = f"{settings.MEDIA_URL}{upload_to.strip('/')}/{hash[:2]}/"
+    os.makedirs(str(settings.BASE_DIR) + url_dir, exist_ok=True)
+    return url_dir
+
+
+def store_original(image, upload_to, alt=None, hash=None):
+    # saves image bytes without decoding pixels (only header read for format), returns StoredImage or None (no image).
+    # if same image stored before (in any upload_to), nothing saves and stored one is returned
+    content = read_image(image)
+    if not content:
+        return None
+
+    def save(path):
+        with open(path, 'wb') as f:
+            f.write(content)
+    return store_image(hash or get_image_hash(content), upload_to, alt, save)
+
+
+def store_downloaded(path, hash, upload_to, alt=None):  # like store_original for downloaded file (in path), moves file
+    stored = store_image(hash, upload_to, alt, lambda new_path: shutil.move(path, new_path))
+    if os.path.exists(path):     # same image stored before
+        os.remove(path)
+    return stored
+
+
+def store_image(hash, upload_to, alt, save):  # save(path) writes image to path, only called for new images
+    alt = f'{alt or uuid.uuid4().hex[:6]}-default'
+    stored = mongo_db.image_store.find_one({'_id': hash})
+    if stored:
+        return StoredImage(stored['url'], alt, 'default', hash, stored['format'], stored.get('variants'))
+
+    url_dir = get_url_dir(upload_to, hash)
+    # temp name is unique for every writer (concurrent requests could store same image), os.replace is atomic
+    path = f'{settings.BASE_DIR}{url_dir}{hash}.{uuid.uuid4().hex}.tmp'
+    try:
+        save(path)
+        with PilImage.open(path) as opened_image:
+            format = opened_image.format     # like: 'JPEG'
+        url = f'{url_dir}{hash}-default.{format}'     # sizes are like: {hash}-240.{format}
+        os.replace(path, f'{settings.BASE_DIR}{url}')
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    # if another request stored same image meanwhile, its document is kept (file content is same)
+    stored = mongo_db.image_store.find_one_and_update(
+        {'_id': hash}, {'$setOnInsert': {'url': url, 'format': format, 'variants': {}}},
+        upsert=True, return_document=pymongo.ReturnDocument.AFTER)
+    return StoredImage(stored['url'], alt, 'default', hash, stored['format'], stored.get('variants'))
+
+
+def get_lazy_variants(original, sizes):
+    # settings.IMAGE_VARIANTS == 'lazy': sizes are not rendered after saving, their urls refer to ImageVariant view
+    # (like: /images/ab12../240.JPEG) and rendered in first request of every size (cached in VariantCache)
+    alt, variants = original.alt.rsplit('-', 1)[0], []
+    for size in sizes:
+        if size != 'default':
+            url = reverse('main:image-variant', args=[original.name, int(size), original.format])
+            variant = StoredImage(url, f'{alt}-{size}', size, original.name, original.format)
+            variants.append({'image': variant, 'alt': variant.alt, 'size': size})
+    return variants
+
+
+def get_image_variants(original, sizes):  # sizes rendered before, like: [{'image': StoredImage, 'alt': .., 'size': '240'}]
+    alt, variants = original.alt.rsplit('-', 1)[0], []
+    for size in sizes:
+        if size in original.variants:
+            variant = StoredImage(original.variants[size], f'{alt}-{size}', size, original.name, original.format)
+            variants.append({'image': variant, 'alt': variant.alt, 'size': size})
+    return variants
+
+
+def get_variants_job(original, field, sizes):  # job of rendering 'sizes' of original, saved in field (like 'icon')
+    return {'base_path': str(settings.BASE_DIR), 'url': original.url, 'name': original.name, 'format': original.format,
+            'alt': original.alt.rsplit('-', 1)[0], 'field': field, 'sizes': sizes}
+
+
+def resize_image(opened_image, size, path, format):   # width of resized is 'size' (same ratio of ImageCreationSizes)
+    width, height = opened_image.size
+    opened_image.resize((int(size), int(int(size) * height / width))).save(path, format=format)
+
+
+def render_variants(job):
+    # runs in worker processes (only PIL, without django and mongo), returns variants like: [{'image': url, 'alt', 'size'}]
+    url_dir = job['url'].rsplit('/', 1)[0] + '/'
+    opened_image = PilImage.open(job['base_path'] + job['url'])
+    opened_image.load()
+    variants = []
+    for size in job['sizes']:
+        url = f"{url_dir}{job['name']}-{size}.{job['format']}"
+        if not os.path.exists(job['base_path'] + url):    # name is hash, so existed file is same (rendered before)
+            resize_image(opened_image, size, job['base_path'] + url, job['format'])
+        variants.append({'image': url, 'alt': f"{job['alt']}-{size}", 'size': size})
+    return variants
+
+
+def save_variants(collection, job, variants):
+    # push variants next to the original in documents have the original and not these sizes (other documents waiting
+    # for same image are updated too). if original was replaced meanwhile, nothing updates
+    mongo_db.image_store.update_one({'_id': job['name']}, {'$set': {f"variants.{variant['size']}": variant['image'] for variant in variants}})
+    variants = [{'_id': ObjectId(), **variant} for variant in variants]
+    query = {f"{job['field']}.image": job['url'], f"{job['field']}.size": {'$nin': job['sizes']}}
+    ids = [document['_id'] for document in collection.find(query, {'_id': 1})]
+    if ids:
+        collection.update_many({'_id': {'$in': ids}, **query}, {'$push': {job['field']: {'$each': variants}}})
+        if collection.name == mongo_db.file.name:     # cached responses of the files (main/cache.py) changed
+            invalidate_files(ids)
+
+
+class InlineImageBackend:  # renders in current process (blocks the request), used in tests or when no workers
+    def submit(self, collection, job):
+        save_variants(collection, job, render_variants(job))
+
+
+class ProcessImageBackend:  # renders in a local process pool, variants saved in a thread of current process
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+
+    def submit(self, collection, job):
+        try:
+            future = self.executor.submit(render_variants, job)
+        except (BrokenProcessPool, RuntimeError):      # pool is dead (or process is shutting down)
+            self.executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+            return InlineImageBackend().submit(collection, job)
+        future.add_done_callback(lambda future: self.done(collection, job, future))
+
+    def done(self, collection, job, future):
+        try:
+            save_variants(collection, job, future.result())
+        except Exception as e:
+            print(f"couldn't render sizes of image {job['url']}: {e}")
+
+
+image_backends = {'inline': InlineImageBackend, 'process': ProcessImageBackend}
+_backend, _pid = None, None
+_lock = threading.Lock()
+
+
+def get_image_backend():
+    # one backend per process, settings.IMAGE_BACKEND is 'inline', 'process' or dotted path of a class with .submit()
+    global _backend, _pid
+    if _backend is None or _pid != os.getpid():
+        with _lock:
+            if _backend is None or _pid != os.getpid():
+                backend = settings.IMAGE_BACKEND
+                _backend, _pid = (image_backends.get(backend) or import_string(backend))(), os.getpid()
+    return _backend
+
+
+def queue_image_jobs(context, collection):
+    # call after document saved, jobs are collected in serializer's context by image fields (in to_internal_value)
+    for job in context.pop('image_jobs', []):
+        get_image_backend().submit(collection, job)
+
+
+class VariantCache:
+    # rendered sizes of lazy variants in disk (settings.IMAGE_CACHE_DIR), total size limited to max_size, least recently
+    # used files removed first (every hit updates file's mtime). concurrent requests of same variant render it once:
+    # threads of process wait on a lock, and processes (gunicorn workers) wait on a file lock.
+    def __init__(self, directory, max_size):
+        self.directory, self.max_size = str(directory), max_size
+        self.size = None       # estimated total size, computed in first eviction check
+        self.locks, self.lock = {}, threading.Lock()
+
+    def get_path(self, hash, size, format):
+        return os.path.join(self.directory, hash[:2], f'{hash}-{size}.{format}')
+
+    def get(self, hash, size, format):  # returns path of the variant (renders if required), None if image not found
+        path = self.get_path(hash, size, format)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        with self.lock:
+            key_lock = self.locks.setdefault(path, threading.Lock())
+        with key_lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(f'{path}.lock', 'w') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if not os.path.exists(path):     # rendered by other thread/process while waiting
+                        if not self.render(hash, size, format, path):
+                            return None
+                        self.add(os.path.getsize(path))
+            finally:
+                with self.lock:
+                    self.locks.pop(path, None)
+        return path
+
+    def render(self, hash, size, format, path):
+        stored = mongo_db.image_store.find_one({'_id': hash}, {'url': 1, 'format': 1})
+        if not stored or stored['format'] != format:
+            return False
+        with PilImage.open(f"{settings.BASE_DIR}{stored['url']}") as opened_image:
+            resize_image(opened_image, size, f'{path}.tmp', format)
+        os.replace(f'{path}.tmp', path)        # other readers never see half written file
+        return True
+
+    def add(self, size):
+        with self.lock:
+            if self.size is None:
+                self.size = sum(entry[2] for entry in self.scan())
+            self.size += size
+            over = self.size > self.max_size
+        if over:
+            self.evict()
+
+    def scan(self):  # [(mtime, path, size), ...] of all variants
+        entries = []
+        for dir_entry in os.scandir(self.directory):
+            if dir_entry.is_dir():
+                for entry in os.scandir(dir_entry.path):
+                    if not entry.name.endswith(('.lock', '.tmp')):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def evict(self):  # removes least recently used variants, until total size is 90% of max_size
+        # lock files (empty) are kept: other process could hold flock on it, and a new lock file (new inode) would let
+        # two processes render same variant together
+        entries = sorted(self.scan())
+        total = sum(entry[2] for entry in entries)
+        for mtime, path, size in entries:
+            if total <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:       # removed by another process
+                pass
+        with self.lock:
+            self.size = total
+
+
+_variant_cache = None
+
+
+def get_variant_cache():
+    global _variant_cache
+    if _variant_cache is None:
+        _variant_cache = VariantCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_SIZE)
+    return _variant_cache
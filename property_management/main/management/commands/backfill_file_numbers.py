@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.methods import backfill_file_numbers
+from main.mongo import mongo_db
+
+
+class Command(BaseCommand):
+    # usage: python manage.py backfill_file_numbers  (once, files saved before metraj_num, total_price_num and
+    # price_per_meter_num are not found by range filters of FileSearch until this runs)
+    help = 'Fill metraj_num, total_price_num and price_per_meter_num of old files'
+
+    def handle(self, *args, **options):
+        updated, invalid = backfill_file_numbers(mongo_db.file)
+        self.stdout.write(self.style.SUCCESS(f'{updated} files updated, {invalid} invalid values skipped'))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+import io
+import time
+import uuid
+import datetime
+from decimal import Decimal
+
+from main.methods import get_bson_data
+
+
+def get_file_payload():  # like validated data of FileMongoSerializer (full file)
+    now = datetime.datetime.now()    # json round trip (old get_parsed_data) can't render jdatetime
+    return {
+        'title': 'آپارتمان ۱۰۰ متری کیانشهر', 'slug': 'آپارتمان-۱۰۰-متری-کیانشهر', 'file_id': uuid.uuid4().hex[:6],
+        'published_date': now, 'updated': now, 'meta_title': '', 'description': 'نورگیر و شیک ' * 40, 'metraj': '100',
+        'total_price': Decimal('5000000000'), 'price_per_meter': Decimal('50000000'), 'metraj_num': 100,
+        'total_price_num': 5000000000, 'price_per_meter_num': 50000000, 'age': '1395', 'floor_number': '3 از 5',
+        'specs': {'جهت ساختمان': 'جنوبی', 'وضعیت واحد': 'بازسازی شده', 'سند': 'تک‌برگ'},
+        'presentation_status': '1', 'visible': True, 'neighborhoods': {'id': 5, 'name': 'کیانشهر'},
+        'transaction': {'id': 1, 'name': 'فروش'}, 'property_type': {'id': 1, 'name': 'آپارتمان'},
+        'features': ['آسانسور', 'پارکینگ', 'انباری', 'بالکن', 'کمد دیواری', 'کولر'],
+        'icon': [{'image': f'/media/file_images/icons/ab/{i}.JPEG', 'alt': f'alt-{size}', 'size': size}
+                 for i, size in enumerate(['240', '420', '640', '720', '960', '1280', 'default'])],
+        'images': [{'image': f'/media/file_images/ab/{i}.JPEG', 'alt': 'alt', 'name': f'image {i}'} for i in range(10)],
+    }
+
+
+def json_round_trip(data):    # old way of converting data to mongo types (get_parsed_data)
+    return JSONParser().parse(io.BytesIO(JSONRenderer().render(data)))
+
+
+class Command(BaseCommand):
+    # usage: python manage.py benchmark_bson --files 200 --repeat 5  (best time of repeats is reported)
+    # timings depend on machine and load, so this is not part of tests (main/tests.py checks conversions only)
+    help = 'Compare get_bson_data with json render and parse, on file payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=200, help='number of file payloads')
+        parser.add_argument('--repeat', type=int, default=5, help='number of repeats')
+
+    def handle(self, *args, **options):
+        payloads = [get_file_payload() for i in range(options['files'])]
+        timings = {}
+        for name, convert in [('json', json_round_trip), ('bson', get_bson_data)]:
+            best = float('inf')
+            for i in range(options['repeat']):
+                start = time.perf_counter()
+                for payload in payloads:
+                    convert(payload)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(payloads)} file payloads: json round trip {timings['json'] * 1000:.1f}ms, "
+            f"get_bson_data {timings['bson'] * 1000:.1f}ms ({timings['json'] / timings['bson']:.1f}x)"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pymongo.errors import PyMongoError
+
+from main.methods import ensure_file_indexes, ensure_comment_indexes
+from main.mongo import mongo_db
+
+
+class Command(BaseCommand):
+    # usage: python manage.py ensure_indexes  (in every deploy, before starting the server. safe to run many times)
+    help = "Create indexes of 'file' and 'comment' collections"
+
+    def handle(self, *args, **options):
+        try:
+            ensure_file_indexes(mongo_db.file)
+            ensure_comment_indexes(mongo_db.comment)
+        except PyMongoError as e:
+            raise CommandError(f"couldn't create indexes: {e}")
+        self.stdout.write(self.style.SUCCESS("indexes of 'file' and 'comment' collections are created"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+import sys
+import time
+
+from main.export import export_formats, get_export_fields, iter_export
+from main.mongo import mongo_db
+from main.serializers import FileMongoSerializer
+
+
+class Command(BaseCommand):
+    # usage: python manage.py export_files files.ndjson.gz --gzip  (or '-' to write in stdout)
+    # python manage.py export_files files.csv --type csv --fields title,total_price,neighborhoods
+    help = 'Export files (mongo file collection) as NDJSON or CSV, streamed without loading all files in memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="output file path, '-' for stdout")
+        parser.add_argument('--type', choices=list(export_formats), default='ndjson')
+        parser.add_argument('--fields', help='comma separated fields, like: title,total_price (default all)')
+        parser.add_argument('--gzip', action='store_true', help='compress output')
+        parser.add_argument('--batch-size', type=int, help='documents in every batch of mongo cursor')
+
+    def handle(self, *args, **options):
+        try:
+            fields = get_export_fields(options['fields'], FileMongoSerializer._declared_fields)
+        except ValueError as e:
+            raise CommandError(e)
+        chunks = iter_export(mongo_db.file, {}, fields, options['type'], options['gzip'], options['batch_size'])
+        start, size = time.time(), 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'{size} bytes exported in {time.time() - start:.1f}s'))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+import csv
+import json
+
+from main.methods import import_categories, repair_categories
+
+
+class Command(BaseCommand):
+    # usage: python manage.py import_categories categories.json  (or .csv with columns: name,father,slug,post_product)
+    # python manage.py import_categories --verify   (report categories with wrong level, levels_afterthis or path)
+    # python manage.py import_categories --repair   (fix them)
+    help = 'Import a whole category tree from json/csv file, or verify/repair level, levels_afterthis and path of categories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='json (list of nodes or nested nodes with "childes") or csv file')
+        parser.add_argument('--verify', action='store_true', help='only report wrong categories')
+        parser.add_argument('--repair', action='store_true', help='fix wrong categories')
+
+    def handle(self, *args, **options):
+        if options['verify'] or options['repair']:
+            changed, broken = repair_categories(save=options['repair'])
+            for category in changed:
+                self.stdout.write(f'{category.id}: level={category.level} levels_afterthis={category.levels_afterthis} path={category.path}')
+            if broken:
+                self.stdout.write(self.style.WARNING(f'categories with circular or missing father: {broken}'))
+            action = 'repaired' if options['repair'] else 'wrong'
+            self.stdout.write(self.style.SUCCESS(f'{len(changed)} categories {action}'))
+            return
+
+        if not options['file']:
+            raise CommandError('provide file, --verify or --repair')
+        try:
+            created = import_categories(self.read_nodes(options['file']))
+        except (ValueError, KeyError) as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} categories imported'))
+
+    def read_nodes(self, path):
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.csv'):
+                return [{key: value or None for key, value in row.items()} for row in csv.DictReader(f)]
+            return self.flatten(json.load(f))
+
+    def flatten(self, nodes, father=None):  # nested nodes like: [{'name': 'digital', 'childes': [{'name': 'phone'}]}]
+        flat = []
+        for node in nodes:
+            flat.append({**node, 'father': node.get('father', father)})
+            flat += self.flatten(flat[-1].pop('childes', []), node['name'])
+        return flat
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+
+import sys
+import json
+import time
+import itertools
+from types import SimpleNamespace
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from main.images import queue_image_jobs
+from main.mongo import mongo_db
+from main.serializers import FileMongoSerializer
+from users.models import User
+
+request = None     # request of workers (only .user is used by FileMongoSerializer), set in init_worker
+
+
+def init_worker(author_id):
+    global request
+    request = SimpleNamespace(user=User.objects.get(id=author_id))
+
+
+def validate_chunk(lines):
+    # runs in worker processes. lines are like [(line_number, text), ..], returns (files, errors, image_jobs), files are
+    # serialized (ready to insert) like [(line_number, file), ..] and errors like {line_number: errors}
+    files, errors, image_jobs = [], {}, []
+    for number, text in lines:
+        try:
+            data = json.loads(text)
+            if not isinstance(data, dict):
+                raise ValueError('line must be a json object')
+        except ValueError as e:
+            errors[number] = {'non_field_errors': [str(e)]}
+            continue
+        # unique fields are checked for all files of the chunk together, in saving (FileListMongoSerializer.create)
+        s = FileMongoSerializer(data=data, request=request, context={'bulk': True})
+        if s.is_valid():
+            files.append((number, s.get_serialized(s.validated_data)))
+            image_jobs += s.context.pop('image_jobs', [])
+        else:
+            errors[number] = s.errors
+    return files, errors, image_jobs
+
+
+class Command(BaseCommand):
+    # usage: python manage.py import_files files.ndjson --author 1  (one json file per line, like FileList.post data)
+    # invalid lines are written to report file (files.ndjson.errors) like: {"line": 12, "errors": {"title": [..]}}
+    # resume after stopping: python manage.py import_files files.ndjson --author 1 --offset 25000 (printed in progress)
+    help = 'Import files from NDJSON file, validated in parallel processes and saved in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="NDJSON file, '-' for stdin")
+        parser.add_argument('--author', type=int, required=True, help='id of the user saved as author of files')
+        parser.add_argument('--offset', type=int, default=0, help='number of lines to skip (imported before)')
+        parser.add_argument('--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE, help='lines in every chunk')
+        parser.add_argument('--workers', type=int, default=settings.IMPORT_WORKERS, help='validating processes')
+        parser.add_argument('--report', help='errors report file (default: <file>.errors)')
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(id=options['author']).exists():
+            raise CommandError(f"user {options['author']} not found")
+        report_path = options['report'] or (f"{options['file']}.errors" if options['file'] != '-' else 'import.errors')
+        input = sys.stdin if options['file'] == '-' else open(options['file'], encoding='utf-8')
+        # forked workers must not share database connections of this process (they connect by themselves)
+        connections.close_all()
+        executor = ProcessPoolExecutor(options['workers'], initializer=init_worker, initargs=(options['author'],))
+        self.start, self.offset, self.inserted, self.invalid = time.time(), options['offset'], 0, 0
+        try:
+            with input, open(report_path, 'a' if options['offset'] else 'w', encoding='utf-8') as report:
+                lines = ((number, line) for number, line in enumerate(itertools.islice(input, options['offset'], None),
+                                                                      options['offset'] + 1) if line.strip())
+                futures = deque()    # chunks are saved in order, so every printed offset is a safe point to resume
+                for chunk in iter(lambda: list(itertools.islice(lines, options['chunk_size'])), []):
+                    futures.append((chunk[-1][0], executor.submit(validate_chunk, chunk)))
+                    if len(futures) > options['workers'] * 2:     # limits chunks waiting in memory
+                        self.save(*futures.popleft(), report)
+                while futures:
+                    self.save(*futures.popleft(), report)
+        finally:
+            executor.shutdown(cancel_futures=True)
+        self.stdout.write(self.style.SUCCESS(f'{self.inserted} files imported, {self.invalid} invalid (in {report_path}), '
+                                             f'{self.get_rate():.0f} files/sec'))
+
+    def save(self, last_line, future, report):
+        files, errors, image_jobs = future.result()
+        if files:
+            s = FileMongoSerializer(many=True, context={'bulk': True, 'image_jobs': image_jobs})
+            saved = s.create([file for number, file in files])
+            queue_image_jobs(s.context, mongo_db.file)
+            self.inserted += len(saved)
+            errors.update({files[index][0]: error for index, error in s.failed.items()})    # not unique files
+        for number in sorted(errors):
+            report.write(json.dumps({'line': number, 'errors': errors[number]}, ensure_ascii=False, default=str) + '\n')
+        report.flush()
+        self.invalid += len(errors)
+        self.offset = last_line
+        self.stdout.write(f'offset {self.offset}: {self.inserted} imported, {self.invalid} invalid, {self.get_rate():.0f} files/sec')
+
+    def get_rate(self):
+        return self.inserted / max(time.time() - self.start, 0.001)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.methods import move_embedded_comments
+from main.mongo import mongo_db
+
+
+class Command(BaseCommand):
+    # usage: python manage.py move_comments  (once, after comments moved to 'comment' collection)
+    help = "Move comments embedded in files and posts to buckets of 'comment' collection"
+
+    def handle(self, *args, **options):
+        for parent_collection in [mongo_db.file, mongo_db.post]:
+            moved = move_embedded_comments(mongo_db.comment, parent_collection)
+            self.stdout.write(self.style.SUCCESS(f'{moved} comments of {parent_collection.name} moved'))
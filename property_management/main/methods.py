@@ -1,56 +1,173 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
 from django.db.models.query import QuerySet
+from django.utils.functional import Promise
+from django.utils.text import slugify
+from django.utils.http import http_date
+from django.utils.cache import get_conditional_response as django_conditional_response
 
-from rest_framework.renderers import JSONRenderer
-from rest_framework.parsers import JSONParser
+from mongoserializer.methods import DictToObject, ResponseMongo
 
-from mongoserializer.methods import DictToObject
+from .models import Category
+from .category_tree import get_category_tree, bump_category_tree_version
+from .model_methods import get_path
+from .catalogs import catalogs
 
-import io
+import uuid
+import json
+import time
+import datetime
+import jdatetime
+from collections import defaultdict, Counter
+import base64
+import hashlib
+import pymongo
+from urllib.parse import urlparse
 from math import ceil
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from bson.decimal128 import Decimal128
+from decimal import Decimal
 
 
-def get_parsed_data(data):
-    # data type is dict
-    content = JSONRenderer().render(data)
-    stream = io.BytesIO(content)
-    return JSONParser().parse(stream)
-
-
-def get_category_and_fathers(category):
+def get_category_and_fathers(category):  # category could be Category instance, queryset or id
     if category:
         if isinstance(category, QuerySet):
             category = category[0]
-        category_and_fathers = [category]
-        for i in range(category.level-1):
-            category = category.father_category
-            if category:
-                category_and_fathers += [category]
-        return category_and_fathers
+        return get_category_tree().get_fathers(getattr(category, 'id', category))
     raise AttributeError('category is None')
 
 
-def comment_save_to_mongo(comment_col, serializer, _id, request=None):
-    if serializer.validated_data:
-        data = get_parsed_data(serializer.validated_data)
-        if _id:
-            comment = comment_col.find_one({'_id': ObjectId(_id)})
-        if comment.post:
-            post_col = mongo_db.post
-            if not change:
-                post_col.update_one({'_id': ObjectId(comment.post)}, {'$push': {'comments': data}})
-            else:
-                post_col.update_one({'_id': ObjectId(comment.post), 'comments.id': comment.id}, {'$set': {'comments.$': data}})
-
-        elif comment.product_id:
-            product_col, foreignkey = settings.MONGO_PRODUCT_COL, comment.product_id
-            if not change:
-                product_col.update_one({'id': foreignkey}, {'$push': {'comments': data}})
-            else:
-                product_col.update_one({'id': foreignkey, 'comments.id': comment.id}, {'$set': {'comments.$': data}})
-        else:      # this will prevent error in comment editing when there is not any post/product
-            return None
+def get_category_tree_fields(fathers):
+    # fathers is like {category_id: father_id} of whole table, returns correct {id: (level, levels_afterthis, path)} and
+    # ids of categories not reached from roots (their fathers chain is circular or their father not exists). linear time
+    childes = defaultdict(list)
+    for id, father_id in fathers.items():
+        childes[father_id].append(id)
+    fields, order = {}, []        # order: fathers come before their childes
+    stack = [(id, '', 1) for id in childes[None]]
+    while stack:
+        id, father_path, level = stack.pop()
+        fields[id] = [level, 0, get_path(father_path, id)]
+        order.append(id)
+        stack += [(child_id, fields[id][2], level + 1) for child_id in childes[id]]
+    for id in reversed(order):     # bottom-up, every father gets deepest levels_afterthis of its childes
+        father_id = fathers[id]
+        if father_id:
+            fields[father_id][1] = max(fields[father_id][1], fields[id][1] + 1)
+    return {id: tuple(value) for id, value in fields.items()}, [id for id in fathers if id not in fields]
+
+
+def repair_categories(save=True):
+    # recompute level, levels_afterthis and path of all categories, returns (changed categories, broken ids)
+    categories = {category.id: category for category in Category.objects.only('id', 'father_category_id', 'level', 'levels_afterthis', 'path')}
+    fields, broken = get_category_tree_fields({id: category.father_category_id for id, category in categories.items()})
+    changed = []
+    for id, (level, levels_afterthis, path) in fields.items():
+        category = categories[id]
+        if (category.level, category.levels_afterthis, category.path) != (level, levels_afterthis, path):
+            category.level, category.levels_afterthis, category.path = level, levels_afterthis, path
+            changed.append(category)
+    if save and changed:
+        Category.objects.bulk_update(changed, ['level', 'levels_afterthis', 'path'], batch_size=1000)
+        transaction.on_commit(bump_category_tree_version)
+    return changed, broken
+
+
+@transaction.atomic
+def import_categories(nodes):
+    # nodes is like: [{'name': 'digital', 'father': None}, {'name': 'phone', 'father': 'digital', 'slug': ..}] ('slug' and
+    # 'post_product' are optional). father could be in nodes or in database. categories are inserted level by level with
+    # bulk_create (Category.save not called), next level, levels_afterthis and path are computed for all in one pass.
+    max_level = Category._meta.get_field('level').validators[1].limit_value
+    existing = dict(Category.objects.values_list('name', 'level'))
+    duplicates = [name for name, count in Counter(node['name'] for node in nodes).items() if count > 1]
+    if duplicates:
+        raise ValueError(f'categories are repeated: {", ".join(duplicates)}')
+    nodes = {node['name']: node for node in nodes}
+    levels = {}
+
+    def get_level(name, chain=()):
+        if name in existing:
+            return existing[name]
+        if name in chain:
+            raise ValueError(f'category "{name}" is father of itself')
+        if name not in nodes:
+            raise ValueError(f'father category "{name}" not found')
+        if name not in levels:
+            father = nodes[name].get('father')
+            levels[name] = get_level(father, chain + (name,)) + 1 if father else 1
+            if levels[name] > max_level:
+                raise ValueError(f'level of category "{name}" is more than {max_level}')
+        return levels[name]
+
+    by_level = defaultdict(list)
+    for name in nodes:
+        if name in existing:
+            raise ValueError(f'category "{name}" already exists')
+        by_level[get_level(name)].append(nodes[name])
+    ids = dict(Category.objects.values_list('name', 'id'))
+    created = []
+    for level in sorted(by_level):     # fathers are created (and have id) before their childes
+        categories = [Category(name=node['name'], slug=node.get('slug') or slugify(node['name'], allow_unicode=True),
+                               post_product=node.get('post_product') or 'product', level=level,
+                               father_category_id=ids[node['father']] if node.get('father') else None)
+                      for node in by_level[level]]
+        for category in Category.objects.bulk_create(categories, batch_size=1000):
+            ids[category.name] = category.id
+            created.append(category)
+    repair_categories()
+    return created
+
+
+def convert_model(instance):  # only concrete fields (like father_category_id), no query for relations
+    return {field.attname: get_bson_data(getattr(instance, field.attname)) for field in instance._meta.concrete_fields}
+
+
+# types stored in mongo without change, checked before calling get_bson_data for items (most values are like these)
+bson_types = frozenset([str, int, float, bool, type(None), bytes, ObjectId, Decimal128, datetime.datetime])
+
+
+def convert_dict(data):
+    return {key: value if type(value) in bson_types else get_bson_data(value) for key, value in data.items()}
+
+
+def convert_list(data):   # list, tuple or set
+    return [value if type(value) in bson_types else get_bson_data(value) for value in data]
+
+
+# converters of python types to types storable in mongo (used in get_bson_data), subclasses of the types (like
+# OrderedDict, ReturnDict or Category) use converter of their parent class
+bson_converters = {
+    dict: convert_dict,
+    list: convert_list,
+    tuple: convert_list,
+    set: convert_list,
+    Decimal: Decimal128,
+    jdatetime.datetime: lambda value: value.togregorian(),
+    jdatetime.date: lambda value: datetime.datetime.combine(value.togregorian(), datetime.time()),
+    datetime.date: lambda value: datetime.datetime.combine(value, datetime.time()),   # mongo only stores datetime
+    uuid.UUID: str,
+    Promise: str,        # lazy translations like: _('new')
+    Model: convert_model,
+}
+for bson_type in bson_types:
+    bson_converters[bson_type] = lambda value: value
+
+
+def get_bson_data(data):
+    # converts validated data (dict, list, ...) to data storable in mongo directly (instead of json render and parse)
+    converter = bson_converters.get(type(data))
+    if converter is None:
+        for cls in type(data).__mro__[1:]:
+            if cls in bson_converters:
+                converter = bson_converters[type(data)] = bson_converters[cls]    # next time found directly
+                break
+        else:
+            return data
+    return converter(data)
 
 
 def get_page_count(count, step, **kwargs):  # count can be a model class or instances of model class
@@ -62,3 +179,333 @@ def get_page_count(count, step, **kwargs):  # count can be a model class or inst
     else:        # count is like <Queryset Product(1), Product(2), ....> or other model instances
         # ceil round up number, like: ceil(2.2)==3 ceil(3)==3
         return ceil(count.count() / step)
+
+
+# indexes of the 'file' collection, created by 'ensure_indexes' command. (published_date, _id) backs FileList sorting
+# and its keyset pagination, _id is the tie-breaker for files with same published_date.
+# other indexes support FileSearch filters (get_file_search_query), every filter is the first key of at least one
+# index, so no combination of filters scans whole collection. equality keys come before sort keys, and sort keys
+# before range keys (ESR rule).
+file_indexes = [
+    pymongo.IndexModel([('published_date', -1), ('_id', -1)], name='published_date_id'),
+    pymongo.IndexModel([('neighborhoods.id', 1), ('property_type.id', 1), ('published_date', -1), ('_id', -1)], name='neighborhood_search'),
+    pymongo.IndexModel([('property_type.id', 1), ('transaction.id', 1), ('published_date', -1), ('_id', -1)], name='property_type_search'),
+    pymongo.IndexModel([('transaction.id', 1), ('published_date', -1), ('_id', -1)], name='transaction_search'),
+    pymongo.IndexModel([('sleep_numbers.id', 1), ('published_date', -1), ('_id', -1)], name='rooms_search'),
+    pymongo.IndexModel([('total_price_num', 1), ('metraj_num', 1)], name='total_price_search'),
+    pymongo.IndexModel([('metraj_num', 1), ('total_price_num', 1)], name='metraj_search'),
+    pymongo.IndexModel([('price_per_meter_num', 1)], name='price_per_meter_search'),
+    pymongo.IndexModel([('features', 1)], name='features_search'),    # multikey index (features is list)
+]
+# source of truth of unique fields, bulk creation (FileListMongoSerializer) relies on them instead of finding one by one
+file_unique_indexes = [
+    pymongo.IndexModel([('title', 1)], name='title_unique', unique=True),
+    pymongo.IndexModel([('file_id', 1)], name='file_id_unique', unique=True, sparse=True),
+]
+
+
+def ensure_file_indexes(collection):
+    # create_index is no-op if index exists, so calling this in every deploy is cheap. unique indexes are created
+    # separately, because they fail when collection has duplicates already (other indexes must be created anyway)
+    collection.create_indexes(file_indexes)
+    collection.create_indexes(file_unique_indexes)
+
+
+def encode_file_cursor(file):  # file is mongo document, returns opaque token like: 'MTcyNzY4MDAwMDo2NzAx...'
+    token = f"{file['published_date']}:{file['_id']}"
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+
+def decode_file_cursor(token):  # returns (published_date, ObjectId), raises ValueError for invalid tokens
+    try:
+        published_date, _id = base64.urlsafe_b64decode(token.encode()).decode().split(':')
+        return int(published_date), ObjectId(_id)
+    except (ValueError, UnicodeDecodeError, InvalidId):
+        raise ValueError(f"invalid cursor: ({token})")
+
+
+def get_file_cursor_query(token):  # query of files come after 'token' in (published_date, _id) descending order
+    published_date, _id = decode_file_cursor(token)
+    return {'$or': [{'published_date': {'$lt': published_date}},
+                    {'published_date': published_date, '_id': {'$lt': _id}}]}
+
+
+def get_file_count(collection):  # total count of files, cached to prevent counting in every page request
+    count = cache.get('file_count')
+    if count is None:
+        # estimated_document_count reads collection metadata, so doesn't scan the collection like count_documents
+        count = collection.estimated_document_count()
+        cache.set('file_count', count, settings.FILE_COUNT_TIMEOUT)
+    return count
+
+
+# query params of FileSearch like: {'neighborhood': 'neighborhoods.id'}. range filters use min_/max_ prefixes, like:
+# ?min_price=1000&max_price=2000. numeric values saved in '*_num' shadow fields (FileMongoSerializer.to_internal_value)
+file_search_equal_filters = {'neighborhood': 'neighborhoods.id', 'property_type': 'property_type.id',
+                             'transaction': 'transaction.id', 'rooms': 'sleep_numbers.id'}
+file_search_range_filters = {'price': 'total_price_num', 'metraj': 'metraj_num', 'price_per_meter': 'price_per_meter_num'}
+
+
+int64_min, int64_max = -2 ** 63, 2 ** 63 - 1     # range of bson int64, bigger numbers can't save or query as number
+
+
+def get_int64(value):  # value like '1000', 1000 or Decimal('1000'), raises ValueError for NaN, Infinity or out of int64
+    try:
+        number = int(value)    # int(Decimal('NaN')) raises ValueError and int(Decimal('Infinity')) OverflowError
+    except (ValueError, TypeError, OverflowError):
+        raise ValueError(f'not a number: ({value})')
+    if not int64_min <= number <= int64_max:
+        raise ValueError(f'number is out of range: ({value})')
+    return number
+
+
+def get_file_search_query(params):  # params is like request.GET, raise ValueError for invalid values
+    query = {}
+    try:
+        for param, field in file_search_equal_filters.items():
+            if params.get(param):
+                query[field] = get_int64(params[param])
+        for param, field in file_search_range_filters.items():
+            if params.get(f'min_{param}'):
+                query.setdefault(field, {})['$gte'] = get_int64(params[f'min_{param}'])
+            if params.get(f'max_{param}'):
+                query.setdefault(field, {})['$lte'] = get_int64(params[f'max_{param}'])
+    except ValueError:
+        raise ValueError(f"'{param}' filter must be number (64 bit integer)")
+    if params.get('features'):     # like: ?features=پارکینگ,parking,3  files contain all of them
+        features = []
+        for term in params['features'].split(','):    # saved like catalog (persianname), see validate_features
+            item = catalogs['features'].resolve(term.strip())
+            if item is None:
+                raise ValueError(f"feature '{term}' not found")
+            features.append(item['persianname'])
+        query['features'] = {'$all': features}
+    return query
+
+
+def backfill_file_numbers(collection, batch_size=1000):
+    # fills <field>_num of files saved before them (FileMongoSerializer.to_internal_value fills them for new files),
+    # returns (updated, invalid). invalid values (like 'NaN' or out of int64) are left without <field>_num.
+    # files are read in _id order after last read, so safe to run again and invalid files are not read again
+    fields = list(file_search_range_filters.values())      # like: ['total_price_num', ..]
+    query = {'$or': [{field[:-4]: {'$ne': None}, field: {'$exists': False}} for field in fields]}
+    updated, invalid, last = 0, 0, None
+    while True:
+        files = list(collection.find({**query, '_id': {'$gt': last}} if last else query,
+                                     {name: 1 for field in fields for name in [field, field[:-4]]}).sort('_id', 1).limit(batch_size))
+        if not files:
+            return updated, invalid
+        operations = []
+        for file in files:
+            numbers = {}
+            for field in fields:
+                value = file.get(field[:-4])
+                if value is None or field in file:
+                    continue
+                try:
+                    numbers[field] = get_int64(value.to_decimal() if isinstance(value, Decimal128) else value)
+                except ValueError:
+                    invalid += 1
+            if numbers:
+                operations.append(pymongo.UpdateOne({'_id': file['_id']}, {'$set': numbers}))
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+        last = files[-1]['_id']
+
+
+# conditional GET (ETag and Last-Modified) of documents have 'updated' (TimestampField, saved as timestamp). validators
+# are made from 'version projection' of documents (like: {'updated': 1, 'icon.size': 1}), so checking If-None-Match
+# needs only a projection query, not loading and serializing documents. etags are weak, because 'updated' is in seconds
+file_version_projection = {'updated': 1, 'comments_count': 1, 'icon.size': 1}   # comments_count and icon change without 'updated'
+
+
+def get_document_version(document, projection):  # like: ['6701..', 1727680000, 3, ['240', 'default']]
+    version = [str(document.get('_id'))]
+    for field in projection:
+        if field != '_id':
+            value = document
+            for key in field.split('.'):     # 'icon.size' of list of icons is list of sizes (like mongo projection)
+                if isinstance(value, list):
+                    value = [item.get(key) for item in value if isinstance(item, dict)]
+                else:
+                    value = value.get(key) if isinstance(value, dict) else None
+            version.append(value)
+    return version
+
+
+def get_etag(documents, projection, extra=None, weak=True):  # extra is anything else changes response (like page count)
+    versions = [get_document_version(document, projection) for document in documents]
+    digest = hashlib.md5(json.dumps([extra, versions], default=str).encode()).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def get_last_modified(documents):  # max 'updated' of documents (timestamp) or None
+    updated = [document['updated'] for document in documents if isinstance(document.get('updated'), (int, float))]
+    return int(max(updated)) if updated else None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'     # clients always revalidate (by If-None-Match)
+    return response
+
+
+def get_conditional_response(request, cache, key, projection, get_data, get_versions, extra=None):
+    # response with ETag/Last-Modified (or 304) of cached data (main/cache.py). cached entries are like:
+    # {'data': .., 'etag': .., 'last_modified': ..}. get_data() returns (data, documents) (documents contain projection's
+    # fields), get_versions() returns documents loaded with only 'projection', used for conditional requests not cached.
+    # usage: get_conditional_response(request, file_detail_cache, id, file_version_projection, get_file, get_versions)
+    def compute():
+        data, documents = get_data()
+        if data is None:
+            return None
+        return {'data': data, 'etag': get_etag(documents, projection, extra), 'last_modified': get_last_modified(documents)}
+
+    entry, changes, clears = cache.lookup(key)      # one lookup, missed entry is computed by set_computed
+    if entry is None and ('HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META):
+        documents = get_versions()
+        if documents:
+            etag, last_modified = get_etag(documents, projection, extra), get_last_modified(documents)
+            not_modified = django_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified:
+                return set_validators(not_modified, etag, last_modified)
+    if entry is None:
+        entry = cache.set_computed(key, compute, changes, clears)
+    if entry is None:      # like not existed document
+        return ResponseMongo(None)
+    response = django_conditional_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+    return set_validators(response or ResponseMongo(entry['data']), entry['etag'], entry['last_modified'])
+
+
+# state of crawled divar files in 'crawl_state' collection, one document per divar file like:
+# {'_id': token, 'url': .., 'hash': hash of card content, 'last_seen': timestamp, 'file_id': _id of saved file}
+def get_divar_token(url):  # like: 'https://divar.ir/v/title/AZxNzgk8' > 'AZxNzgk8'
+    return urlparse(url).path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def get_card_hash(card_text):  # fingerprint of card content (title, price, ...), whitespaces don't change the hash
+    return hashlib.blake2b(' '.join(card_text.split()).encode(), digest_size=16).hexdigest()
+
+
+def get_changed_cards(collection, cards):
+    # cards is like {card_url: card_text}, returns {card_url: state} of new or modified cards (required to crawl).
+    # state['file_id'] is None for new cards. last_seen of unchanged cards is updated here (they are not crawled)
+    states = {}
+    for card_url, card_text in cards.items():
+        token = get_divar_token(card_url)
+        states[token] = {'_id': token, 'url': card_url, 'hash': get_card_hash(card_text), 'file_id': None}
+    saved_states = {state['_id']: state for state in collection.find({'_id': {'$in': list(states)}})}
+    changed, unchanged = {}, []
+    for token, state in states.items():
+        saved_state = saved_states.get(token)
+        if saved_state and saved_state['hash'] == state['hash'] and saved_state.get('file_id'):
+            unchanged.append(token)
+        else:
+            state['file_id'] = saved_state.get('file_id') if saved_state else None
+            changed[state['url']] = state
+    if unchanged:
+        collection.update_many({'_id': {'$in': unchanged}}, {'$set': {'last_seen': int(time.time())}})
+    return changed
+
+
+def save_crawl_states(collection, states):  # states are from get_changed_cards (with file_id of saved file)
+    now = int(time.time())
+    updates = [pymongo.UpdateOne({'_id': state['_id']}, {'$set': {'url': state['url'], 'hash': state['hash'],
+               'file_id': state['file_id'], 'last_seen': now}}, upsert=True) for state in states]
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+
+
+# comments of files and posts are in 'comment' collection (not embedded in parent), bucketed by parent. every bucket
+# has max settings.COMMENT_BUCKET_SIZE comments like: {'_id', 'parent': ObjectId of file/post, 'published_date': date of
+# bucket's first comment, 'count': 2, 'comments': [{..}, {..}]}. parents only keep 'comments_count'.
+# one bucket is one page of comments (newest first), so reading a page is one indexed query
+comment_indexes = [
+    pymongo.IndexModel([('parent', 1), ('published_date', -1), ('_id', -1)], name='parent_published_date'),
+    pymongo.IndexModel([('comments._id', 1)], name='comment_id'),   # editing a comment (multikey)
+]
+
+
+def ensure_comment_indexes(collection):
+    collection.create_indexes(comment_indexes)
+
+
+def get_comment_push(parent, comment):
+    # adds comment to the open (not full) bucket of parent, creates new bucket if all buckets are full
+    return pymongo.UpdateOne(
+        {'parent': parent, 'count': {'$lt': settings.COMMENT_BUCKET_SIZE}},
+        {'$push': {'comments': comment}, '$inc': {'count': 1},
+         '$setOnInsert': {'published_date': comment.get('published_date')}}, upsert=True)
+
+
+def comment_save_to_mongo(comment_col, parent_col, added=(), edited=()):
+    # saves many comments (of many parents) with one bulk_write. added is new comments like: [(parent_id, comment), ..]
+    # and edited is like: [(comment_id, {'content': .., 'status': ..}), ..] (only changed fields)
+    operations = [get_comment_push(ObjectId(parent), get_bson_data(comment)) for parent, comment in added]
+    for comment_id, fields in edited:
+        update_set = {f'comments.$.{key}': value for key, value in get_bson_data(fields).items()}
+        operations.append(pymongo.UpdateOne({'comments._id': ObjectId(comment_id)}, {'$set': update_set}))
+    if not operations:
+        return None
+    # ordered, so comments of same parent fill the bucket one by one (next one sees previous $inc)
+    result = comment_col.bulk_write(operations)
+    counts = defaultdict(int)
+    for parent, comment in added:
+        counts[ObjectId(parent)] += 1
+    if counts:
+        parent_col.bulk_write([pymongo.UpdateOne({'_id': parent}, {'$inc': {'comments_count': count}})
+                               for parent, count in counts.items()], ordered=False)
+    return result
+
+
+def get_comments_page(comment_collection, parent, page=1):
+    # comments of page, newest first. every page has settings.COMMENT_BUCKET_SIZE comments (last page could have less).
+    # newest bucket is usually partial, so a page is end of one bucket and start of the next one: counts of buckets
+    # load first, then only comments of (at most two) buckets of the page
+    size, start = settings.COMMENT_BUCKET_SIZE, (page - 1) * settings.COMMENT_BUCKET_SIZE
+    buckets, position = [], 0     # position is number of comments in newer buckets
+    for bucket in comment_collection.find({'parent': ObjectId(parent)}, {'count': 1}).sort([('published_date', -1), ('_id', -1)]):
+        if position + bucket['count'] > start:
+            buckets.append((bucket['_id'], position))
+        position += bucket['count']
+        if position >= start + size:
+            break
+    if not buckets:
+        return []
+    loaded = {bucket['_id']: bucket['comments'] for bucket in
+              comment_collection.find({'_id': {'$in': [id for id, position in buckets]}}, {'comments': 1})}
+    comments = [comment for id, position in buckets for comment in reversed(loaded[id])]
+    offset = start - buckets[0][1]
+    return comments[offset:offset + size]
+
+
+def move_embedded_comments(comment_collection, parent_collection, batch_size=100):
+    # moves old comments embedded in parents (parent['comments']) to buckets, returns number of moved comments.
+    # safe to run again after interrupting: comments already in buckets (by _id) are not pushed again, and
+    # comments_count is set (not increased) from buckets in same update that removes parent['comments']
+    moved = 0
+    while True:
+        parents = list(parent_collection.find({'comments.0': {'$exists': True}}, {'comments': 1}).limit(batch_size))
+        if not parents:
+            return moved
+        for parent in parents:     # comments without _id get it in the parent first, so they are found in next run
+            if any('_id' not in comment for comment in parent['comments']):
+                for comment in parent['comments']:
+                    comment.setdefault('_id', ObjectId())
+                parent_collection.update_one({'_id': parent['_id']}, {'$set': {'comments': parent['comments']}})
+        ids = [parent['_id'] for parent in parents]
+        existed = set(comment_collection.distinct('comments._id', {'parent': {'$in': ids}}))
+        operations = [get_comment_push(parent['_id'], get_bson_data(comment)) for parent in parents
+                      for comment in sorted(parent['comments'], key=lambda comment: comment.get('published_date') or 0)
+                      if comment['_id'] not in existed]
+        if operations:
+            comment_collection.bulk_write(operations)     # ordered, like comment_save_to_mongo
+        counts = {count['_id']: count['count'] for count in comment_collection.aggregate([
+            {'$match': {'parent': {'$in': ids}}}, {'$group': {'_id': '$parent', 'count': {'$sum': '$count'}}}])}
+        parent_collection.bulk_write([pymongo.UpdateOne({'_id': id}, {'$unset': {'comments': ''},
+                                                                      '$set': {'comments_count': counts.get(id, 0)}})
+                                      for id in ids], ordered=False)
+        moved += len(operations)
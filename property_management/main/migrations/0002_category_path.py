@@ -0,0 +1,60 @@
+from django.db import migrations, models
+
+
+def fill_path(apps, schema_editor):
+    # fill path, level and levels_afterthis of current categories (from father_category), in memory with one query
+    Category = apps.get_model('main', 'Category')
+    categories = {category.id: category for category in Category.objects.all()}
+    for category in categories.values():
+        ids, father_id = [category.id], category.father_category_id
+        while father_id and father_id not in ids and len(ids) < 6:     # 6 is max level
+            ids.insert(0, father_id)
+            father_id = categories[father_id].father_category_id
+        category.path = '/' + '/'.join(str(id) for id in ids) + '/'
+        category.level = len(ids)
+        category.levels_afterthis = 0
+    for category in categories.values():
+        for id in category.path.strip('/').split('/')[:-1]:     # fathers of category
+            father = categories[int(id)]
+            father.levels_afterthis = max(father.levels_afterthis, category.level - father.level)
+    Category.objects.bulk_update(categories.values(), ['path', 'level', 'levels_afterthis'], batch_size=1000)
+
+
+def fill_all_childes_id(apps, schema_editor):
+    # reverse of fill_path, fill removed fields from path: all_childes_id like '3,7,12' (ids of childes in any level)
+    # and previous_father_id (was current father, saved in every save of category)
+    Category = apps.get_model('main', 'Category')
+    categories = {category.id: category for category in Category.objects.all()}
+    childes = {id: [] for id in categories}
+    for category in categories.values():
+        for id in category.path.strip('/').split('/')[:-1]:
+            if int(id) in childes:
+                childes[int(id)].append(str(category.id))
+    for category in categories.values():
+        category.all_childes_id = ','.join(childes[category.id])
+        category.previous_father_id = category.father_category_id
+    Category.objects.bulk_update(categories.values(), ['all_childes_id', 'previous_father_id'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_path, fill_all_childes_id),
+        migrations.RemoveField(
+            model_name='category',
+            name='all_childes_id',
+        ),
+        migrations.RemoveField(
+            model_name='category',
+            name='previous_father_id',
+        ),
+    ]
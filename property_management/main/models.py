@@ -1,9 +1,12 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 
-from .model_methods import set_levels_afterthis_all_childes_id
+from .model_methods import get_path, get_father_path, set_levels_afterthis
+from .category_tree import bump_category_tree_version
 
 
 group_choices = [(key, str(key)) for key in range(1, 11)]
@@ -32,8 +35,7 @@ class Category(models.Model):                                  #note: supose roo
     level = models.PositiveSmallIntegerField(_('level'), default=1, validators=[MinValueValidator(1), MaxValueValidator(6)])        #important: in main/views/ProductCategoryList & ProductDetail and in main/methods/get_posts_products_by_category   we used MaxValueValidator with its posation in validator, so validator[1] must be MaxValueValidator otherwise will raise error.
     father_category = models.ForeignKey('self', related_name='child_categories', related_query_name='childs', null=True, blank=True, on_delete=models.CASCADE, verbose_name=_('father category'))        #if category.level>1 will force to filling this field.
     levels_afterthis = models.PositiveSmallIntegerField(default=0, blank=True)                         #in field neshan midahad chand sath farzand darad in pedar, masalam: <category(1) digital>,  <category(2) mobail>,  <category(3) samsung> farz konid mobail pedare samsung,  digital pedare mobail ast(<category(1) digital>.level=1,  <category(2) mobail>.level=2,  <category(3) samsung>.level=3)   . bala sare digital dar in mesal 2 sath farzand mibashad( mobail va samsung pas <category(1) digital>.levels_afterthis = 2   va <category(2) mobail>.levels_afterthis=1  va <category(3) samsung>.levels_afterthis=0
-    previous_father_id = models.PositiveSmallIntegerField(null=True, blank=True)                         #supose you change category.father_category, we cant understant prevouse father was what in Category.save(ony new edited father_category is visible) so we added this field
-    all_childes_id = models.TextField(default='', blank=True)                      #list all chiles of that object in this structure: "1,2,3,4"    if this field name was chiles_id maybe raise problem with related_query_name of father_category or other.
+    path = models.CharField(max_length=255, default='', blank=True, editable=False, db_index=True)         #ids of all fathers and this category like: '/1/5/12/', all childes of category are: Category.objects.filter(path__startswith=category.path) (see model_methods.py). db_index in postgres creates 'like' index too (used by startswith).
     post_product = models.CharField(_('post or product'), max_length=10, default='product')      #this should be radio button in admin panel.
     filters = models.ManyToManyField(Filter, through='Category_Filters', blank=True, verbose_name=_('filters'))
     #child_categories
@@ -53,23 +55,41 @@ class Category(models.Model):                                  #note: supose roo
                 raise ValidationError({'father_category': [_('This field is required for level more than 1.')]})
         super().clean_fields(exclude=None)
 
+    def clean(self):
+        if self.father_category and self.path and self.father_category.path.startswith(self.path):
+            raise ValidationError({'father_category': [_('Category can not be child of itself or its childes.')]})
+        super().clean()
+
+    def get_childes(self):                      #all childes in any level (not only child_categories)
+        return Category.objects.filter(path__startswith=self.path).exclude(id=self.id)
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
-        previous_father_queryset = Category.objects.filter(id=self.previous_father_id).select_related('father_category__'*4+'father_category') if self.previous_father_id else None
-        self.previous_father_id = self.father_category_id if self.father_category_id else None
+        father = self.father_category
+        old_path, old_level = self.path, self.level
+        if father and old_path and father.path.startswith(old_path):
+            raise ValidationError({'father_category': [_('Category can not be child of itself or its childes.')]})
+        self.level = father.level + 1 if father else 1
+        if self.level + self.levels_afterthis > Category._meta.get_field('level').validators[1].limit_value:
+            raise ValidationError({'father_category': [_('Category levels are more than maximum.')]})
         super().save(*args, **kwargs)
-        category_queryset = Category.objects.filter(id=self.id).select_related('father_category__'*5+'father_category')    #instead using 6 logn father_category we used more breafer format!
-
-        categories_before_join, categories_after_join = set_levels_afterthis_all_childes_id(previous_father_queryset, category_queryset, Category._meta.get_field('level').validators[1].limit_value)
-        Category.objects.bulk_update(categories_before_join, ['levels_afterthis', 'all_childes_id']) if categories_before_join else None
-        Category.objects.bulk_update(categories_after_join, ['levels_afterthis', 'all_childes_id']) if categories_after_join else None
 
+        self.path = get_path(father.path if father else '', self.id)
+        if self.path != old_path:
+            Category.objects.filter(id=self.id).update(path=self.path)
+            if old_path:      # moved to another father, all childes are moved with one query
+                Category.objects.filter(path__startswith=old_path).exclude(id=self.id).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                    level=F('level') + self.level - old_level)
+            set_levels_afterthis(Category, [self.path] + ([get_father_path(old_path)] if old_path else []))
+        transaction.on_commit(bump_category_tree_version)      # processes reload their category tree
+
+    @transaction.atomic
     def delete(self, using=None, keep_parents=False):
-        id = self.id
-        dell = super().delete(using, keep_parents)
-        previous_father_queryset = Category.objects.filter(id=self.father_category_id).select_related('father_category__'*5+'father_category') if self.father_category_id else None
-        self.id, self.father_category, self.father_category_id = id, None, None                                               #we need self.id in list_childes_id
-        categories_before_join, categories_after_join = set_levels_afterthis_all_childes_id(previous_father_queryset, [self], Category._meta.get_field('level').validators[1].limit_value, delete=True)
-        Category.objects.bulk_update(categories_before_join, ['levels_afterthis', 'all_childes_id']) if categories_before_join else None
+        dell = Category.objects.filter(path__startswith=self.path).delete() if self.path else super().delete(using, keep_parents)
+        if get_father_path(self.path):
+            set_levels_afterthis(Category, [get_father_path(self.path)])
+        transaction.on_commit(bump_category_tree_version)
         return dell
 
 
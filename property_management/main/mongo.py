@@ -0,0 +1,63 @@
+from django.conf import settings
+
+import os
+import pymongo
+import threading
+from urllib.parse import quote_plus
+
+# one MongoClient (one connection pool) per process, shared by all modules. don't create pymongo.MongoClient
+# directly, use 'mongo_db' like: from main.mongo import mongo_db  >  mongo_db.file.find(..)
+_client, _pid = None, None
+_lock = threading.Lock()
+
+
+def get_mongo_uri():
+    conf = settings.MONGO
+    username, password = quote_plus(conf['USER']), quote_plus(conf['PASSWORD'])
+    return f"mongodb://{username}:{password}@{conf['HOST']}:{conf['PORT']}/{conf['NAME']}?authSource={conf['AUTH_SOURCE']}"
+
+
+def get_mongo_client():
+    # client is created in first usage (not in import time). MongoClient is not fork-safe, so when gunicorn forks
+    # workers from master (after master has created client), every worker creates its own client (checked by pid)
+    global _client, _pid
+    if _client is None or _pid != os.getpid():
+        with _lock:
+            if _client is None or _pid != os.getpid():
+                # connect=False: don't open connections until first operation
+                _client = pymongo.MongoClient(get_mongo_uri(), connect=False, **settings.MONGO['OPTIONS'])
+                _pid = os.getpid()
+    return _client
+
+
+def get_mongo_db():
+    return get_mongo_client()[settings.MONGO['NAME']]
+
+
+class LazyCollection:
+    # used in module level (like: Meta.model = mongo_db.file) without creating client in import time.
+    # every attribute (find, insert_one, ...) refers to the real collection of current process's client
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_mongo_db()[self.name], attr)
+
+    def __getitem__(self, key):    # sub collections like: mongo_db.file['archive']
+        return LazyCollection(f'{self.name}.{key}')
+
+    def __repr__(self):
+        return f'<LazyCollection {self.name}>'
+
+
+class LazyDatabase:
+    def __getattr__(self, name):
+        if name.startswith('_'):     # prevent copy/pickle and other protocols treat this as collection
+            raise AttributeError(name)
+        return LazyCollection(name)
+
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+
+mongo_db = LazyDatabase()
@@ -13,35 +13,29 @@ import os
 import re
 import uuid
 import pymongo
-import environ
 import jdatetime
 import urllib.parse
-from urllib.parse import quote_plus
-from pathlib import Path
 from bson.objectid import ObjectId
 from decimal import Decimal
 from onetomultipleimage.fields import OneToMultipleImage
-from onetomultipleimage.methods import ImageCreationSizes
 from mongoserializer.serializer import MongoSerializer, MongoListSerializer
 from mongoserializer.fields import TimestampField, IdMongoField
 from mongoserializer.methods import save_to_mongo as general_save_to_mongo
 from drf_extra_fields.fields import Base64ImageField
 
 from .models import *
-from .methods import comment_save_to_mongo, get_category_and_fathers
+from .mongo import mongo_db
+from .methods import comment_save_to_mongo, get_category_and_fathers, get_int64
+from .category_tree import get_category_tree
+from .cache import invalidate_files
+from .catalogs import catalogs
+from .images import store_original, get_lazy_variants, get_image_variants, get_variants_job, queue_image_jobs
 from customed_files.rest_framework.classes.validators import MongoUniqueValidator
-from customed_files.rest_framework.fields import DecimalFile, ListSerializer
+from customed_files.rest_framework.fields import DecimalFile, ListSerializer, CatalogField
 from users.serializers import UserNameSerializer
 from users.methods import user_name_shown
 from users.models import User
 
-env = environ.Env()
-environ.Env.read_env(os.path.join(Path(__file__).resolve().parent.parent.parent, '.env'))
-username, password, db_name = quote_plus(env('MONGO_USER_NAME')), quote_plus(env('MONGO_USER_PASS')), env('MONGO_DBNAME')
-auth_source, host = env('MONGO_SOURCE'), env('MONGO_HOST')
-uri = f"mongodb://{username}:{password}@{host}:27017/{db_name}?authSource={auth_source}"
-mongo_db = pymongo.MongoClient(uri)[db_name]
-
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -76,15 +70,8 @@ class ReplySerializer(serializers.ModelSerializer):  # not implemented
 
 class CommentListSerializer(MongoListSerializer):
     def updatee(self, _id, serialized):  # _id and serialized are both list
-        updates = []
-        for comment_id, comment_data in zip(_id, serialized):
-            update_set = {f'comments.$.{key}': comment_data[key] for key in comment_data}
-            updates.append(pymongo.UpdateOne(
-                {'_id': ObjectId(self.father_id), 'comments._id': ObjectId(comment_id)},
-                {'$set': update_set}
-            ))
-
-        self.mongo_collection.bulk_write(updates)
+        # comments are in buckets of 'comment' collection (main/methods.py), not inside the file/post
+        comment_save_to_mongo(mongo_db.comment, self.mongo_collection, edited=list(zip(_id, serialized)))
         return serialized
 
 
@@ -166,7 +153,16 @@ class OneToMultipleImageMongo(OneToMultipleImage, MongoSerializer):
 
     def to_internal_value(self, data):
         change = self.context.get('change', False)
-        internal_value = super().to_internal_value(data)    # internal_value returned by 'OneToMultipleImage' is list
+        # only original stored here ('default' size), other sizes are rendered after saving (see main/images.py)
+        original = store_original(data.get('image'), self.upload_to, data.get('alt'))
+        internal_value = [{'image': original, 'alt': original.alt, 'size': original.size}] if original else []
+        if original and settings.IMAGE_VARIANTS == 'lazy':     # sizes rendered in first request (ImageVariant view)
+            internal_value += get_lazy_variants(original, self.sizes)
+        elif original:     # same image could be stored and resized before (images are content addressed)
+            internal_value += get_image_variants(original, self.sizes)
+            sizes = [size for size in self.sizes if size != 'default' and size not in original.variants]
+            if sizes:
+                self.context.setdefault('image_jobs', []).append(get_variants_job(original, self.field_name, sizes))
         if internal_value and not change and internal_value[0].get('image'):  # internal_value can be blank list
             # in update or create phase, if 'image' data provided, refill whole 'icon' field again in db
             for dct in internal_value:
@@ -220,12 +216,10 @@ class ImageSerializer(MongoSerializer):
         internal_value = super().to_internal_value(data)
         img = data.get('image')
         if img:
-            if isinstance(img, str) and img.startswith('http'):
-                pass
-            else:
-                obj = ImageCreationSizes(data={'image': data['image'], 'alt': data.get('alt', '')},
-                                         sizes=['default'], name=data.get('name'))
-                img = obj.upload(upload_to=self.upload_to)[0]
+            if isinstance(img, str) and (img.startswith('http') or img.startswith(settings.MEDIA_URL)):
+                pass       # url, or stored before (like crawled images, main/crawl.py store_crawled_images)
+            else:      # stored as is (without decoding and saving again by PIL)
+                img = store_original(data['image'], self.upload_to, data.get('alt', ''))
             internal_value['image'] = img
         return internal_value
 
@@ -258,7 +252,7 @@ class PostMongoSerializer(MongoSerializer):
     icon = OneToMultipleImageMongo(sizes=['240', '420', '640', '720', '960', '1280', 'default'], upload_to='post_images/icons/', required=False)
     category_fathers = serializers.SerializerMethodField()
     category = CategorySerializer(required=False, read_only=True)  # it's validated_data fill in 'to_internal_value'
-    comments = CommentSerializer(many=True, required=False)
+    comments_count = serializers.IntegerField(read_only=True)   # comments are in 'comment' collection (PostComments)
 
     @property
     def context(self):
@@ -278,12 +272,9 @@ class PostMongoSerializer(MongoSerializer):
         internal_value = super().to_internal_value(data)
 
         if data.get('category'):
-            level = Category.objects.filter(id=data['category']).values_list('level', flat=True)[0]
-            related = 'father_category'
-            # '__father_category' * -1 == '', prefetch_related('child_categories') don't need because of single category
-            i = Category._meta.get_field('level').validators[1].limit_value-1-level  # raise error when use directly!
-            related += '__father_category' * i
-            cat = Category.objects.filter(id=data['category']).select_related(related)[0]
+            cat = get_category_tree().get(data['category'])     # category and its fathers without query
+            if not cat:
+                raise ValidationError({'category': 'category not found'})
             internal_value['category_fathers'] = cat
             internal_value['category'] = cat
 
@@ -304,6 +295,11 @@ class PostMongoSerializer(MongoSerializer):
         data = self.serialize_and_filter(self.validated_data)
         return general_save_to_mongo(mongo_db.post, data=data)
 
+    def save(self, **kwargs):
+        saved = super().save(**kwargs)
+        queue_image_jobs(self.context, mongo_db.post)    # render other sizes of icon
+        return saved
+
     def get_category_fathers(self, obj):
         if getattr(obj, 'category', None):
             return CategoryFathersChainedSerializer(obj.category, revert=True, many=True).data
@@ -359,31 +355,64 @@ class FileListMongoSerializer(MongoListSerializer):
     # data_update = {'title': uuid.uuid4().hex[:2], 'images': [{'_id': '67012184cc642f46deced213', 'alt': 'OOO'}]}
     # FileMongoSerializer(_id='67012184...', data=data_update, request=request, partial=True)
     # FileMongoSerializer(_id=['67012184...'], data=[data_update], request=request, many=True, partial=True)
+    # bulk creation: FileMongoSerializer(data=files, request=request, many=True, context={'bulk': True}), unique fields
+    # checked in one query for all files and saved by one insert_many. invalid files are skipped and come to
+    # .failed like: {index_of_file: error}
+    unique_fields = ['title', 'file_id']
+
+    def create(self, validated_data):
+        if not self.context.get('bulk'):
+            created = super().create(validated_data)
+            invalidate_files([])
+            return created
+        self.failed = {}
+        values = {field: [file[field] for file in validated_data if file.get(field)] for field in self.unique_fields}
+        query = {'$or': [{field: {'$in': values[field]}} for field in self.unique_fields]}
+        existing = {field: set() for field in self.unique_fields}
+        for file in self.mongo_collection.find(query, {field: 1 for field in self.unique_fields}):
+            for field in self.unique_fields:
+                existing[field].add(file.get(field))
+        files, indexes = [], []    # indexes[i] is index of files[i] in validated_data
+        for index, file in enumerate(validated_data):
+            for field in self.unique_fields:
+                if file.get(field) and file[field] in existing[field]:   # exists in db or in previous files of the batch
+                    self.failed[index] = {field: [f'The {field} must be unique.']}
+                    break
+            else:
+                for field in self.unique_fields:
+                    existing[field].add(file.get(field))
+                files.append(file)
+                indexes.append(index)
+
+        # unique indexes are source of truth (files could be saved by others between find and insert)
+        inserted = set(range(len(files)))
+        if files:
+            try:
+                self.mongo_collection.insert_many(files, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                for error in e.details['writeErrors']:
+                    inserted.discard(error['index'])
+                    self.failed[indexes[error['index']]] = {'non_field_errors': [error['errmsg']]}
+            invalidate_files([])     # only lists changed
+        return [file for i, file in enumerate(files) if i in inserted]
+
+    def save(self):
+        saved = super().save()
+        queue_image_jobs(self.context, mongo_db.file)    # render other sizes of icons
+        return saved
+
     def updatee(self, _id, validated_data):
         # update fields
         list_of_serialized = super().update(_id, validated_data)
         updates = []
-        for _id, data in zip(_id, list_of_serialized):  # nested fields updated in their own classes
+        for id, data in zip(_id, list_of_serialized):  # nested fields updated in their own classes
             update_set = {key: value for key, value in data.items()}
-            updates.append(pymongo.UpdateOne({'_id': ObjectId(_id)}, {"$set": update_set}))
+            updates.append(pymongo.UpdateOne({'_id': ObjectId(id)}, {"$set": update_set}))
         self.mongo_collection.bulk_write(updates)
+        invalidate_files(_id)
         return list_of_serialized
 
 
-neighborhoods_ch = {5: {'id': 5, 'NeighborhoodName': 'آجودانیه', 'Areaid': 1}, 6: {'id': 6, 'NeighborhoodName': 'آبک', 'Areaid': 1}, 7: {'id': 7, 'NeighborhoodName': 'احتسابیه', 'Areaid': 1}, 8: {'id': 8, 'NeighborhoodName': 'اراج', 'Areaid': 1}, 9: {'id': 9, 'NeighborhoodName': 'ازگل', 'Areaid': 1}, 10: {'id': 10, 'NeighborhoodName': 'اقدسیه', 'Areaid': 1}, 11: {'id': 11, 'NeighborhoodName': 'الهیه', 'Areaid': 1}, 12: {'id': 12, 'NeighborhoodName': 'تجریش', 'Areaid': 1}, 13: {'id': 13, 'NeighborhoodName': 'زعفرانیه', 'Areaid': 1}, 14: {'id': 14, 'NeighborhoodName': 'سعدآباد', 'Areaid': 1}, 15: {'id': 15, 'NeighborhoodName': 'فرمانیه', 'Areaid': 1}, 16: {'id': 16, 'NeighborhoodName': 'قیطریه', 'Areaid': 1}, 17: {'id': 17, 'NeighborhoodName': 'کامرانیه', 'Areaid': 1}, 18: {'id': 18, 'NeighborhoodName': 'نیاوران', 'Areaid': 1}, 19: {'id': 19, 'NeighborhoodName': 'ولنجک', 'Areaid': 1}, 20: {'id': 20, 'NeighborhoodName': 'کاشانک', 'Areaid': 1}, 21: {'id': 21, 'NeighborhoodName': 'سامیان', 'Areaid': 1}, 22: {'id': 22, 'NeighborhoodName': 'دربند', 'Areaid': 1}, 23: {'id': 23, 'NeighborhoodName': 'اوین', 'Areaid': 1}, 24: {'id': 24, 'NeighborhoodName': 'باغ فردوس', 'Areaid': 1}, 25: {'id': 25, 'NeighborhoodName': 'جماران', 'Areaid': 1}, 26: {'id': 26, 'NeighborhoodName': 'چیذر', 'Areaid': 1}, 29: {'id': 29, 'NeighborhoodName': 'تهران ویلا', 'Areaid': 2}, 30: {'id': 30, 'NeighborhoodName': 'ستارخان', 'Areaid': 2}, 31: {'id': 31, 'NeighborhoodName': 'سعادت اباد', 'Areaid': 2}, 32: {'id': 32, 'NeighborhoodName': 'شهرک غرب', 'Areaid': 2}, 33: {'id': 33, 'NeighborhoodName': 'شهرآرا', 'Areaid': 2}, 34: {'id': 34, 'NeighborhoodName': 'صادقیه', 'Areaid': 2}, 35: {'id': 35, 'NeighborhoodName': 'طرشت', 'Areaid': 2}, 36: {'id': 36, 'NeighborhoodName': 'فرحزاد', 'Areaid': 2}, 37: {'id': 37, 'NeighborhoodName': 'گیشا', 'Areaid': 2}, 38: {'id': 38, 'NeighborhoodName': 'همایونشهر', 'Areaid': 2}, 39: {'id': 39, 'NeighborhoodName': 'مرزداران', 'Areaid': 2}, 41: {'id': 41, 'NeighborhoodName': 'اختیاریه', 'Areaid': 1}, 42: {'id': 42, 'NeighborhoodName': 'پاسداران', 'Areaid': 1}, 43: {'id': 43, 'NeighborhoodName': 'دروس', 'Areaid': 1}, 44: {'id': 44, 'NeighborhoodName': 'دولت', 'Areaid': 3}, 45: {'id': 45, 'NeighborhoodName': 'دیباجی', 'Areaid': 3}, 46: {'id': 46, 'NeighborhoodName': 'سیدخندان', 'Areaid': 7}, 47: {'id': 47, 'NeighborhoodName': 'ظفر', 'Areaid': 3}, 48: {'id': 48, 'NeighborhoodName': 'قلهک', 'Areaid': 3}, 49: {'id': 49, 'NeighborhoodName': 'میرداماد', 'Areaid': 3}, 50: {'id': 50, 'NeighborhoodName': 'ونک', 'Areaid': 3}, 52: {'id': 52, 'NeighborhoodName': 'حکیمیه', 'Areaid': 4}, 53: {'id': 53, 'NeighborhoodName': 'سراج', 'Areaid': 4}, 54: {'id': 54, 'NeighborhoodName': 'شمران نو', 'Areaid': 4}, 55: {'id': 55, 'NeighborhoodName': 'علم و صنعت', 'Areaid': 4}, 56: {'id': 56, 'NeighborhoodName': 'فرجام', 'Areaid': 4}, 57: {'id': 57, 'NeighborhoodName': 'قنات کوثر', 'Areaid': 4}, 59: {'id': 59, 'NeighborhoodName': 'نارمک شرقی', 'Areaid': 8}, 60: {'id': 60, 'NeighborhoodName': 'هروی', 'Areaid': 4}, 61: {'id': 61, 'NeighborhoodName': 'هنگام', 'Areaid': 4}, 62: {'id': 62, 'NeighborhoodName': 'تهرانپارس غربی', 'Areaid': 4}, 63: {'id': 63, 'NeighborhoodName': 'تهرانپارس شرقی', 'Areaid': 4}, 66: {'id': 66, 'NeighborhoodName': 'شیان', 'Areaid': 4}, 67: {'id': 67, 'NeighborhoodName': 'لویزان', 'Areaid': 4}, 68: {'id': 68, 'NeighborhoodName': 'مجیدیه شمالی', 'Areaid': 4}, 70: {'id': 70, 'NeighborhoodName': 'بنی هاشم', 'Areaid': 4}, 72: {'id': 72, 'NeighborhoodName': 'نیرودریایی', 'Areaid': 4}, 89: {'id': 89, 'NeighborhoodName': 'اجاره دار', 'Areaid': 7}, 90: {'id': 90, 'NeighborhoodName': 'ارامنه', 'Areaid': 7}, 91: {'id': 91, 'NeighborhoodName': 'امجدیه', 'Areaid': 7}, 92: {'id': 92, 'NeighborhoodName': 'سهروردی', 'Areaid': 7}, 93: {'id': 93, 'NeighborhoodName': 'بهار', 'Areaid': 7}, 94: {'id': 94, 'NeighborhoodName': 'حشمتیه', 'Areaid': 7}, 95: {'id': 95, 'NeighborhoodName': 'سبلان', 'Areaid': 8}, 96: {'id': 96, 'NeighborhoodName': 'اندیشه', 'Areaid': 7}, 97: {'id': 97, 'NeighborhoodName': 'قصر', 'Areaid': 7}, 98: {'id': 98, 'NeighborhoodName': 'کاج', 'Areaid': 7}, 99: {'id': 99, 'NeighborhoodName': 'نظام اباد', 'Areaid': 8}, 100: {'id': 100, 'NeighborhoodName': 'نیلوفر', 'Areaid': 7}, 101: {'id': 101, 'NeighborhoodName': 'هفت تیر', 'Areaid': 7}, 102: {'id': 102, 'NeighborhoodName': 'نامجو', 'Areaid': 7}, 103: {'id': 103, 'NeighborhoodName': 'تهران نو', 'Areaid': 13}, 105: {'id': 105, 'NeighborhoodName': 'مجیدیه جنوبی', 'Areaid': 8}, 106: {'id': 106, 'NeighborhoodName': 'نارمک غربی', 'Areaid': 8}, 107: {'id': 107, 'NeighborhoodName': 'وحیدیه', 'Areaid': 8}, 108: {'id': 108, 'NeighborhoodName': 'یوسف آباد', 'Areaid': 6}, 109: {'id': 109, 'NeighborhoodName': 'ایرانشهر', 'Areaid': 6}, 110: {'id': 110, 'NeighborhoodName': 'گلبرگ غربی', 'Areaid': 8}, 111: {'id': 111, 'NeighborhoodName': 'گاندی', 'Areaid': 3}, 112: {'id': 112, 'NeighborhoodName': 'ساعی', 'Areaid': 6}, 113: {'id': 113, 'NeighborhoodName': 'طالقانی', 'Areaid': 6}, 114: {'id': 114, 'NeighborhoodName': 'سناعی', 'Areaid': 6}, 115: {'id': 115, 'NeighborhoodName': 'گلها', 'Areaid': 6}, 116: {'id': 116, 'NeighborhoodName': 'توانیر', 'Areaid': 6}, 117: {'id': 117, 'NeighborhoodName': 'فاطمی', 'Areaid': 6}, 118: {'id': 118, 'NeighborhoodName': 'مطهری', 'Areaid': 7}, 119: {'id': 119, 'NeighborhoodName': 'بهشتی', 'Areaid': 7}, 120: {'id': 120, 'NeighborhoodName': 'کردستان', 'Areaid': 6}, 121: {'id': 121, 'NeighborhoodName': 'دردشت', 'Areaid': 8}, 133: {'id': 133, 'NeighborhoodName': 'اکباتان', 'Areaid': 5}, 134: {'id': 134, 'NeighborhoodName': 'ستاری', 'Areaid': 5}, 135: {'id': 135, 'NeighborhoodName': 'شهران جنوبی', 'Areaid': 5}, 136: {'id': 136, 'NeighborhoodName': 'پیامبر', 'Areaid': 5}, 137: {'id': 137, 'NeighborhoodName': 'جنت آباد', 'Areaid': 5}, 138: {'id': 138, 'NeighborhoodName': 'باغ فیض', 'Areaid': 5}, 139: {'id': 139, 'NeighborhoodName': 'شهران شمالی', 'Areaid': 5}, 140: {'id': 140, 'NeighborhoodName': 'آیت الله کاشانی', 'Areaid': 5}, 141: {'id': 141, 'NeighborhoodName': 'پونک', 'Areaid': 5}, 142: {'id': 142, 'NeighborhoodName': 'نیروی هوایی', 'Areaid': 13}, 143: {'id': 143, 'NeighborhoodName': 'جردن', 'Areaid': 3}, 144: {'id': 144, 'NeighborhoodName': 'ولیعصر', 'Areaid': 1}, 145: {'id': 145, 'NeighborhoodName': 'انقلاب', 'Areaid': 6}, 146: {'id': 146, 'NeighborhoodName': 'پیروزی', 'Areaid': 14}, 147: {'id': 147, 'NeighborhoodName': 'افسریه', 'Areaid': 15}, 149: {'id': 149, 'NeighborhoodName': 'قاسم آباد', 'Areaid': 4}, 150: {'id': 150, 'NeighborhoodName': 'شهر زیبا', 'Areaid': 5}, 151: {'id': 151, 'NeighborhoodName': 'تهرانسر', 'Areaid': 21}, 152: {'id': 152, 'NeighborhoodName': 'اوقاف', 'Areaid': 4}, 153: {'id': 153, 'NeighborhoodName': 'فردوس', 'Areaid': 5}, 154: {'id': 154, 'NeighborhoodName': 'سپهر', 'Areaid': 2}, 155: {'id': 155, 'NeighborhoodName': 'سازمان برنامه', 'Areaid': 5}, 156: {'id': 156, 'NeighborhoodName': 'سبلان جنوبی', 'Areaid': 8}, 157: {'id': 157, 'NeighborhoodName': 'سبلان شمالی', 'Areaid': 8}, 158: {'id': 158, 'NeighborhoodName': 'سوهانک', 'Areaid': 1}, 159: {'id': 159, 'NeighborhoodName': 'سعادت آباد', 'Areaid': 2}, 160: {'id': 160, 'NeighborhoodName': 'دارآباد', 'Areaid': 1}, 161: {'id': 161, 'NeighborhoodName': 'اندرزگو', 'Areaid': 1}, 162: {'id': 162, 'NeighborhoodName': 'عباس آباد', 'Areaid': 7}, 163: {'id': 163, 'NeighborhoodName': 'جمشیدیه', 'Areaid': 1}, 164: {'id': 164, 'NeighborhoodName': 'ابوذر جنوبی', 'Areaid': 14}, 166: {'id': 166, 'NeighborhoodName': 'گلاب دره', 'Areaid': 1}, 169: {'id': 169, 'NeighborhoodName': 'پرستار', 'Areaid': 14}, 170: {'id': 170, 'NeighborhoodName': 'خاک سفید', 'Areaid': 4}, 171: {'id': 171, 'NeighborhoodName': 'دهم فروردین', 'Areaid': 14}, 172: {'id': 172, 'NeighborhoodName': 'محلاتی', 'Areaid': 14}, 173: {'id': 173, 'NeighborhoodName': 'بلوار ابوذر', 'Areaid': 14}, 174: {'id': 174, 'NeighborhoodName': 'مجید آباد', 'Areaid': 4}, 175: {'id': 175, 'NeighborhoodName': 'جیحون', 'Areaid': 4}, 176: {'id': 176, 'NeighborhoodName': 'ارتش', 'Areaid': 1}, 177: {'id': 177, 'NeighborhoodName': 'آرژانتین', 'Areaid': 7}, 178: {'id': 178, 'NeighborhoodName': 'دزاشیب', 'Areaid': 1}, 179: {'id': 179, 'NeighborhoodName': 'مسعودیه', 'Areaid': 15}}
-transaction_ch = {1: {'id': 1, 'name': 'فروش'}, 2: {'id': 2, 'name': 'رهن و اجاره'}, 3: {'id': 3, 'name': 'رهن'}, 4: {'id': 4, 'name': 'مشارکت'}, 5: {'id': 5, 'name': 'معاوضه'}}
-property_type_ch = {1: {'id': 1, 'name': 'آپارتمان'}, 2: {'id': 2, 'name': 'ویلا'}, 3: {'id': 3, 'name': 'کلنگی'}, 4: {'id': 4, 'name': 'دفتر کار'}, 5: {'id': 5, 'name': 'سوئیت'}, 6: {'id': 6, 'name': 'مغازه'}, 7: {'id': 7, 'name': 'مستغلات'}}
-# floor_number_ch = {108: {'id': 108, 'FloorName': 'درکل', 'Valnumber': 102}, 107: {'id': 107, 'FloorName': 'مختلف', 'Valnumber': 101}, 1: {'id': 1, 'FloorName': 'زیرزمین', 'Valnumber': -2}, 2: {'id': 2, 'FloorName': 'همکف', 'Valnumber': 0}, 3: {'id': 3, 'FloorName': 'زیرهمکف', 'Valnumber': -1}, 4: {'id': 4, 'FloorName': 'طبقه1', 'Valnumber': 1}, 5: {'id': 5, 'FloorName': 'طبقه2', 'Valnumber': 2}, 7: {'id': 7, 'FloorName': 'طبقه3', 'Valnumber': 3}, 8: {'id': 8, 'FloorName': 'طبقه4', 'Valnumber': 4}, 9: {'id': 9, 'FloorName': 'طبقه5', 'Valnumber': 5}, 10: {'id': 10, 'FloorName': 'طبقه6', 'Valnumber': 6}, 11: {'id': 11, 'FloorName': 'طبقه7', 'Valnumber': 7}, 12: {'id': 12, 'FloorName': 'طبقه8', 'Valnumber': 8}, 13: {'id': 13, 'FloorName': 'طبقه9', 'Valnumber': 9}, 14: {'id': 14, 'FloorName': 'طبقه10', 'Valnumber': 10}, 15: {'id': 15, 'FloorName': 'طبقه11', 'Valnumber': 11}, 16: {'id': 16, 'FloorName': 'طبقه12', 'Valnumber': 12}, 17: {'id': 17, 'FloorName': 'طبقه13', 'Valnumber': 13}, 18: {'id': 18, 'FloorName': 'طبقه14', 'Valnumber': 14}, 19: {'id': 19, 'FloorName': 'طبقه15', 'Valnumber': 15}, 20: {'id': 20, 'FloorName': 'طبقه16', 'Valnumber': 16}, 21: {'id': 21, 'FloorName': 'طبقه17', 'Valnumber': 17}, 22: {'id': 22, 'FloorName': 'طبقه18', 'Valnumber': 18}, 23: {'id': 23, 'FloorName': 'طبقه19', 'Valnumber': 19}, 24: {'id': 24, 'FloorName': 'طبقه20', 'Valnumber': 20}, 25: {'id': 25, 'FloorName': 'طبقه21', 'Valnumber': 21}, 26: {'id': 26, 'FloorName': 'طبقه22', 'Valnumber': 22}, 27: {'id': 27, 'FloorName': 'طبقه23', 'Valnumber': 23}, 28: {'id': 28, 'FloorName': 'طبقه24', 'Valnumber': 24}, 29: {'id': 29, 'FloorName': 'طبقه25', 'Valnumber': 25}, 30: {'id': 30, 'FloorName': 'طبقه26', 'Valnumber': 26}, 31: {'id': 31, 'FloorName': 'طبقه27', 'Valnumber': 27}, 32: {'id': 32, 'FloorName': 'طبقه28', 'Valnumber': 28}, 33: {'id': 33, 'FloorName': 'طبقه29', 'Valnumber': 29}, 34: {'id': 34, 'FloorName': 'طبقه30', 'Valnumber': 30}, 35: {'id': 35, 'FloorName': 'طبقه31', 'Valnumber': 31}, 36: {'id': 36, 'FloorName': 'طبقه32', 'Valnumber': 32}, 37: {'id': 37, 'FloorName': 'طبقه33', 'Valnumber': 33}, 38: {'id': 38, 'FloorName': 'طبقه34', 'Valnumber': 34}, 39: {'id': 39, 'FloorName': 'طبقه35', 'Valnumber': 35}, 40: {'id': 40, 'FloorName': 'طبقه36', 'Valnumber': 36}, 41: {'id': 41, 'FloorName': 'طبقه37', 'Valnumber': 37}, 42: {'id': 42, 'FloorName': 'طبقه38', 'Valnumber': 38}, 43: {'id': 43, 'FloorName': 'طبقه39', 'Valnumber': 39}, 44: {'id': 44, 'FloorName': 'طبقه40', 'Valnumber': 40}, 45: {'id': 45, 'FloorName': 'طبقه41', 'Valnumber': 41}, 46: {'id': 46, 'FloorName': 'طبقه42', 'Valnumber': 42}, 47: {'id': 47, 'FloorName': 'طبقه43', 'Valnumber': 43}, 48: {'id': 48, 'FloorName': 'طبقه44', 'Valnumber': 44}, 49: {'id': 49, 'FloorName': 'طبقه45', 'Valnumber': 45}, 50: {'id': 50, 'FloorName': 'طبقه46', 'Valnumber': 46}, 51: {'id': 51, 'FloorName': 'طبقه47', 'Valnumber': 47}, 52: {'id': 52, 'FloorName': 'طبقه48', 'Valnumber': 48}, 53: {'id': 53, 'FloorName': 'طبقه49', 'Valnumber': 49}, 54: {'id': 54, 'FloorName': 'طبقه50', 'Valnumber': 50}, 55: {'id': 55, 'FloorName': 'طبقه51', 'Valnumber': 51}, 56: {'id': 56, 'FloorName': 'طبقه52', 'Valnumber': 52}, 57: {'id': 57, 'FloorName': 'طبقه53', 'Valnumber': 53}, 58: {'id': 58, 'FloorName': 'طبقه54', 'Valnumber': 54}, 59: {'id': 59, 'FloorName': 'طبقه55', 'Valnumber': 55}, 60: {'id': 60, 'FloorName': 'طبقه56', 'Valnumber': 56}, 61: {'id': 61, 'FloorName': 'طبقه57', 'Valnumber': 57}, 62: {'id': 62, 'FloorName': 'طبقه58', 'Valnumber': 58}, 63: {'id': 63, 'FloorName': 'طبقه59', 'Valnumber': 59}, 64: {'id': 64, 'FloorName': 'طبقه60', 'Valnumber': 60}, 65: {'id': 65, 'FloorName': 'طبقه61', 'Valnumber': 61}, 66: {'id': 66, 'FloorName': 'طبقه62', 'Valnumber': 62}, 67: {'id': 67, 'FloorName': 'طبقه63', 'Valnumber': 63}, 68: {'id': 68, 'FloorName': 'طبقه64', 'Valnumber': 64}, 69: {'id': 69, 'FloorName': 'طبقه65', 'Valnumber': 65}, 70: {'id': 70, 'FloorName': 'طبقه66', 'Valnumber': 66}, 71: {'id': 71, 'FloorName': 'طبقه67', 'Valnumber': 67}, 72: {'id': 72, 'FloorName': 'طبقه68', 'Valnumber': 68}, 73: {'id': 73, 'FloorName': 'طبقه69', 'Valnumber': 69}, 74: {'id': 74, 'FloorName': 'طبقه70', 'Valnumber': 70}, 75: {'id': 75, 'FloorName': 'طبقه71', 'Valnumber': 71}, 76: {'id': 76, 'FloorName': 'طبقه72', 'Valnumber': 72}, 77: {'id': 77, 'FloorName': 'طبقه73', 'Valnumber': 73}, 78: {'id': 78, 'FloorName': 'طبقه74', 'Valnumber': 74}, 79: {'id': 79, 'FloorName': 'طبقه75', 'Valnumber': 75}, 80: {'id': 80, 'FloorName': 'طبقه76', 'Valnumber': 76}, 81: {'id': 81, 'FloorName': 'طبقه77', 'Valnumber': 77}, 82: {'id': 82, 'FloorName': 'طبقه78', 'Valnumber': 78}, 83: {'id': 83, 'FloorName': 'طبقه79', 'Valnumber': 79}, 84: {'id': 84, 'FloorName': 'طبقه80', 'Valnumber': 80}, 85: {'id': 85, 'FloorName': 'طبقه81', 'Valnumber': 81}, 86: {'id': 86, 'FloorName': 'طبقه82', 'Valnumber': 82}, 87: {'id': 87, 'FloorName': 'طبقه83', 'Valnumber': 83}, 88: {'id': 88, 'FloorName': 'طبقه84', 'Valnumber': 84}, 89: {'id': 89, 'FloorName': 'طبقه85', 'Valnumber': 85}, 90: {'id': 90, 'FloorName': 'طبقه86', 'Valnumber': 86}, 91: {'id': 91, 'FloorName': 'طبقه87', 'Valnumber': 87}, 92: {'id': 92, 'FloorName': 'طبقه88', 'Valnumber': 88}, 93: {'id': 93, 'FloorName': 'طبقه89', 'Valnumber': 89}, 94: {'id': 94, 'FloorName': 'طبقه90', 'Valnumber': 90}, 95: {'id': 95, 'FloorName': 'طبقه91', 'Valnumber': 91}, 96: {'id': 96, 'FloorName': 'طبقه92', 'Valnumber': 92}, 97: {'id': 97, 'FloorName': 'طبقه93', 'Valnumber': 93}, 98: {'id': 98, 'FloorName': 'طبقه94', 'Valnumber': 94}, 99: {'id': 99, 'FloorName': 'طبقه95', 'Valnumber': 95}, 100: {'id': 100, 'FloorName': 'طبقه96', 'Valnumber': 96}, 101: {'id': 101, 'FloorName': 'طبقه97', 'Valnumber': 97}, 102: {'id': 102, 'FloorName': 'طبقه98', 'Valnumber': 98}, 103: {'id': 103, 'FloorName': 'طبقه99', 'Valnumber': 99}, 104: {'id': 104, 'FloorName': 'طبقه100', 'Valnumber': 100}}
-sleep_numbers_ch = {0: {'id': 0, 'Numberofsleeps': 'ندارد'}, 1: {'id': 1, 'Numberofsleeps': 'یک خواب'}, 2: {'id': 2, 'Numberofsleeps': 'دو خواب'}, 3: {'id': 3, 'Numberofsleeps': 'سه خواب'}, 4: {'id': 4, 'Numberofsleeps': 'چهار خواب'}, 5: {'id': 5, 'Numberofsleeps': 'پنج خواب'}, 6: {'id': 6, 'Numberofsleeps': 'شش خواب'}, 7: {'id': 7, 'Numberofsleeps': 'هفت خواب'}, 8: {'id': 8, 'Numberofsleeps': 'هشت خواب'}, 9: {'id': 9, 'Numberofsleeps': 'نه خواب'}, 10: {'id': 10, 'Numberofsleeps': 'ده خواب'}}
-kitchen_ch = {16: {'id': 16, 'name': 'MDF'}, 17: {'id': 17, 'name': 'فرنیش'}, 18: {'id': 18, 'name': 'فلزی'}, 19: {'id': 19, 'name': 'های گلاس'}, 20: {'id': 20, 'name': 'فورمات'}, 21: {'id': 21, 'name': 'چوبی فلزی'}, 22: {'id': 22, 'name': 'فلزطرح چوب'}, 23: {'id': 23, 'name': 'چوبی'}, 24: {'id': 24, 'name': 'چوبی خارجی'}, 25: {'id': 25, 'name': 'گازر'}, 26: {'id': 26, 'name': 'نف آلمان'}, 27: {'id': 27, 'name': 'مبله'}, 28: {'id': 28, 'name': 'نیمه مبله'}, 29: {'id': 29, 'name': 'فایبرگلاس'}, 30: {'id': 30, 'name': 'آبدارخانه'}, 31: {'id': 31, 'name': 'مشترک'}, 32: {'id': 32, 'name': 'دلخواه'}, 33: {'id': 33, 'name': 'ماج نما'}, 34: {'id': 34, 'name': 'HDF'}, 35: {'id': 35, 'name': 'PVC'}, 36: {'id': 36, 'name': 'پلی استر'}, 37: {'id': 37, 'name': 'گالوانیزه'}, 38: {'id': 38, 'name': 'ممبران'}, 39: {'id': 39, 'name': 'جزیره ای'}, 40: {'id': 40, 'name': 'ندارد'}, 41: {'id': 41, 'name': 'نامشخص'}}
-telephone_line_ch = {1: {'id': 1, 'Linestatus': 'ندارد'}, 2: {'id': 2, 'Linestatus': '1 خط'}, 3: {'id': 3, 'Linestatus': '2 خط'}, 4: {'id': 4, 'Linestatus': '3 خط'}, 5: {'id': 5, 'Linestatus': 'سانترال'}}
-wc_ch = {1: {'id': 1, 'name': 'ایرانی'}, 2: {'id': 2, 'name': 'ایرانی و فرنگی'}, 3: {'id': 3, 'name': 'در حیاط'}, 4: {'id': 4, 'name': 'فرنگی'}, 5: {'id': 5, 'name': 'مشترک'}, 6: {'id': 6, 'name': 'ندارد'}}
-floor_type_ch = {1: {'id': 1, 'name': 'سرامیک'}, 2: {'id': 2, 'name': 'موزایک'}, 3: {'id': 3, 'name': 'پارکت'}, 4: {'id': 4, 'name': 'سنگ'}, 5: {'id': 5, 'name': 'سیمان'}, 6: {'id': 6, 'name': 'کف پوش'}, 7: {'id': 7, 'name': 'گرانیت'}, 8: {'id': 8, 'name': 'لمینت'}, 9: {'id': 9, 'name': 'متنوع'}, 10: {'id': 10, 'name': 'موکت'}, 11: {'id': 11, 'name': 'نا مشخص'}}
-view_type_ch = {1: {'id': 1, 'name': 'نا مشخص', 'Typeoffacade': 'نا مشخص'}, 3: {'id': 3, 'name': 'PVC', 'Typeoffacade': 'PVC'}, 4: {'id': 4, 'name': 'آجر', 'Typeoffacade': 'آجر'}, 5: {'id': 5, 'name': 'آجر سه سانت', 'Typeoffacade': 'آجر سه سانت'}, 6: {'id': 6, 'name': 'آلومینیوم', 'Typeoffacade': 'آلومینیوم'}, 7: {'id': 7, 'name': 'آلومینیوم شیشه', 'Typeoffacade': 'آلومینیوم شیشه'}, 8: {'id': 8, 'name': 'اسپانیش', 'Typeoffacade': 'اسپانیش'}, 9: {'id': 9, 'name': 'انگلیسی', 'Typeoffacade': 'انگلیسی'}, 10: {'id': 10, 'name': 'بتنی', 'Typeoffacade': 'بتنی'}, 11: {'id': 11, 'name': 'تراورتن', 'Typeoffacade': 'تراورتن'}, 12: {'id': 12, 'name': 'رفلکس', 'Typeoffacade': 'رفلکس'}, 13: {'id': 13, 'name': 'رومی', 'Typeoffacade': 'رومی'}, 14: {'id': 14, 'name': 'رومی شیشه', 'Typeoffacade': 'رومی شیشه'}, 15: {'id': 15, 'name': 'سرامیک', 'Typeoffacade': 'سرامیک'}, 16: {'id': 16, 'name': 'سرامیک و شیشه', 'Typeoffacade': 'سرامیک و شیشه'}, 17: {'id': 17, 'name': 'سنگ', 'Typeoffacade': 'سنگ'}, 18: {'id': 18, 'name': 'سنگ رومی', 'Typeoffacade': 'سنگ رومی'}, 19: {'id': 19, 'name': 'سنگ سیمان', 'Typeoffacade': 'سنگ سیمان'}, 20: {'id': 20, 'name': 'سنگ و شیشه', 'Typeoffacade': 'سنگ و شیشه'}, 21: {'id': 21, 'name': 'شیشه', 'Typeoffacade': 'شیشه'}, 22: {'id': 22, 'name': 'گرانیت', 'Typeoffacade': 'گرانیت'}, 23: {'id': 23, 'name': 'گرانیت شیشه', 'Typeoffacade': 'گرانیت شیشه'}, 24: {'id': 24, 'name': 'کلاسیک', 'Typeoffacade': 'کلاسیک'}, 25: {'id': 25, 'name': 'کنیتکس', 'Typeoffacade': 'کنیتکس'}, 26: {'id': 26, 'name': 'کامپوزیت', 'Typeoffacade': 'کامپوزیت'}, 27: {'id': 27, 'name': 'کنیتکس رومی', 'Typeoffacade': 'کنیتکس رومی'}, 28: {'id': 28, 'name': 'سیمان', 'Typeoffacade': 'سیمان'}, 29: {'id': 29, 'name': 'ترکیبی', 'Typeoffacade': 'ترکیبی'}, 33: {'id': 33, 'name': 'کرکره برقی', 'Typeoffacade': 'کرکره برقی'}, 34: {'id': 34, 'name': 'چوبی', 'Typeoffacade': 'چوبی'}}
-document_type_ch = {1: {'id': 1, 'name': 'نامشخص'}, 2: {'id': 2, 'name': 'اوقافی'}, 3: {'id': 3, 'name': 'بنیادی'}, 4: {'id': 4, 'name': 'تعاونی'}, 5: {'id': 5, 'name': 'زمین شهری'}, 6: {'id': 6, 'name': 'شخصی'}, 7: {'id': 7, 'name': 'فرمان امام'}, 8: {'id': 8, 'name': 'اداری'}, 9: {'id': 9, 'name': 'مسکونی'}, 10: {'id': 10, 'name': 'تجاری'}, 12: {'id': 12, 'name': 'قولنامه ای'}, 13: {'id': 13, 'name': 'سند مادر'}, 16: {'id': 16, 'name': 'توسعه لویزان'}, 17: {'id': 17, 'name': 'تک برگ'}, 18: {'id': 18, 'name': 'منگوله\u200cدار'}, 19: {'id': 19, 'name': 'سایر'}}
-job_ch = {5: {'id': 5, 'name': 'مشاور'}, 6: {'id': 6, 'name': 'منشی'}, 7: {'id': 7, 'name': 'مدیر'}, 8: {'id': 8, 'name': 'آبدارچی'}}
-# building_age_ch = {1: {'id': 1, 'name': 'نوساز  تا 5 سال', 'minimum': 0, 'maximum': 5}, 2: {'id': 2, 'name': '5 تا 10 سال', 'minimum': 5, 'maximum': 10}, 3: {'id': 3, 'name': '10 تا 15 سال', 'minimum': 10, 'maximum': 15}, 4: {'id': 4, 'name': '15 تا 20 سال', 'minimum': 15, 'maximum': 20}, 5: {'id': 5, 'name': '20 تا 30 سال', 'minimum': 20, 'maximum': 30}, 6: {'id': 6, 'name': ' بالای 30 سال', 'minimum': 30, 'maximum': 120}}
-features_ch = {1: {'id': 1, 'name': 'elevator', 'persianname': 'آسانسور', 'type': 2}, 2: {'id': 2, 'name': 'open', 'persianname': 'open', 'type': 1}, 3: {'id': 3, 'name': 'parking', 'persianname': 'پارکینگ', 'type': 2}, 4: {'id': 4, 'name': 'warehouse', 'persianname': 'انباری', 'type': 2}, 5: {'id': 5, 'name': 'cooler', 'persianname': 'کولر', 'type': 3}, 6: {'id': 6, 'name': 'gas', 'persianname': 'گاز', 'type': 3}, 7: {'id': 7, 'name': 'radiator', 'persianname': 'شوفاژ', 'type': 3}, 8: {'id': 8, 'name': 'package', 'persianname': 'پکیج', 'type': 3}, 9: {'id': 9, 'name': 'ductsplit', 'persianname': 'داکت اسپلیت', 'type': 3}, 10: {'id': 10, 'name': 'gascooler', 'persianname': 'کولر گازی', 'type': 3}, 11: {'id': 11, 'name': 'chiller', 'persianname': 'چیلر', 'type': 3}, 12: {'id': 12, 'name': 'balcony', 'persianname': 'بالکن', 'type': 2}, 13: {'id': 13, 'name': 'iphonevideo', 'persianname': 'آیفون تصویری', 'type': 1}, 14: {'id': 14, 'name': 'remotedoor', 'persianname': 'درب ریموت', 'type': 1}, 15: {'id': 15, 'name': 'patio', 'persianname': 'پاسیو', 'type': 1}, 16: {'id': 16, 'name': 'fancoil', 'persianname': 'فن کوئل', 'type': 3}, 17: {'id': 17, 'name': 'quicksale', 'persianname': 'فروش فوری', 'type': 1}, 18: {'id': 18, 'name': 'backyard', 'persianname': 'حیاط خلوت', 'type': 1}, 19: {'id': 19, 'name': 'yard', 'persianname': 'حیاط', 'type': 1}, 20: {'id': 20, 'name': 'underground', 'persianname': 'زیرزمین', 'type': 1}, 21: {'id': 21, 'name': 'flat', 'persianname': 'فلت', 'type': 1}, 22: {'id': 22, 'name': 'heatfromthefloor', 'persianname': 'حرارت از کف', 'type': 3}, 23: {'id': 23, 'name': 'fireplace', 'persianname': 'شومینه', 'type': 1}, 24: {'id': 24, 'name': 'mrroman', 'persianname': 'مسترروم', 'type': 1}, 25: {'id': 25, 'name': 'swimmingpool', 'persianname': 'استخر', 'type': 2}, 26: {'id': 26, 'name': 'sauna', 'persianname': 'سونا', 'type': 2}, 27: {'id': 27, 'name': 'jacuzzi', 'persianname': 'جکوزی', 'type': 2}, 28: {'id': 28, 'name': 'residential', 'persianname': 'مسکونی', 'type': 1}, 29: {'id': 29, 'name': 'Discharge', 'persianname': 'تخلیه', 'type': 1}, 30: {'id': 30, 'name': 'rent', 'persianname': 'اجاره', 'type': 1}, 31: {'id': 31, 'name': 'reconstructed', 'persianname': 'بازسازی شده', 'type': 1}, 32: {'id': 32, 'name': 'rightofbusiness', 'persianname': 'سرقفلی', 'type': 1}, 33: {'id': 33, 'name': 'property', 'persianname': 'ملکیت', 'type': 1}, 34: {'id': 34, 'name': 'roofgarden', 'persianname': 'روف گاردن', 'type': 1}, 35: {'id': 35, 'name': 'convertable', 'persianname': 'قابل تبدیل', 'type': 1}, 36: {'id': 36, 'name': 'unlocked', 'persianname': 'کلید نخورده', 'type': 1}, 37: {'id': 37, 'name': 'desktopgas', 'persianname': 'گاز رومیزی', 'type': 1}, 38: {'id': 38, 'name': 'habitable', 'persianname': 'قابل سکونت', 'type': 1}, 39: {'id': 39, 'name': 'barbecue', 'persianname': 'باربیکیو', 'type': 1}, 40: {'id': 40, 'name': 'air conditioner', 'persianname': 'هواساز', 'type': 1}, 41: {'id': 41, 'name': 'furnished', 'persianname': 'مبله', 'type': 1}, 42: {'id': 42, 'name': 'salone', 'persianname': 'سالن اجتماعات', 'type': 1}, 43: {'id': 43, 'name': 'gym hall', 'persianname': 'سالن جیم', 'type': 1}, 44: {'id': 44, 'name': 'fire extinguishing', 'persianname': 'اطفا حریق', 'type': 1}, 45: {'id': 45, 'name': 'CCTV', 'persianname': 'دوربین مدار بسته', 'type': 1}, 46: {'id': 46, 'name': 'lobby', 'persianname': 'لابی', 'type': 1}, 47: {'id': 47, 'name': 'the janitor', 'persianname': 'سرایدار', 'type': 1}, 48: {'id': 48, 'name': 'Central vacuum cleaner', 'persianname': 'جاروبرقی مرکزی', 'type': 1}}
 # don't use this for representation like: PostMongoSerializer(DictToObject(post_col)).data
 # in updating must be like: PostMongoSerializer(pk=1, data=data, partial=True, request=request)
 # in creation: PostMongoSerializer(data=data, prequest=request)
@@ -401,6 +430,10 @@ class FileMongoSerializer(MongoSerializer):
     metraj = serializers.CharField(max_length=50, required=False)
     total_price = DecimalFile(max_length=50, default='0')  # price in first can contain strings like 'toman...'
     price_per_meter = DecimalFile(max_length=50, default='0')
+    # numeric copy of metraj, total_price and price_per_meter (fills in to_internal_value), used in FileSearch filters
+    metraj_num = serializers.IntegerField(read_only=True)
+    total_price_num = serializers.IntegerField(read_only=True)
+    price_per_meter_num = serializers.IntegerField(read_only=True)
     age = serializers.CharField(required=False)  # in divar crawling all data is string (and raise error in to_internal)
     floor_number = serializers.CharField(required=False, allow_null=True)  # could be None (vilaii) or long string
     specs = serializers.JSONField(required=False)    # additional information like: {'jahat': 'jonobi', ..}
@@ -408,22 +441,23 @@ class FileMongoSerializer(MongoSerializer):
     presentation_status = serializers.ChoiceField(choices=presents, default='1')
     visible = serializers.BooleanField(default=True)
 
-    neighborhoods = serializers.JSONField(required=False)   # receive id (integer or str), returns dict from 'field_ch'
-    transaction = serializers.JSONField(required=False)
-    property_type = serializers.JSONField(required=False)
-    sleep_numbers = serializers.JSONField(required=False)
-    kitchen = serializers.JSONField(required=False)
-    telephone_line = serializers.JSONField(required=False)
-    wc = serializers.JSONField(required=False)
-    floor_type = serializers.JSONField(required=False)
-    view_type = serializers.JSONField(required=False)
-    document_type = serializers.JSONField(required=False)
-    job = serializers.JSONField(required=False)
+    # receive id (like 5 or '۵'), name or dict, save item of the catalog (main/catalogs.py) like: {'id': 5, ..}
+    neighborhoods = CatalogField(catalogs['neighborhoods'], required=False)
+    transaction = CatalogField(catalogs['transaction'], required=False)
+    property_type = CatalogField(catalogs['property_type'], required=False)
+    sleep_numbers = CatalogField(catalogs['sleep_numbers'], required=False)
+    kitchen = CatalogField(catalogs['kitchen'], required=False)
+    telephone_line = CatalogField(catalogs['telephone_line'], required=False)
+    wc = CatalogField(catalogs['wc'], required=False)
+    floor_type = CatalogField(catalogs['floor_type'], required=False)
+    view_type = CatalogField(catalogs['view_type'], required=False)
+    document_type = CatalogField(catalogs['document_type'], required=False)
+    job = CatalogField(catalogs['job'], required=False)
     features = ListSerializer(required=False)       # like: ['آسانسور', 'پارکینگ', 'پکیج']
 
     icon = OneToMultipleImageMongo(sizes=['240', '420', '640', '720', '960', '1280', 'default'], upload_to='file_images/icons/', required=False)
     images = ImageSerializer(many=True, upload_to='file_images/', required=False)
-    comments = CommentSerializer(many=True, required=False)
+    comments_count = serializers.IntegerField(read_only=True)   # comments are in 'comment' collection (FileComments)
     author = UserNameSerializer(required=False)  # author can fill auto in to_internal_value, otherwise must input
     category = CategorySerializer(required=False, read_only=True)  # it's validated_data fill in 'to_internal_value'
 
@@ -439,6 +473,25 @@ class FileMongoSerializer(MongoSerializer):
     def context(self, value):      # default .context have no setter so should define manually
         self._context = value
 
+    @property
+    def pk(self):      # MongoUniqueValidator excludes current file in updating (like updating crawled files)
+        return self._id
+
+    def save(self, **kwargs):
+        saved = super().save(**kwargs)
+        queue_image_jobs(self.context, mongo_db.file)    # render other sizes of icon
+        return saved
+
+    def create(self, validated_data):
+        created = super().create(validated_data)
+        invalidate_files([])     # new file only changes lists (FileList and FileSearch responses)
+        return created
+
+    def update(self, _id=None, validated_data=None):   # called for every file in updating list of files too
+        updated = super().update(_id, validated_data)
+        invalidate_files([self.root_id] if self.root_id else None)
+        return updated
+
     def to_internal_value(self, data):
         if isinstance(data, dict):
             if not data.get('slug') and data.get('title'):
@@ -452,15 +505,14 @@ class FileMongoSerializer(MongoSerializer):
         request, change = self.context.get('request'), self.context.get('change', False)
         if not change:
             internal_value['file_id'] = uuid.uuid4().hex[:6]       # generate 7 digit character
+        for field_name in ['metraj', 'total_price', 'price_per_meter']:   # numbers are validated in validate_<field>
+            if internal_value.get(field_name) is not None:
+                internal_value[f'{field_name}_num'] = int(internal_value[field_name])
 
         if data.get('category'):
-            level = Category.objects.filter(id=data['category']).values_list('level', flat=True)[0]
-            related = 'father_category'
-            # '__father_category' * -1 == '', prefetch_related('child_categories') don't need because of single category
-            i = Category._meta.get_field('level').validators[1].limit_value-1-level  # raise error when use directly!
-            related += '__father_category' * i
-            cat = Category.objects.filter(id=data['category']).select_related(related)[0]
-            internal_value['category'] = cat
+            internal_value['category'] = get_category_tree().get(data['category'])    # category and its fathers without query
+            if not internal_value['category']:
+                raise ValidationError({'category': 'category not found'})
         if not change:
             # if provide author id in request.data, 'internal_value' contain user.
             if not internal_value.get('author') and request and request.user.is_authenticated:
@@ -472,30 +524,30 @@ class FileMongoSerializer(MongoSerializer):
 
     # 'def validate' not run sometimes because of partial=True
     def validate_metraj(self, value):
-        if value.isdigit():    # even for persian numbers .isdigit  works
-            return str(int(value))     # convert to en
-        else:
-            raise ValidationError(f"'metraj' has not valid type: ({value})")
+        try:
+            if value.isdigit():    # even for persian numbers .isdigit  works ('-5' or '1_000' are not valid)
+                return str(get_int64(value))     # convert to en, out of int64 numbers can't be saved in metraj_num
+        except ValueError:        # like '²' (isdigit but not int) or out of int64
+            pass
+        raise ValidationError(f"'metraj' has not valid type: ({value})")
 
     def validate_total_price(self, value):
-        if value.isdigit():    # even for persian numbers .isdigit and Decimal() works
-            return Decimal(value)
-        else:
-            try:
-                pr_price = value.replace('تومان', '').replace('٬', '').replace(' ', '')
-                return Decimal(pr_price)
-            except:
-                raise ValidationError(f"'total_price' has not valid value: ({value})")
+        return self.get_price(value, 'total_price')
 
     def validate_price_per_meter(self, value):
-        if value.isdigit():
-            return Decimal(value)
+        return self.get_price(value, 'price_per_meter')
+
+    def get_price(self, value, field_name):    # value like '۱۲۰۰۰۰۰۰' or '12٬000٬000 تومان'
+        if value.isdigit():    # even for persian numbers .isdigit and Decimal() works
+            pr_price = value
         else:
-            try:
-                pr_price = value.replace('تومان', '').replace('٬', '').replace(' ', '')
-                return Decimal(pr_price)
-            except:
-                raise ValidationError(f"'price_per_meter' has not valid value: ({value})")
+            pr_price = value.replace('تومان', '').replace('٬', '').replace(' ', '')
+        try:     # NaN, Infinity and numbers out of int64 are not valid (<field_name>_num is int64)
+            price = Decimal(pr_price)
+            get_int64(price)
+            return price
+        except (ArithmeticError, ValueError):
+            raise ValidationError(f"'{field_name}' has not valid value: ({value})")
 
     def validate_age(self, value):
         try:
@@ -518,80 +570,71 @@ class FileMongoSerializer(MongoSerializer):
             except:
                 raise ValidationError(f"'floor_number' has not valid value: ({value})")
 
-    def validate_neighborhoods(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return neighborhoods_ch.get(value)
-        else:
-            return value           # value was sent from external api (like divar)
-
-    def validate_transaction(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return transaction_ch.get(value)
-        else:
-            return value
-
-    def validate_property_type(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return property_type_ch.get(int(value))
-        else:
-            return value
-
-    def validate_sleep_numbers(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return sleep_numbers_ch.get(int(value))
-        else:
-            return value
-
-    def validate_kitchen(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return kitchen_ch.get(int(value))
-        else:
-            return value
-
-    def validate_telephone_line(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return telephone_line_ch.get(int(value))
-        else:
-            return value
-
-    def validate_wc(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return wc_ch.get(int(value))
-        else:
-            return value
-
-    def validate_floor_type(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return floor_type_ch.get(int(value))
-        else:
-            return value
-
-    def validate_view_type(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return view_type_ch.get(int(value))
-        else:
-            return value
-
-    def validate_document_type(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return document_type_ch.get(int(value))
-        else:
-            return value
+    def validate_features(self, value):    # receive list of features, like: ['پارکینگ', 'asansor', 3]
+        if not isinstance(value, list):
+            raise ValidationError("provide list of features like: ['پارکینگ', 'آسانسور',..]")
+        # names are saved like catalog (persianname), unknown features (like from crawled sites) saved raw
+        features = []
+        for feature in value:
+            item = catalogs['features'].resolve(feature)
+            if item is None and catalogs['features'].get_id(feature) is not None:
+                raise ValidationError(f'feature {feature} not found')
+            features.append(item['persianname'] if item else feature)
+        return features
+
+
+class FileListSerializer(serializers.Serializer):
+    # slim file for list pages (like PostListSerializer for posts). data is raw mongo document (dict) loaded with
+    # 'get_projection' so heavy fields (images, comments, specs, description...) never load from db
+    _id = IdMongoField(required=False)
+    title = serializers.CharField(max_length=255)
+    slug = serializers.SlugField(allow_unicode=True, required=False)
+    published_date = TimestampField(jalali=True, required=False)
+    metraj = serializers.CharField(required=False)
+    total_price = DecimalFile(required=False)
+    price_per_meter = DecimalFile(required=False)
+    age = serializers.CharField(required=False)
+    floor_number = serializers.CharField(required=False)
+    neighborhoods = serializers.JSONField(required=False)
+    property_type = serializers.JSONField(required=False)
+    url = serializers.SerializerMethodField()
+    icon = serializers.SerializerMethodField()  # only one size of icon (settings.FILE_LIST_ICON_SIZE)
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # fields is like: ['title', 'total_price'] to return only these fields
+        super().__init__(*args, **kwargs)
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_projection(cls, fields=None):
+        # returns mongo projection of 'fields' (or all fields of the serializer), raise ValueError for unknown fields
+        fields = fields or list(cls._declared_fields)
+        unknowns = [field for field in fields if field not in cls._declared_fields]
+        if unknowns:
+            raise ValueError(f"unknown fields: {', '.join(unknowns)}")
+        # published_date and _id always required (for FileList cursor)
+        projection = {'_id': 1, 'published_date': 1}
+        for field in fields:
+            if field == 'icon':    # size could be saved as int or str
+                size = settings.FILE_LIST_ICON_SIZE
+                projection['icon'] = {'$elemMatch': {'size': {'$in': [size, int(size) if size.isdigit() else size]}}}
+            elif field != 'url':
+                projection[field] = 1
+        return projection
+
+    @classmethod
+    def get_version_projection(cls):   # fields change list responses, for ETag of FileList (main/methods.py get_etag)
+        return {**cls.get_projection(['icon']), 'updated': 1}
 
-    def validate_job(self, value):    # receive id and returns dict data
-        if isinstance(value, int):
-            return job_ch.get(int(value))
-        else:
-            return value
+    def get_url(self, obj):
+        return urllib.parse.unquote(reverse('main:file-detail', args=[str(obj['_id'])]))
 
-    def validate_features(self, value):    # receive list of features
-        if isinstance(value, list):
-            # value is list of features like: ['parking', 'asansor\u200c',..], came from crawler or API.
-            if isinstance(value[0], int) or value[0].isdigit():
-                raise "provide list of features like: ['parking', 'asansor',..]"
-            return value
-        else:
-            raise "provide list of features"
+    def get_icon(self, obj):
+        if obj.get('icon'):
+            icon = obj['icon'][0]
+            return {'image': icon.get('image'), 'alt': icon.get('alt', '')}
 
 
 class Bserializer(serializers.Serializer):
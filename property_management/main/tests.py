@@ -1,3 +1,917 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.db import connection
+from django.core.management import call_command, CommandError
+from django.db.migrations.executor import MigrationExecutor
+from django.core.exceptions import ValidationError as DjangoValidationError
 
-# Create your tests here.
+import io
+import os
+import csv
+import gzip
+import json
+import uuid
+import hashlib
+import datetime
+import jdatetime
+from decimal import Decimal
+import tempfile
+import itertools
+import pymongo
+import threading
+from bson.decimal128 import Decimal128
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from bson.objectid import ObjectId
+from PIL import Image as PilImage
+from unittest import skipUnless, mock
+try:
+    import mongomock     # in memory mongo for tests of mongo methods without server, tests are skipped without it
+except ImportError:
+    mongomock = None
+
+from .mongo import get_mongo_db
+from .methods import ensure_file_indexes, get_file_search_query, get_bson_data, get_etag, get_conditional_response, file_version_projection
+from .methods import comment_save_to_mongo, get_comments_page, move_embedded_comments
+from .methods import encode_file_cursor, decode_file_cursor, get_file_cursor_query, backfill_file_numbers, import_categories
+from .models import Category
+from .serializers import FileMongoSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework import serializers
+from customed_files.rest_framework.classes.validators import MongoUniqueValidator
+from .cache import LRUCache, ResponseCache
+from .export import iter_export
+from .catalogs import catalogs, normalize_name
+from .management.commands.import_files import validate_chunk
+from .management.commands.benchmark_bson import get_file_payload
+from .images import store_image, VariantCache
+from .crawl import FileHtmlCrawl, download_images, crawl_worker, crawl_files
+import queue
+from selenium.common.exceptions import TimeoutException
+from .views import FileList, FileSearch
+from rest_framework.test import force_authenticate
+from users.models import User
+
+
+def get_stages(plan):  # all stages of a mongo explain() plan like: ['FETCH', 'IXSCAN']
+    stages = [plan['stage']]
+    for child in plan.get('inputStages', []) + ([plan['inputStage']] if plan.get('inputStage') else []):
+        stages += get_stages(child)
+    return stages
+
+
+class FileSearchIndexTest(SimpleTestCase):
+    params = {'neighborhood': '5', 'property_type': '1', 'transaction': '1', 'rooms': '2', 'min_price': '1000',
+              'max_price': '9000', 'min_metraj': '50', 'max_metraj': '150', 'min_price_per_meter': '10',
+              'features': 'پارکینگ,آسانسور'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.collection = get_mongo_db()['test_file_search']
+        ensure_file_indexes(cls.collection)
+        cls.collection.insert_many([{
+            '_id': ObjectId(), 'published_date': 1700000000 + i, 'neighborhoods': {'id': 5 + i % 3},
+            'property_type': {'id': 1 + i % 2}, 'transaction': {'id': 1}, 'sleep_numbers': {'id': i % 4},
+            'total_price_num': 1000 * i, 'metraj_num': 40 + i, 'price_per_meter_num': 10 * i,
+            'features': ['پارکینگ', 'آسانسور'][:i % 3]} for i in range(50)])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.collection.drop()
+        super().tearDownClass()
+
+    def test_no_collscan(self):  # every combination of filters (with FileList sorting) must use an index
+        for i in range(1, len(self.params) + 1):
+            for keys in itertools.combinations(self.params, i):
+                query = get_file_search_query({key: self.params[key] for key in keys})
+                plan = self.collection.find(query).sort([('published_date', -1), ('_id', -1)]).explain()
+                stages = get_stages(plan['queryPlanner']['winningPlan'])
+                self.assertNotIn('COLLSCAN', stages, f'filters: {keys}')
+
+    def test_query(self):
+        query = get_file_search_query({'neighborhood': '5', 'min_price': '10', 'max_price': '20', 'features': 'parking,آسانسور'})
+        self.assertEqual(query, {'neighborhoods.id': 5, 'total_price_num': {'$gte': 10, '$lte': 20},
+                                 'features': {'$all': ['پارکینگ', 'آسانسور']}})
+        with self.assertRaises(ValueError):
+            get_file_search_query({'min_metraj': 'abc'})
+
+
+file_page_html = """<html><body>
+<h1 class="kt-page-title__title kt-page-title__title--responsive-sized">آپارتمان ۱۰۰ متری</h1>
+<table><tr class="kt-group-row__data-row"><td>100</td><td>1395</td><td>2</td></tr>
+<tr class="kt-group-row__data-row"><td class="kt-group-row-item kt-group-row-item__value kt-body kt-body--stable">پارکینگ</td>
+<td class="kt-group-row-item kt-group-row-item__value kt-body kt-body--stable">آسانسور</td></tr></table>
+<div class="kt-base-row kt-base-row--large kt-unexpandable-row"><p class="kt-base-row__title">قیمت کل</p>
+<div class="kt-base-row__end kt-unexpandable-row__value-box"><p class="kt-unexpandable-row__value">5,000,000,000 تومان</p></div></div>
+<div class="kt-base-row kt-base-row--large kt-unexpandable-row"><p class="kt-base-row__title">قیمت هر متر</p>
+<div class="kt-base-row__end kt-unexpandable-row__value-box"><p class="kt-unexpandable-row__value">50,000,000 تومان</p></div></div>
+<div class="kt-base-row kt-base-row--large kt-unexpandable-row"><p class="kt-base-row__title">طبقه</p>
+<div class="kt-base-row__end kt-unexpandable-row__value-box"><p class="kt-unexpandable-row__value">3 از 5</p></div></div>
+<p class="kt-description-row__text kt-description-row__text--primary">نورگیر و <b>شیک</b> ★</p>
+<img class="kt-image-block__image" src="https://s100.divarcdn.com/a.webp"><img class="kt-image-block__image" src="https://s100.divarcdn.com/b.webp">
+<p class="kt-feature-row__title">کمد دیواری</p><p class="kt-feature-row__title">کولر</p>
+</body></html>"""
+
+
+class FileHtmlCrawlTest(SimpleTestCase):  # parsing a saved file page, without network and browser
+    def test_parse(self):
+        file = FileHtmlCrawl().parse(file_page_html)
+        self.assertEqual(file['title'], 'آپارتمان ۱۰۰ متری')
+        self.assertEqual((file['metraj'], file['age'], file['otagh']), ('100', '1395', '2'))
+        self.assertEqual((file['total_price'], file['price_per_meter'], file['floor_number']),
+                         ('5,000,000,000 تومان', '50,000,000 تومان', '3 از 5'))
+        self.assertEqual(file['general_features'], ['پارکینگ', 'آسانسور'])
+        self.assertEqual(file['description'], 'نورگیر و شیک ')
+        self.assertEqual(file['image_srcs'], {'https://s100.divarcdn.com/a.webp', 'https://s100.divarcdn.com/b.webp'})
+        self.assertEqual(file['specs'], {'قیمت کل': '5,000,000,000 تومان', 'قیمت هر متر': '50,000,000 تومان', 'طبقه': '3 از 5'})
+        self.assertEqual(file['features'], ['کمد دیواری', 'کولر'])
+        self.assertIsNone(file['phone'])
+
+
+class ImageHandler(BaseHTTPRequestHandler):  # local stand-in of image servers
+    images = {'/a.jpg': os.urandom(300 * 1024), '/b.jpg': os.urandom(1024)}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.path == '/flaky.jpg' and self.requests.count(self.path) < 3:    # fails 2 times, next succeeds
+            self.send_response(503)
+            self.end_headers()
+        elif self.path in self.images or self.path == '/flaky.jpg':
+            content = self.images.get(self.path, b'flaky')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CRAWL_RETRY_BACKOFF=0.01, CRAWL_DOWNLOAD_RETRIES=3)
+class DownloadImagesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), ImageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_download(self):
+        urls = [f'{self.url}/a.jpg', f'{self.url}/b.jpg', f'{self.url}/a.jpg', f'{self.url}/flaky.jpg', f'{self.url}/none.jpg']
+        with tempfile.TemporaryDirectory() as directory:
+            downloaded, errors = download_images(urls, directory, workers=4)
+            for name, content in ImageHandler.images.items():
+                path, image_hash = downloaded[f'{self.url}{name}']
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(), content)
+                self.assertEqual(image_hash, hashlib.blake2b(content, digest_size=20).hexdigest())
+            self.assertIn(f'{self.url}/flaky.jpg', downloaded)      # retried after 503
+            self.assertEqual(list(errors), [f'{self.url}/none.jpg'])    # 404 is not retried
+            self.assertEqual(ImageHandler.requests.count('/none.jpg'), 1)
+            self.assertEqual(ImageHandler.requests.count('/a.jpg'), 1)
+            self.assertEqual(len(os.listdir(directory)), 3)     # failed downloads removed
+
+
+class BsonDataTest(SimpleTestCase):
+    def test_types(self):
+        category = Category(id=3, name='phone', slug='phone', level=2, father_category_id=1, path='/1/3/')
+        data = get_bson_data({'price': Decimal('1.5'), 'date': jdatetime.date(1403, 1, 1), 'dates': (datetime.date(2024, 3, 20),),
+                              'category': category, 'tags': {'a'}, 'uuid': uuid.UUID(int=1)})
+        self.assertEqual(data['price'], Decimal128('1.5'))
+        self.assertEqual(data['date'], datetime.datetime(2024, 3, 20))
+        self.assertEqual(data['dates'], [datetime.datetime(2024, 3, 20)])
+        self.assertEqual(data['category']['father_category_id'], 1)
+        self.assertEqual(data['category']['path'], '/1/3/')
+        self.assertEqual(data['tags'], ['a'])
+        self.assertEqual(data['uuid'], str(uuid.UUID(int=1)))
+        self.assertIsInstance(get_bson_data(jdatetime.datetime.now()), datetime.datetime)
+
+    def test_file_payload(self):    # payload of benchmark_bson command, same structure with mongo types
+        payload = get_file_payload()
+        data = get_bson_data(payload)
+        self.assertEqual((data['total_price'], data['price_per_meter']), (Decimal128('5000000000'), Decimal128('50000000')))
+        self.assertEqual(data['published_date'], payload['published_date'])
+        self.assertEqual((data['icon'], data['images'], data['specs']), (payload['icon'], payload['images'], payload['specs']))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                           'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}})
+class ResponseCacheTest(SimpleTestCase):
+    def setUp(self):
+        # two caches with same name and shared tier, like caches of two processes
+        self.cache1 = ResponseCache('test', max_size=2, alias='shared', timeout=60)
+        self.cache2 = ResponseCache('test', max_size=2, alias='shared', timeout=60)
+        self.cache1.shared.clear()
+
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache.set('a', 1), cache.set('b', 2), cache.get('a'), cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_tiers(self):
+        self.assertEqual(self.cache1.get_or_set('1', lambda: {'title': 'a'}), {'title': 'a'})
+        self.assertEqual(self.cache1.get_or_set('1', lambda: {'title': 'b'}), {'title': 'a'})
+        self.assertEqual(self.cache2.get_or_set('1', lambda: {'title': 'b'}), {'title': 'a'})
+        self.assertEqual(self.cache1.get_stats()['local_hits'], 1)
+        self.assertEqual(self.cache2.get_stats()['shared_hits'], 1)
+        self.assertEqual(self.cache1.get_stats()['misses'], 1)
+
+    def test_invalidation(self):
+        self.cache1.get_or_set('1', lambda: 'a'), self.cache1.get_or_set('2', lambda: 'a')
+        self.cache2.get_or_set('1', lambda: 'b')
+        self.cache2.delete('1')      # like updating file 1 in second process
+        self.assertEqual(self.cache1.get_or_set('1', lambda: 'c'), 'c')
+        self.assertEqual(self.cache1.get_or_set('2', lambda: 'c'), 'a')     # refilled from shared tier
+        self.cache1.clear()
+        self.assertEqual(self.cache2.get_or_set('2', lambda: 'd'), 'd')
+
+    def test_stale(self):   # value computed while something changed is not cached
+        def compute():
+            self.cache2.delete('1')
+            return 'a'
+        self.assertEqual(self.cache1.get_or_set('1', compute), 'a')
+        self.assertEqual(self.cache1.get_or_set('1', lambda: 'b'), 'b')
+
+    def test_only_local(self):
+        cache = ResponseCache('test', max_size=2, alias='', timeout=60)
+        cache.get_or_set('1', lambda: 'a')
+        self.assertEqual(cache.get_or_set('1', lambda: 'b'), 'a')
+        cache.delete('1')
+        self.assertEqual(cache.get_or_set('1', lambda: 'b'), 'b')
+
+
+class ConditionalResponseTest(SimpleTestCase):
+    def setUp(self):
+        self.file = {'_id': ObjectId(), 'title': 'a', 'updated': 1727680000, 'comments_count': 2,
+                     'icon': [{'_id': ObjectId(), 'image': '/media/a.JPEG', 'size': 'default'}]}
+        self.loads = []       # 'data' for loading whole file, 'versions' for projection query
+
+    def get_response(self, cache, **headers):
+        def get_data():
+            self.loads.append('data')
+            return dict(self.file), [self.file]
+
+        def get_versions():
+            self.loads.append('versions')
+            version = {'_id': self.file['_id'], 'updated': self.file['updated'], 'comments_count': self.file['comments_count'],
+                       'icon': [{'size': icon['size']} for icon in self.file['icon']]}
+            return [version]
+        request = RequestFactory().get('/files/1/', **headers)
+        return get_conditional_response(request, cache, str(self.file['_id']), file_version_projection, get_data, get_versions)
+
+    def test_versions_etag(self):   # projected and whole document have same etag
+        version = {'_id': self.file['_id'], 'updated': 1727680000, 'comments_count': 2, 'icon': [{'size': 'default'}]}
+        self.assertEqual(get_etag([self.file], file_version_projection), get_etag([version], file_version_projection))
+        self.assertNotEqual(get_etag([self.file], file_version_projection), get_etag([{**version, 'comments_count': 3}], file_version_projection))
+
+    def test_not_modified(self):
+        response = self.get_response(ResponseCache('etag', alias=''))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], 'Mon, 30 Sep 2024 07:06:40 GMT')
+        etag = response['ETag']
+
+        # not cached file is checked by projection query
+        response = self.get_response(ResponseCache('etag', alias=''), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertEqual(self.loads, ['data', 'versions'])
+
+        cache = ResponseCache('etag', alias='')
+        self.get_response(cache)
+        self.loads.clear()
+        self.assertEqual(self.get_response(cache, HTTP_IF_NONE_MATCH=etag).status_code, 304)   # cached, no query
+        self.assertEqual(self.loads, [])
+
+        self.file['updated'] += 1
+        response = self.get_response(ResponseCache('etag', alias=''), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+    def test_one_lookup(self):    # missed entry is looked up once in every tier, then computed
+        cache = ResponseCache('etag', alias='')
+        with mock.patch.object(cache.local, 'get', wraps=cache.local.get) as get:
+            self.assertEqual(self.get_response(cache).status_code, 200)
+            self.assertEqual(get.call_count, 1)
+            self.assertEqual(self.get_response(cache).status_code, 200)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(self.loads, ['data'])
+        self.assertEqual(cache.get_stats()['misses'], 1)
+
+
+class FakeCursor(list):   # like pymongo cursor of find(..)
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def close(self):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents, self.projections = documents, []
+
+    def find(self, query, projection):
+        self.projections.append(projection)
+        return FakeCursor(self.documents)
+
+
+class ExportTest(SimpleTestCase):
+    def setUp(self):
+        self.files = [{'_id': ObjectId(), 'title': f'فایل {i}', 'total_price': Decimal128(str(i * 1000)),
+                       'neighborhoods': {'id': 5, 'name': 'آجودانیه'}, 'features': ['پارکینگ']} for i in range(3000)]
+
+    def test_ndjson(self):
+        content = b''.join(iter_export(FakeCollection(self.files)))
+        lines = content.decode().splitlines()
+        self.assertEqual(len(lines), 3000)
+        self.assertEqual(json.loads(lines[1])['title'], 'فایل 1')
+        self.assertEqual(json.loads(lines[1])['total_price'], '1000')
+
+    def test_csv_gzip(self):
+        collection = FakeCollection(self.files)
+        chunks = list(iter_export(collection, fields=['title', 'neighborhoods'], format='csv', compress=True))
+        self.assertGreater(len(chunks), 1)      # streamed, not one response
+        self.assertEqual(collection.projections, [{'_id': 1, 'title': 1, 'neighborhoods': 1}])
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b''.join(chunks)).decode())))
+        self.assertEqual(rows[0], ['title', 'neighborhoods'])
+        self.assertEqual(len(rows), 3001)
+        self.assertEqual(json.loads(rows[1][1])['name'], 'آجودانیه')
+
+
+class ImportFilesTest(SimpleTestCase):
+    def test_invalid_lines(self):    # invalid lines are reported by line number, without stopping the chunk
+        files, errors, image_jobs = validate_chunk([(3, '{"title": '), (4, '[1, 2]')])
+        self.assertEqual((files, image_jobs), ([], []))
+        self.assertEqual(sorted(errors), [3, 4])
+        self.assertEqual(errors[4], {'non_field_errors': ['line must be a json object']})
+
+
+class CatalogTest(SimpleTestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_name(' رهن\u200cو  اجاره '), 'رهن و اجاره')
+        self.assertEqual(normalize_name('آجودانيه ۱۲'), 'آجودانیه 12')
+
+    def test_resolve(self):
+        neighborhood = catalogs['neighborhoods'].get(5)
+        for value in [5, '5', '۵', 'آجودانيه', {'id': 5}, {'NeighborhoodName': 'آجودانیه'}]:
+            self.assertIs(catalogs['neighborhoods'].resolve(value), neighborhood)
+        self.assertIsNone(catalogs['neighborhoods'].resolve('unknown'))
+        self.assertEqual(catalogs['sleep_numbers'].resolve('۲')['id'], 2)
+
+    def test_field(self):
+        field = FileMongoSerializer().fields['transaction']
+        self.assertEqual(field.to_internal_value('رهن‌و اجاره')['id'], 2)
+        self.assertEqual(field.to_internal_value('اجاره روزانه خاص'), 'اجاره روزانه خاص')    # unknown names kept raw
+        with self.assertRaises(ValidationError):
+            field.to_internal_value(999)
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+@override_settings(COMMENT_BUCKET_SIZE=3)
+class CommentBucketTest(SimpleTestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.parent = ObjectId()
+        self.db.file.insert_one({'_id': self.parent})
+
+    def add(self, *contents):
+        comments = [{'_id': ObjectId(), 'content': content, 'published_date': int(content)} for content in contents]
+        comment_save_to_mongo(self.db.comment, self.db.file, added=[(self.parent, comment) for comment in comments])
+        return comments
+
+    def test_fill_and_rollover(self):
+        self.add('1', '2')
+        self.add('3', '4')      # fills first bucket, then creates second one
+        buckets = list(self.db.comment.find({'parent': self.parent}).sort('_id', 1))
+        self.assertEqual([bucket['count'] for bucket in buckets], [3, 1])
+        self.assertEqual([comment['content'] for comment in buckets[0]['comments']], ['1', '2', '3'])
+        self.assertEqual(buckets[1]['published_date'], 4)
+        self.assertEqual(self.db.file.find_one()['comments_count'], 4)
+
+    def test_edit(self):
+        comment = self.add('1', '2')[1]
+        comment_save_to_mongo(self.db.comment, self.db.file, edited=[(str(comment['_id']), {'content': 'edited'})])
+        self.assertEqual([comment['content'] for comment in self.db.comment.find_one()['comments']], ['1', 'edited'])
+        self.assertEqual(self.db.file.find_one()['comments_count'], 2)
+
+    def test_counts_per_parent(self):
+        other = self.db.file.insert_one({}).inserted_id
+        comment_save_to_mongo(self.db.comment, self.db.file, added=[(self.parent, {'_id': ObjectId()}),
+                                                                    (other, {'_id': ObjectId()}), (other, {'_id': ObjectId()})])
+        self.assertEqual({file['_id']: file['comments_count'] for file in self.db.file.find()}, {self.parent: 1, other: 2})
+
+    def test_pages(self):   # pages have same size even when newest bucket is partial
+        self.add(*[str(i) for i in range(1, 8)])       # buckets: [1, 2, 3], [4, 5, 6], [7]
+        pages = [[comment['content'] for comment in get_comments_page(self.db.comment, self.parent, page)] for page in [1, 2, 3, 4]]
+        self.assertEqual(pages, [['7', '6', '5'], ['4', '3', '2'], ['1'], []])
+
+    def test_move_embedded(self):
+        comments = [{'_id': ObjectId(), 'content': str(i), 'published_date': i} for i in range(5)]
+        self.db.file.update_one({'_id': self.parent}, {'$set': {'comments': comments}})
+        self.assertEqual(move_embedded_comments(self.db.comment, self.db.file), 5)
+        self.assertNotIn('comments', self.db.file.find_one())
+        self.assertEqual(self.db.file.find_one()['comments_count'], 5)
+        self.assertEqual(len(get_comments_page(self.db.comment, self.parent, 1)), 3)
+
+    def test_move_embedded_again(self):    # interrupted after pushing to buckets, before removing parent['comments']
+        comments = [{'_id': ObjectId(), 'content': str(i), 'published_date': i} for i in range(5)]
+        self.db.file.update_one({'_id': self.parent}, {'$set': {'comments': comments}})
+        comment_save_to_mongo(self.db.comment, self.db.file, added=[(self.parent, comment) for comment in comments[:4]])
+        self.assertEqual(move_embedded_comments(self.db.comment, self.db.file), 1)
+        self.assertEqual(sum(bucket['count'] for bucket in self.db.comment.find()), 5)
+        self.assertEqual(self.db.file.find_one()['comments_count'], 5)
+        self.assertEqual(move_embedded_comments(self.db.comment, self.db.file), 0)
+
+
+class FileCursorTest(SimpleTestCase):
+    def test_encode_decode(self):
+        file = {'_id': ObjectId(), 'published_date': 1727680000}
+        token = encode_file_cursor(file)
+        self.assertEqual(decode_file_cursor(token), (1727680000, file['_id']))
+        self.assertEqual(get_file_cursor_query(token), {'$or': [{'published_date': {'$lt': 1727680000}},
+                                                                {'published_date': 1727680000, '_id': {'$lt': file['_id']}}]})
+
+    def test_invalid(self):
+        for token in ['', 'abc', encode_file_cursor({'_id': 'bad', 'published_date': 1}),
+                      encode_file_cursor({'_id': ObjectId(), 'published_date': 'x'}), '$$$$']:
+            with self.assertRaises(ValueError):
+                decode_file_cursor(token)
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+@override_settings(FILE_STEP=4)
+class FileKeysetPageTest(SimpleTestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        # many files with same published_date, so pages are split between them (_id is the tie-breaker)
+        self.db.file.insert_many([{'_id': ObjectId(), 'published_date': 1700000000 + i // 3, 'visible': i % 2 == 0}
+                                  for i in range(15)])
+        patcher = mock.patch('main.views.mongo_db', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_all(self, query):    # pages of cursor mode, until the last (not full) page
+        files, after = [], ''
+        while True:
+            request = RequestFactory().get('/files/', {'after': after})
+            page = FileList().find_files(request, query, 1, {'_id': 1, 'published_date': 1})
+            files += page
+            if len(page) < 4:
+                return files
+            after = encode_file_cursor(page[-1])
+
+    def test_continuity(self):
+        for query in [{}, {'visible': True}]:
+            expected = list(self.db.file.find(query, {'_id': 1, 'published_date': 1}).sort([('published_date', -1), ('_id', -1)]))
+            self.assertEqual(self.get_all(query), expected)      # no file is repeated or missed between pages
+
+    def test_invalid_after(self):
+        request = RequestFactory().get('/files/', {'after': 'abc'})
+        with self.assertRaises(ValueError) as e:
+            FileList().find_files(request, {}, 1, {'_id': 1})
+        self.assertEqual(e.exception.args[0], 'after')
+
+
+class NumberValidationTest(SimpleTestCase):
+    def test_prices(self):
+        s = FileMongoSerializer()
+        self.assertEqual(s.validate_total_price('۱۲۰۰۰'), Decimal(12000))
+        self.assertEqual(s.validate_price_per_meter('12٬000 تومان'), Decimal(12000))
+        self.assertEqual(s.validate_metraj('۱۲۰'), '120')
+        for value in ['NaN', 'Infinity', '-inf', 'sNaN', '1e30', str(2 ** 63), 'abc']:
+            with self.assertRaises(DjangoValidationError):
+                s.validate_total_price(value)
+            with self.assertRaises(DjangoValidationError):
+                s.validate_price_per_meter(value)
+        for value in ['9' * 30, '²', 'abc', '-5', '+5', '1_000', ' 5']:
+            with self.assertRaises(DjangoValidationError):
+                s.validate_metraj(value)
+
+    def test_search_filters(self):
+        self.assertEqual(get_file_search_query({'max_price': str(2 ** 63 - 1)}), {'total_price_num': {'$lte': 2 ** 63 - 1}})
+        for params in [{'min_price': str(2 ** 63)}, {'neighborhood': '-' + '9' * 20}, {'max_metraj': 'nan'}]:
+            with self.assertRaises(ValueError):
+                get_file_search_query(params)
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+class BackfillFileNumbersTest(SimpleTestCase):
+    def test_backfill(self):
+        collection = mongomock.MongoClient().db.file
+        ids = collection.insert_many([
+            {'metraj': '120', 'total_price': Decimal128('9000000000'), 'price_per_meter': Decimal128('75000000')},
+            {'metraj': '80', 'total_price': Decimal128('NaN')},
+            {'metraj': '50', 'metraj_num': 50, 'total_price': None},     # new file (has numbers)
+        ]).inserted_ids
+        self.assertEqual(backfill_file_numbers(collection, batch_size=1), (2, 1))
+        files = list(collection.find({}, {'_id': 0}).sort('_id', 1))
+        self.assertEqual(files[0]['total_price_num'], 9000000000)
+        self.assertEqual((files[0]['metraj_num'], files[0]['price_per_meter_num']), (120, 75000000))
+        self.assertEqual(files[1]['metraj_num'], 80)
+        self.assertNotIn('total_price_num', files[1])
+        self.assertEqual(backfill_file_numbers(collection), (0, 1))     # runs again without changing anything
+        self.assertEqual(collection.find_one({'_id': ids[0]}, {'_id': 0}), files[0])
+
+
+class FileSearchFeaturesTest(SimpleTestCase):
+    def test_features(self):   # id, english name or persian name (with other forms of letters) like saved features
+        query = get_file_search_query({'features': '3, elevator,' + 'آسانسور'.replace('ی', 'ي')})
+        self.assertEqual(query, {'features': {'$all': ['پارکینگ', 'آسانسور', 'آسانسور']}})
+        for features in ['a,b', 'parking,', '999']:
+            with self.assertRaises(ValueError):
+                get_file_search_query({'features': features})
+
+    def test_bad_request(self):
+        request = RequestFactory().get('/files/search/', {'features': 'parking,unknown'})
+        force_authenticate(request, User())
+        response = FileSearch.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('unknown', response.data['error'])
+
+
+class CrawlWorkerTest(SimpleTestCase):
+    def copy_profile(self, directory):     # stand-in of copy_chrome_profile, keeps directory to check removing it
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'profile'))
+        return os.path.join(directory, 'profile')
+
+    def test_setup_fails(self):     # profile copy is removed and error recorded, cards are left for other workers
+        card_urls = queue.Queue()
+        card_urls.put('https://divar.ir/v/1')
+        for patches in [{'copy_chrome_profile': mock.Mock(side_effect=OSError('no profile'))},
+                        {'copy_chrome_profile': self.copy_profile, 'setup_driver': mock.Mock(side_effect=Exception('no chrome'))}]:
+            directory = tempfile.mkdtemp()
+            with mock.patch.multiple('main.crawl', **patches), mock.patch('tempfile.mkdtemp', return_value=directory):
+                files, errors = crawl_worker(0, card_urls)
+            self.assertEqual((files, list(errors)), ({}, ['worker 0']))
+            self.assertFalse(os.path.exists(directory))
+            self.assertEqual(card_urls.qsize(), 1)
+
+    def test_driver_quit(self):
+        driver = mock.Mock()
+        card_urls = queue.Queue()
+        with mock.patch.multiple('main.crawl', copy_chrome_profile=self.copy_profile, setup_driver=mock.Mock(return_value=driver)):
+            files, errors = crawl_worker(1, card_urls)
+        self.assertEqual((files, errors), ({}, {}))
+        driver.quit.assert_called_once()
+        self.assertFalse(os.path.exists(self.directory))
+
+    def test_crawl_fails(self):    # failed files are not returned, only their errors (files without url or title)
+        class FakeCrawl:
+            def __init__(self):
+                self.file = {'title': None, 'url': None}
+
+            def crawl_file(self, driver):
+                if driver.get.call_args[0][0].endswith('/bad'):
+                    raise TimeoutException('not loaded')
+                self.file['title'] = 'good'
+
+        cards = {'https://divar.ir/v/good': 'good', 'https://divar.ir/v/bad': 'bad'}
+        with mock.patch.multiple('main.crawl', copy_chrome_profile=self.copy_profile, setup_driver=mock.Mock(),
+                                 crawl_cards=mock.Mock(return_value=cards), FileCrawl=FakeCrawl):
+            files, errors = crawl_files('tehran', workers=1)
+        self.assertEqual(files, [{'title': 'good', 'url': 'https://divar.ir/v/good'}])
+        self.assertEqual(errors, {'https://divar.ir/v/bad': 'Message: not loaded\n'})
+
+    def test_no_cards(self):    # no worker (chrome) starts
+        worker = mock.Mock()
+        with mock.patch.multiple('main.crawl', setup_driver=mock.Mock(), crawl_cards=mock.Mock(return_value={}), crawl_worker=worker):
+            self.assertEqual(crawl_files('tehran'), ([], {}))
+        worker.assert_not_called()
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+class BulkCreateTest(SimpleTestCase):
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.file
+        ensure_file_indexes(self.collection)
+        self.collection.insert_one({'title': 'old', 'file_id': 'f0'})
+        patcher = mock.patch('main.serializers.invalidate_files')
+        self.invalidate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, files):
+        s = FileMongoSerializer(many=True, context={'bulk': True})
+        s.mongo_collection = self.collection
+        return s, s.create(files)
+
+    def test_unique_check(self):
+        files = [{'title': 'old', 'file_id': 'f1'}, {'title': 'a', 'file_id': 'f2'}, {'title': 'a', 'file_id': 'f3'},
+                 {'title': 'b', 'file_id': 'f0'}, {'title': 'c', 'file_id': 'f4'}]
+        with mock.patch.object(self.collection, 'find', wraps=self.collection.find) as find:
+            s, saved = self.create(files)
+        find.assert_called_once()     # one query for all files
+        self.assertEqual(find.call_args[0][0], {'$or': [{'title': {'$in': ['old', 'a', 'a', 'b', 'c']}},
+                                                        {'file_id': {'$in': ['f1', 'f2', 'f3', 'f0', 'f4']}}]})
+        self.assertEqual(s.failed, {0: {'title': ['The title must be unique.']}, 2: {'title': ['The title must be unique.']},
+                                    3: {'file_id': ['The file_id must be unique.']}})
+        self.assertEqual([file['title'] for file in saved], ['a', 'c'])
+        self.assertEqual(self.collection.count_documents({}), 1 + len(saved))
+        self.invalidate.assert_called_once_with([])
+
+    def test_bulk_write_error(self):    # saved by others between find and insert, unique index rejects them
+        with mock.patch.object(self.collection, 'find', return_value=[]):
+            s, saved = self.create([{'title': 'a', 'file_id': 'f1'}, {'title': 'old', 'file_id': 'f2'}, {'title': 'b', 'file_id': 'f3'}])
+        self.assertEqual(list(s.failed), [1])
+        self.assertIn('non_field_errors', s.failed[1])
+        self.assertEqual([file['title'] for file in saved], ['a', 'b'])
+        self.assertEqual(sorted(file['title'] for file in self.collection.find()), ['a', 'b', 'old'])
+
+    def test_all_invalid(self):
+        s, saved = self.create([{'title': 'old'}])
+        self.assertEqual((saved, list(s.failed)), ([], [0]))
+        self.invalidate.assert_not_called()
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+class MongoUniqueValidatorTest(SimpleTestCase):
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.file
+        self.old_id = self.collection.insert_one({'title': 'old', 'file_id': 'f0'}).inserted_id
+        collection = self.collection
+
+        class ItemSerializer(serializers.Serializer):
+            title = serializers.CharField(validators=[MongoUniqueValidator(collection, 'title')])
+            file_id = serializers.CharField(validators=[MongoUniqueValidator(collection, 'file_id')])
+        self.serializer_class = ItemSerializer
+
+    def test_one_query_per_field(self):
+        items = [{'title': f'title{i}', 'file_id': f'f{i + 1}'} for i in range(20)]
+        with mock.patch.object(self.collection, 'find', wraps=self.collection.find) as find:
+            s = self.serializer_class(data=items, many=True)
+            self.assertTrue(s.is_valid(), s.errors)
+        self.assertEqual([call[0][0] for call in find.call_args_list], [
+            {'title': {'$in': mock.ANY}}, {'file_id': {'$in': mock.ANY}}])
+        self.assertEqual(sorted(find.call_args_list[0][0][0]['title']['$in']), sorted(item['title'] for item in items))
+
+    def test_existing(self):
+        s = self.serializer_class(data=[{'title': 'new', 'file_id': 'f1'}, {'title': ' old ', 'file_id': 'f2'}], many=True)
+        self.assertFalse(s.is_valid())
+        self.assertEqual(s.errors, [{}, {'title': ['The title must be unique.']}])
+
+    def test_duplicate_in_list(self):    # first item is valid, second item and after raise error
+        items = [{'title': 'a', 'file_id': 'f1'}, {'title': 'a', 'file_id': 'f2'}, {'title': 'a', 'file_id': 'f3'}]
+        s = self.serializer_class(data=items, many=True)
+        self.assertFalse(s.is_valid())
+        self.assertEqual(s.errors, [{}, {'title': ['The title must be unique.']}, {'title': ['The title must be unique.']}])
+
+    def test_update_excludes_self(self):
+        s = self.serializer_class(data={'title': 'old', 'file_id': 'f0'})
+        s.pk = str(self.old_id)
+        self.assertTrue(s.is_valid(), s.errors)
+        s = self.serializer_class(data={'title': 'old', 'file_id': 'f0'})
+        s.pk = str(ObjectId())     # other document
+        self.assertFalse(s.is_valid())
+        self.assertEqual(set(s.errors), {'title', 'file_id'})
+
+
+class CategoryTest(TestCase):
+    def add(self, name, father=None):
+        category = Category(name=name, slug=name, father_category=father)
+        category.save()
+        return category
+
+    def assertTree(self, expected):   # expected like: {name: (path names, level, levels_afterthis)}
+        categories = {category.id: category for category in Category.objects.all()}
+        tree = {category.name: ([categories[int(id)].name for id in category.path.strip('/').split('/')], category.level,
+                                category.levels_afterthis) for category in categories.values()}
+        self.assertEqual(tree, expected)
+
+    def setUp(self):
+        self.a = self.add('a')
+        self.b = self.add('b', self.a)
+        self.c = self.add('c', self.b)
+        self.d = self.add('d')
+
+    def test_add(self):
+        self.assertEqual(self.c.path, f'/{self.a.id}/{self.b.id}/{self.c.id}/')
+        self.assertTree({'a': (['a'], 1, 2), 'b': (['a', 'b'], 2, 1), 'c': (['a', 'b', 'c'], 3, 0), 'd': (['d'], 1, 0)})
+        self.assertEqual(set(self.a.get_childes()), {self.b, self.c})
+
+    def test_move(self):     # childes move with their father, levels_afterthis of old and new fathers are updated
+        self.b.father_category = self.d
+        self.b.save()
+        self.assertTree({'a': (['a'], 1, 0), 'b': (['d', 'b'], 2, 1), 'c': (['d', 'b', 'c'], 3, 0), 'd': (['d'], 1, 2)})
+        self.b.father_category = None
+        self.b.save()
+        self.assertTree({'a': (['a'], 1, 0), 'b': (['b'], 1, 1), 'c': (['b', 'c'], 2, 0), 'd': (['d'], 1, 0)})
+        self.a.refresh_from_db()
+        self.c.refresh_from_db()      # path of c is changed by moving b
+        self.a.father_category = self.c     # deeper
+        self.a.save()
+        self.assertTree({'a': (['b', 'c', 'a'], 3, 0), 'b': (['b'], 1, 2), 'c': (['b', 'c'], 2, 1), 'd': (['d'], 1, 0)})
+
+    def test_move_to_own_child(self):
+        self.a.father_category = self.c
+        with self.assertRaises(DjangoValidationError):
+            self.a.save()
+        self.a.refresh_from_db()
+        self.assertTree({'a': (['a'], 1, 2), 'b': (['a', 'b'], 2, 1), 'c': (['a', 'b', 'c'], 3, 0), 'd': (['d'], 1, 0)})
+
+    def test_max_level(self):
+        father = self.c
+        for name in ['e', 'f', 'g']:     # levels 4, 5, 6
+            father = self.add(name, father)
+        with self.assertRaises(DjangoValidationError):
+            self.add('h', father)
+        self.d.father_category = self.a     # d (1 level) under a (6 levels) is ok, b under d is not
+        self.d.save()
+        self.b.refresh_from_db()
+        self.b.father_category = self.d
+        with self.assertRaises(DjangoValidationError):
+            self.b.save()
+
+    def test_delete(self):     # deletes subtree, levels_afterthis of fathers are updated
+        self.b.delete()
+        self.assertTree({'a': (['a'], 1, 0), 'd': (['d'], 1, 0)})
+
+
+class CategoryPathMigrationTest(TransactionTestCase):
+    def migrate(self, target):   # returns apps of the state after migrating
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        self.migrate(('main', '0002_category_path'))
+
+    def test_reversible(self):
+        apps = self.migrate(('main', '0001_initial'))
+        OldCategory = apps.get_model('main', 'Category')
+        a = OldCategory.objects.create(name='a', slug='a', level=1)
+        b = OldCategory.objects.create(name='b', slug='b', level=2, father_category=a)
+        c = OldCategory.objects.create(name='c', slug='c', level=3, father_category=b)
+        d = OldCategory.objects.create(name='d', slug='d', level=1)
+
+        apps = self.migrate(('main', '0002_category_path'))
+        categories = {category.name: category for category in apps.get_model('main', 'Category').objects.all()}
+        self.assertEqual({name: (category.path, category.level, category.levels_afterthis) for name, category in categories.items()},
+                         {'a': (f'/{a.id}/', 1, 2), 'b': (f'/{a.id}/{b.id}/', 2, 1), 'c': (f'/{a.id}/{b.id}/{c.id}/', 3, 0),
+                          'd': (f'/{d.id}/', 1, 0)})
+
+        apps = self.migrate(('main', '0001_initial'))
+        categories = {category.name: category for category in apps.get_model('main', 'Category').objects.all()}
+        self.assertEqual({name: (set(category.all_childes_id.split(',')) - {''}, category.previous_father_id)
+                          for name, category in categories.items()},
+                         {'a': ({str(b.id), str(c.id)}, None), 'b': ({str(c.id)}, a.id), 'c': (set(), b.id), 'd': (set(), None)})
+
+
+class ImportCategoriesTest(TestCase):
+    def get_tree(self):    # like: {name: (father names, level, levels_afterthis)}
+        categories = {category.id: category for category in Category.objects.all()}
+        return {category.name: ([categories[int(id)].name for id in category.path.strip('/').split('/')[:-1]],
+                                category.level, category.levels_afterthis) for category in categories.values()}
+
+    def call(self, *args):
+        out = io.StringIO()
+        call_command('import_categories', *args, stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        Category(name='root', slug='root').save()     # fathers could be in database
+        nodes = [{'name': 'digital', 'childes': [{'name': 'phone', 'childes': [{'name': 'samsung'}, {'name': 'apple'}]}]},
+                 {'name': 'laptop', 'father': 'root'}]
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(nodes, f)
+        self.addCleanup(os.remove, f.name)
+        self.assertIn('5 categories imported', self.call(f.name))
+        self.assertEqual(self.get_tree(), {'root': ([], 1, 1), 'laptop': (['root'], 2, 0), 'digital': ([], 1, 2),
+                                           'phone': (['digital'], 2, 1), 'samsung': (['digital', 'phone'], 3, 0),
+                                           'apple': (['digital', 'phone'], 3, 0)})
+
+    def test_csv(self):    # childes could come before their fathers
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='') as f:
+            f.write('name,father,slug,post_product\nphone,digital,,\ndigital,,digital-slug,post\n')
+        self.addCleanup(os.remove, f.name)
+        self.call(f.name)
+        self.assertEqual(self.get_tree(), {'digital': ([], 1, 1), 'phone': (['digital'], 2, 0)})
+        self.assertEqual(Category.objects.values_list('slug', 'post_product').get(name='digital'), ('digital-slug', 'post'))
+
+    def test_errors(self):    # nothing is imported
+        Category(name='root', slug='root').save()
+        for nodes, error in [([{'name': 'a', 'father': 'b'}, {'name': 'b', 'father': 'a'}], 'father of itself'),
+                             ([{'name': 'a', 'father': 'x'}], 'not found'),
+                             ([{'name': 'a'}, {'name': 'b', 'father': 'a'}, {'name': 'a', 'father': 'root'}], 'repeated: a'),
+                             ([{'name': 'root'}], 'already exists'),
+                             ([{'name': str(i), 'father': str(i - 1) if i else None} for i in range(7)], 'more than 6')]:
+            with self.assertRaisesRegex(ValueError, error):
+                import_categories(nodes)
+            self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['root'])
+
+    def test_verify_repair(self):
+        import_categories([{'name': 'a'}, {'name': 'b', 'father': 'a'}, {'name': 'c', 'father': 'b'}, {'name': 'd'}])
+        expected = self.get_tree()
+        Category.objects.filter(name='c').update(level=5, path='/wrong/')      # corrupted by raw queries
+        Category.objects.filter(name='a').update(levels_afterthis=0)
+        output = self.call('--verify')
+        self.assertIn('2 categories wrong', output)
+        self.assertEqual(Category.objects.get(name='c').path, '/wrong/')     # verify doesn't change anything
+        self.assertIn('2 categories repaired', self.call('--repair'))
+        self.assertEqual(self.get_tree(), expected)
+        self.assertIn('0 categories wrong', self.call('--verify'))
+
+    def test_verify_broken(self):     # circular fathers can't be repaired, only reported
+        import_categories([{'name': 'a'}, {'name': 'b', 'father': 'a'}])
+        a, b = Category.objects.get(name='a'), Category.objects.get(name='b')
+        Category.objects.filter(id=a.id).update(father_category=b)
+        self.assertIn(f'circular or missing father: {sorted([a.id, b.id])}', self.call('--verify'))
+
+    def test_no_file(self):
+        with self.assertRaises(CommandError):
+            self.call()
+
+
+class CommentSaveTest(SimpleTestCase):
+    def test_operations(self):    # one ordered bulk_write for all comments, one unordered for counts of parents
+        comment_col, parent_col = mock.Mock(), mock.Mock()
+        parent1, parent2, edited_id = ObjectId(), ObjectId(), ObjectId()
+        comments = [{'_id': ObjectId(), 'content': str(i), 'published_date': i} for i in range(3)]
+        comment_save_to_mongo(comment_col, parent_col, added=[(str(parent1), comments[0]), (parent2, comments[1]), (parent1, comments[2])],
+                              edited=[(str(edited_id), {'content': 'edited', 'status': 2})])
+        open_bucket = {'count': {'$lt': settings.COMMENT_BUCKET_SIZE}}
+        comment_col.bulk_write.assert_called_once_with([
+            pymongo.UpdateOne({'parent': parent1, **open_bucket}, {'$push': {'comments': comments[0]}, '$inc': {'count': 1},
+                                                                   '$setOnInsert': {'published_date': 0}}, upsert=True),
+            pymongo.UpdateOne({'parent': parent2, **open_bucket}, {'$push': {'comments': comments[1]}, '$inc': {'count': 1},
+                                                                   '$setOnInsert': {'published_date': 1}}, upsert=True),
+            pymongo.UpdateOne({'parent': parent1, **open_bucket}, {'$push': {'comments': comments[2]}, '$inc': {'count': 1},
+                                                                   '$setOnInsert': {'published_date': 2}}, upsert=True),
+            pymongo.UpdateOne({'comments._id': edited_id}, {'$set': {'comments.$.content': 'edited', 'comments.$.status': 2}})])
+        parent_col.bulk_write.assert_called_once_with([
+            pymongo.UpdateOne({'_id': parent1}, {'$inc': {'comments_count': 2}}),
+            pymongo.UpdateOne({'_id': parent2}, {'$inc': {'comments_count': 1}})], ordered=False)
+
+    def test_only_edited(self):    # comments_count doesn't change
+        comment_col, parent_col = mock.Mock(), mock.Mock()
+        comment_save_to_mongo(comment_col, parent_col, edited=[(ObjectId(), {'content': 'a'})])
+        comment_col.bulk_write.assert_called_once()
+        parent_col.bulk_write.assert_not_called()
+        self.assertIsNone(comment_save_to_mongo(comment_col, parent_col))
+
+    @skipUnless(mongomock, 'mongomock is not installed')
+    def test_bucket_size(self):    # new bucket is upserted when open bucket has COMMENT_BUCKET_SIZE comments
+        db, parent = mongomock.MongoClient().db, ObjectId()
+        size = settings.COMMENT_BUCKET_SIZE
+        comments = [{'_id': ObjectId(), 'published_date': i} for i in range(size + 1)]
+        comment_save_to_mongo(db.comment, db.file, added=[(parent, comment) for comment in comments])
+        buckets = list(db.comment.find().sort('_id', 1))
+        self.assertEqual([bucket['count'] for bucket in buckets], [size, 1])
+        self.assertEqual([comment['_id'] for bucket in buckets for comment in bucket['comments']], [comment['_id'] for comment in comments])
+        self.assertEqual(buckets[1]['published_date'], size)
+
+
+@skipUnless(mongomock, 'mongomock is not installed')
+class StoreImageTest(SimpleTestCase):
+    def test_concurrent(self):    # two requests store same image at the same time, both writes finish before replacing
+        buffer = io.BytesIO()
+        PilImage.new('RGB', (4, 4)).save(buffer, 'PNG')
+        barrier = threading.Barrier(2, timeout=5)
+
+        def save(path):
+            with open(path, 'wb') as f:
+                f.write(buffer.getvalue()[:10])     # half written
+                barrier.wait()
+                f.write(buffer.getvalue()[10:])
+            barrier.wait()
+
+        results = []
+        with tempfile.TemporaryDirectory() as directory, override_settings(BASE_DIR=directory), \
+                mock.patch('main.images.mongo_db', mongomock.MongoClient().db):
+            threads = [threading.Thread(target=lambda: results.append(store_image('ab12', 'test', 'alt', save))) for i in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual([image.url for image in results], [f'{settings.MEDIA_URL}test/ab/ab12-default.PNG'] * 2)
+            self.assertEqual(os.listdir(f'{directory}{settings.MEDIA_URL}test/ab'), ['ab12-default.PNG'])    # no temp file
+
+
+class VariantCacheTest(SimpleTestCase):
+    def test_evict(self):    # least recently used variants are removed, lock files are kept (could be locked by others)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = VariantCache(directory, max_size=250)
+            paths = [cache.get_path('ab12', size, 'JPEG') for size in [240, 420, 640]]
+            os.makedirs(os.path.dirname(paths[0]))
+            for i, path in enumerate(paths):
+                for name in [path, f'{path}.lock']:
+                    with open(name, 'wb') as f:
+                        f.write(b'x' * 100 if name == path else b'')
+                os.utime(path, (1000 + i, 1000 + i))
+            cache.evict()
+            self.assertEqual([os.path.exists(path) for path in paths], [False, True, True])
+            self.assertTrue(all(os.path.exists(f'{path}.lock') for path in paths))
+            self.assertEqual(cache.size, 200)
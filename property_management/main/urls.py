@@ -12,5 +12,14 @@ urlpatterns = [
     path('crawl_files/', views.FileCrawl.as_view(), name='crawl-files'),
     path('files/', views.FileList.as_view(), name='file-list'),
     path('files/<int:page>/', views.FileList.as_view(), name='file-list-page'),
+    path('files/search/', views.FileSearch.as_view(), name='file-search'),
+    path('files/search/<int:page>/', views.FileSearch.as_view(), name='file-search-page'),
+    path('files/export/', views.FileExport.as_view(), name='file-export'),
     path('files/<id>/', views.FileDetail.as_view(), name='file-detail'),
+    path('files/<id>/comments/', views.FileComments.as_view(), name='file-comments'),
+    path('files/<id>/comments/<int:page>/', views.FileComments.as_view(), name='file-comments-page'),
+    path('cache_stats/', views.CacheStats.as_view(), name='cache-stats'),
+    path('posts/<id>/comments/', views.PostComments.as_view(), name='post-comments'),
+    path('posts/<id>/comments/<int:page>/', views.PostComments.as_view(), name='post-comments-page'),
+    path('images/<str:hash>/<int:size>.<str:format>', views.ImageVariant.as_view(), name='image-variant'),
 ]
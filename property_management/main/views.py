@@ -1,5 +1,6 @@
 from django.conf import settings
-from rest_framework.permissions import AllowAny
+from django.http import FileResponse, StreamingHttpResponse, Http404
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django.contrib.sites.models import Site
 from rest_framework.response import Response
 from rest_framework import views
@@ -9,22 +10,21 @@ from mongoserializer.methods import ResponseMongo
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import re
 import time
+from bson.errors import InvalidId
 import jwt
 
 from .serializers import *
-from .methods import get_page_count
-from .crawl import crawl_files, setup_driver
-
-# Filled README.md and exclude index from login requirements
-env = environ.Env()
-environ.Env.read_env(os.path.join(Path(__file__).resolve().parent.parent.parent, '.env'))
-username, password, db_name = quote_plus(env('MONGO_USER_NAME')), quote_plus(env('MONGO_USER_PASS')), env('MONGO_DBNAME')
-auth_source, host = env('MONGO_SOURCE'), env('MONGO_HOST')
-uri = f"mongodb://{username}:{password}@{host}:27017/{db_name}?authSource={auth_source}"
-mongo_db = pymongo.MongoClient(uri)[db_name]
+from .methods import get_conditional_response, file_version_projection, get_comments_page, comment_save_to_mongo, get_changed_cards, save_crawl_states, get_page_count, get_file_count, get_file_cursor_query, encode_file_cursor, get_file_search_query
+from .crawl import crawl_files, crawl_files_http, store_crawled_images, setup_driver
+from .mongo import mongo_db
+from .images import get_variant_cache
+from .cache import file_detail_cache, file_list_cache, get_list_key
+from .export import export_formats, get_export_fields, iter_export
 
 
+# Filled README.md and exclude index from login requirements
 class index(views.APIView):
     authentication_classes = []   # # exclude this view from loging required
     permission_classes = [AllowAny]
@@ -64,12 +64,49 @@ class Home(views.APIView):
 
 class FileList(views.APIView):
     def get(self, request, *args, **kwargs):
-        page = kwargs.get('page', 1)
+        return self.list_files(request, {}, kwargs.get('page', 1), count=True)
+
+    def list_files(self, request, query, page=1, count=False):
+        # two modes: 1- page mode like: /files/3/  2- cursor (keyset) mode like: /files/?after=<next of previous page>
+        # in cursor mode, deep pages cost same as first page (skip(..) reads and drops all previous documents)
+        # only list fields load from db, '?fields=title,total_price' limits them more
+        # query is made from request.GET, so page and request.GET are the key of the response in file_list_cache
+        # ETag is from versions of files of the page (and page count), conditional requests checked by projection query
+        key = get_list_key(type(self).__name__, page, request.GET)
+        projection = FileListSerializer.get_version_projection()
+        page_count = get_page_count(get_file_count(mongo_db.file), settings.FILE_STEP) if count else None
+        try:
+            return get_conditional_response(request, file_list_cache, key, projection,
+                                            lambda: self.get_files_data(request, query, page, page_count),
+                                            lambda: self.find_files(request, query, page, projection), extra=page_count)
+        except ValueError as e:
+            return Response({e.args[0]: e.args[1]}, status=400)
+
+    def find_files(self, request, query, page, projection):  # raises ValueError like: ('after', 'error message')
         step = settings.FILE_STEP
-        rang = (page * step - step, page * step)
-        files = list(mongo_db.file.find().sort('published_date', -1).skip(rang[0]).limit(rang[1]))
-        page_count = get_page_count(len(files), step)
-        return ResponseMongo({'files': files, 'page_count': page_count})
+        sort = [('published_date', -1), ('_id', -1)]     # same as 'published_date_id' index
+        after = request.GET.get('after')
+        if after is not None:
+            try:
+                if after:     # '?after=' means first page
+                    query = {'$and': [query, get_file_cursor_query(after)]} if query else get_file_cursor_query(after)
+            except ValueError as e:
+                raise ValueError('after', str(e))
+            return list(mongo_db.file.find(query, projection).sort(sort).limit(step))
+        return list(mongo_db.file.find(query, projection).sort(sort).skip(page * step - step).limit(step))
+
+    def get_files_data(self, request, query, page, page_count):  # returns (data, files)
+        fields = request.GET['fields'].split(',') if request.GET.get('fields') else None
+        try:
+            projection = FileListSerializer.get_projection(fields)
+        except ValueError as e:
+            raise ValueError('fields', str(e))
+        files = self.find_files(request, query, page, {**projection, **FileListSerializer.get_version_projection()})
+        next_cursor = encode_file_cursor(files[-1]) if len(files) == settings.FILE_STEP else None
+        data = {'files': FileListSerializer(files, many=True, fields=fields).data, 'next': next_cursor}
+        if page_count is not None:     # counting filtered files is expensive, only total count of files is available
+            data['page_count'] = page_count
+        return data, files
 
     def post(self, request, *args, **kwargs):
         s = FileMongoSerializer(data=request.data, request=request)
@@ -79,10 +116,55 @@ class FileList(views.APIView):
             return Response(s.errors)
 
 
+class FileSearch(FileList):
+    # filter files like: /files/search/?neighborhood=5&min_price=1000000000&features=پارکینگ,آسانسور
+    # all filters are in 'get_file_search_query', every filter has supporting index in 'file_indexes'
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, *args, **kwargs):
+        try:
+            query = get_file_search_query(request.GET)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return self.list_files(request, query, kwargs.get('page', 1))
+
+
+class FileExport(views.APIView):
+    # stream all files (or filtered like FileSearch) like: /files/export/?type=csv&fields=title,total_price&neighborhood=5
+    # type is 'ndjson' (default) or 'csv' ('format' param is used by rest_framework). response is gzip compressed when
+    # client accepts it (Accept-Encoding), '?gzip=0' disables it
+    http_method_names = ['get', 'options']
+
+    def get(self, request, *args, **kwargs):
+        type = request.GET.get('type', 'ndjson')
+        try:
+            fields = get_export_fields(request.GET.get('fields'), FileMongoSerializer._declared_fields)
+            query = get_file_search_query(request.GET)
+            if type not in export_formats:
+                raise ValueError(f"type must be one of: {', '.join(export_formats)}")
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        compress = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '') and request.GET.get('gzip') != '0'
+        response = StreamingHttpResponse(iter_export(mongo_db.file, query, fields, type, compress),
+                                         content_type=f'{export_formats[type]}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="files.{type}"'
+        response['Vary'] = 'Accept-Encoding'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+
 class FileDetail(views.APIView):
     def get(self, request, *args, **kwargs):
-        data = mongo_db.file.find_one({'_id': ObjectId(kwargs['id'])})
-        return ResponseMongo(data)
+        # old files could have embedded comments, comments are read from FileComments
+        # ETag/Last-Modified from 'updated', If-None-Match of not cached files checked by loading only versions
+        _id = ObjectId(kwargs['id'])
+
+        def get_file():
+            file = mongo_db.file.find_one({'_id': _id}, {'comments': 0})
+            return file, [file]
+        return get_conditional_response(request, file_detail_cache, str(_id), file_version_projection, get_file,
+                                        lambda: list(mongo_db.file.find({'_id': _id}, file_version_projection).limit(1)))
 
     def put(self, request, *args, **kwargs):
         s = FileMongoSerializer(_id=kwargs['id'], data=request.data, request=request, partial=True)
@@ -92,6 +174,69 @@ class FileDetail(views.APIView):
             return Response(s.errors)
 
 
+class FileComments(views.APIView):
+    # comments of a file like: /files/<id>/comments/2/ (settings.COMMENT_BUCKET_SIZE comments per page, newest first)
+    parent_collection = mongo_db.file
+
+    def get(self, request, *args, **kwargs):
+        try:
+            comments = get_comments_page(mongo_db.comment, kwargs['id'], kwargs.get('page', 1))
+        except InvalidId:
+            raise Http404
+        return ResponseMongo({'comments': CommentSerializer(comments, many=True).data})
+
+    def post(self, request, *args, **kwargs):
+        try:
+            if not self.parent_collection.count_documents({'_id': ObjectId(kwargs['id'])}, limit=1):
+                raise Http404
+        except InvalidId:
+            raise Http404
+        many = isinstance(request.data, list)     # several comments could be sent together
+        s = CommentSerializer(data=request.data, request=request, many=many)
+        if s.is_valid():
+            comments = [s.child.get_serialized(data) for data in s.validated_data] if many else [s.get_serialized(s.validated_data)]
+            comment_save_to_mongo(mongo_db.comment, self.parent_collection, added=[(kwargs['id'], comment) for comment in comments])
+            self.comments_added(kwargs['id'])
+            return ResponseMongo(comments if many else comments[0])
+        return Response(s.errors, status=400)
+
+    def comments_added(self, id):
+        file_detail_cache.delete(str(ObjectId(id)))     # comments_count of the file changed
+
+
+class PostComments(FileComments):
+    # comments of a post like: /posts/<id>/comments/2/, same buckets as comments of files
+    parent_collection = mongo_db.post
+
+    def comments_added(self, id):    # posts are not cached
+        pass
+
+
+class ImageVariant(views.APIView):
+    # sizes of images in 'lazy' mode (settings.IMAGE_VARIANTS), rendered in first request and next served from cache
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        hash, size, format = kwargs['hash'], kwargs['size'], kwargs['format']
+        if not re.fullmatch(r'[0-9a-f]{40}', hash) or str(size) not in settings.IMAGE_SIZES:
+            raise Http404
+        path = get_variant_cache().get(hash, size, format)
+        if not path:
+            raise Http404
+        response = FileResponse(open(path, 'rb'), content_type=f'image/{format.lower()}')
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'   # content of the url never changes
+        return response
+
+
+class CacheStats(views.APIView):
+    # hits and misses of response caches (main/cache.py) in current process, like: {'file_detail': {'local_hits': 5, ..}}
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({'file_detail': file_detail_cache.get_stats(), 'file_list': file_list_cache.get_stats()})
+
+
 divar_verification_code = {'code': ''}
 class SmsCode(views.APIView):
     def get(self, request, *args, **kwargs):
@@ -178,19 +323,52 @@ class FileCrawl(views.APIView):
 
     def post(self, request, *args, **kwargs):
         location_to_search = 'کیانشهر'  # request.data['location_to_search']  # like 'کیانشهر'
-        files, errors = crawl_files(location_to_search, 2)
-        unique_titles, unique_files = [], []
-        for file in files:    # field unique validation only done when save file singular (so we have to validate here)
-            if file['title'] not in unique_titles:
+        # pages are fetched by http (without browser) and browser only used for phones, 'browser' crawls all by chrome
+        crawl = crawl_files if request.data.get('browser') else crawl_files_http
+        changed_cards = {}      # only new and modified cards are crawled, unchanged cards are skipped before opening
+
+        def cards_filter(cards):
+            changed_cards.update(get_changed_cards(mongo_db.crawl_state, cards))
+            return changed_cards
+        files, errors = crawl(location_to_search, 2, cards_filter=cards_filter)
+        titles, new_files, new_states, changed_files, changed_states = set(), [], [], [], []
+        for file in files:    # changed files are validated singular, so same titles must be removed here
+            if file.get('url') not in changed_cards:     # not crawled completely
+                continue
+            if file['title'] not in titles:
+                titles.add(file['title'])
                 cleaned_file = {key: value for key, value in file.items() if value is not None}
-                unique_titles.append(cleaned_file['title'])
-                unique_files.append(cleaned_file)
-        if unique_titles:
-            s = FileMongoSerializer(data=unique_files, request=request, many=True)
+                if cleaned_file.get('otagh'):    # rooms like '۲', saved as item of sleep_numbers catalog (searchable)
+                    cleaned_file['sleep_numbers'] = cleaned_file['otagh']
+                state = changed_cards[file['url']]
+                if state['file_id']:       # file changed in divar, update it in place
+                    changed_files.append(cleaned_file)
+                    changed_states.append(state)
+                else:
+                    new_files.append(cleaned_file)
+                    new_states.append(state)
+        errors.update(store_crawled_images(new_files))     # downloads images of all files in parallel
+        saved, failed = [], {}
+        if new_files:
+            s = FileMongoSerializer(data=new_files, request=request, many=True, context={'bulk': True})
+            if s.is_valid():
+                saved += s.save()
+                new_states = [state for i, state in enumerate(new_states) if i not in s.failed]
+                for state, file in zip(new_states, saved):
+                    state['file_id'] = file['_id']
+                save_crawl_states(mongo_db.crawl_state, new_states)
+                failed.update({new_files[i]['url']: error for i, error in s.failed.items()})
+            else:
+                failed['new'] = s.errors
+        if changed_files:
+            _ids = [str(state['file_id']) for state in changed_states]
+            s = FileMongoSerializer(_id=_ids, data=changed_files, request=request, many=True, partial=True)
             if s.is_valid():
-                files = s.save()
-                return ResponseMongo({'files_saved': files, 'files_failed': errors})
+                saved += s.save()
+                save_crawl_states(mongo_db.crawl_state, changed_states)
             else:
-                return ResponseMongo(s.errors)
+                failed['changed'] = s.errors
+        if saved or failed:
+            return ResponseMongo({'files_saved': saved, 'files_failed': errors, 'files_invalid': failed})
         else:
             return Response({'files_failed': errors})
@@ -102,6 +102,31 @@ DATABASES = {
     },
 }
 
+# cache must be shared between processes (like redis or file based) in production, because versions like
+# main/category_tree.py's version invalidate data of all processes. default (local memory) is per process
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', default=''),
+    },
+}
+
+# MongoDB connection, used by main/mongo.py (single client per process)
+MONGO = {
+    'NAME': env('MONGO_DBNAME'),
+    'USER': env('MONGO_USER_NAME'),
+    'PASSWORD': env('MONGO_USER_PASS'),
+    'HOST': env('MONGO_HOST'),
+    'PORT': 27017,
+    'AUTH_SOURCE': env('MONGO_SOURCE'),
+    'OPTIONS': {     # passes directly to pymongo.MongoClient
+        'maxPoolSize': env.int('MONGO_MAX_POOL_SIZE', default=50),   # max connections per process (worker)
+        'minPoolSize': env.int('MONGO_MIN_POOL_SIZE', default=0),
+        'waitQueueTimeoutMS': env.int('MONGO_WAIT_QUEUE_TIMEOUT_MS', default=5000),   # wait for free connection
+        'compressors': env('MONGO_COMPRESSORS', default='zlib'),   # like: 'zstd,zlib' ('zstd' needs zstandard package)
+    },
+}
+
 # customize 'django.contrib.auth.authenticate' behavior to use 'phone' instead 'username'
 AUTHENTICATION_BACKENDS = [
     'users.auth_backends.PhoneBackend',
@@ -249,3 +274,30 @@ POST_STEP = 6       # 6 means you will see 6 post in every PostList page, used i
 FILE_STEP = 6
 DEFAULT_SCHEME = 'http'   # uses in sitmape.py because we dont have access to request and request.scheme
 SECRET_HS = env('SECRET_HS')    # used in HS256 in users send sms
+FILE_COUNT_TIMEOUT = 60   # seconds, total count of files cached in FileList (page_count)
+FILE_LIST_ICON_SIZE = '240'   # size of 'icon' returned in FileList (one of sizes of FileMongoSerializer.icon)
+CRAWL_WORKERS = os.cpu_count()   # number of parallel chrome drivers in crawling files (main/crawl.py crawl_files)
+CRAWL_DEBUG_PORT = 9222    # remote debugging port of first driver, workers use next ports (9223, 9224, ...)
+# seconds to wait for every step of crawling (main/crawl.py) before raising TimeoutException, 'page': loading page
+# elements, 'phone': showing phone, 'gallery': opening images gallery, 'image': loading each image of gallery,
+# 'scroll': loading new cards after scroll (timeout means end of the cards), 'download': downloading an image
+CRAWL_TIMEOUTS = {'page': 10, 'phone': 10, 'gallery': 10, 'image': 3, 'scroll': 3, 'download': 20}
+CRAWL_HTTP_WORKERS = 8    # parallel http requests in main/crawl.py crawl_files_http (pages are fetched without browser)
+CRAWL_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0 Safari/537.36'
+IMAGE_BACKEND = 'process'   # renders sizes of uploaded images (main/images.py), 'process', 'inline' or dotted path of class
+IMAGE_WORKERS = 2     # processes of 'process' image backend
+CRAWL_DOWNLOAD_WORKERS = 16   # parallel downloads of crawled images (main/crawl.py download_images)
+CRAWL_HOST_CONNECTIONS = 4    # max parallel downloads from one host
+CRAWL_DOWNLOAD_RETRIES = 3    # retries of failed downloads (connection errors, 5xx and 429)
+CRAWL_RETRY_BACKOFF = 0.5     # seconds, waits 0.5, 1, 2, ... between retries
+IMAGE_VARIANTS = 'eager'   # 'eager': all sizes rendered after upload, 'lazy': every size rendered in its first request
+IMAGE_CACHE_DIR = MEDIA_ROOT / 'variants'     # rendered sizes of 'lazy' mode
+IMAGE_CACHE_SIZE = 1024 * 1024 * 1024    # bytes, least recently used sizes are removed when cache is bigger
+IMAGE_SIZES = ['240', '420', '640', '720', '960', '1280']    # sizes allowed to render in 'lazy' mode
+COMMENT_BUCKET_SIZE = 20    # comments in every bucket of 'comment' collection (main/methods.py), also comments per page
+RESPONSE_CACHE_ALIAS = 'default'    # shared tier of main/cache.py (alias of CACHES), None means only memory of process
+RESPONSE_CACHE_SIZE = 1000    # max responses in memory of every process (for each of FileDetail and FileList)
+RESPONSE_CACHE_TIMEOUT = 300    # seconds, responses in shared tier
+EXPORT_BATCH_SIZE = 1000    # documents in every batch of mongo cursor in exporting files (main/export.py)
+IMPORT_CHUNK_SIZE = 500    # lines of NDJSON validated and saved together in 'import_files' command
+IMPORT_WORKERS = os.cpu_count()    # processes validating files in 'import_files' command
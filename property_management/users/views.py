@@ -8,13 +8,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 import requests
-import pymongo
-import environ
 import uuid
 import jwt
-import os
-from pathlib import Path
-from urllib.parse import quote_plus
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
@@ -22,17 +17,10 @@ from .serializers import UserSerializer, TokenObtainPairSerializerCustom
 from .methods import login_validate
 from .models import User
 from main.methods import DictToObject
+from main.mongo import mongo_db
 from main.serializers import PostListSerializer
 
 
-env = environ.Env()
-environ.Env.read_env(os.path.join(Path(__file__).resolve().parent.parent.parent, '.env'))
-username, password, db_name = quote_plus(env('MONGO_USER_NAME')), quote_plus(env('MONGO_USER_PASS')), env('MONGO_DBNAME')
-host = env('MONGO_HOST')
-uri = f"mongodb://{username}:{password}@{host}:27017/{db_name}?authSource={db_name}"
-mongo_db = pymongo.MongoClient(uri)[db_name]
-
-
 class TokenObtainPairViewCustom(TokenObtainPairView):
     serializer_class = TokenObtainPairSerializerCustom
 